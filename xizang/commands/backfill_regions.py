@@ -0,0 +1,40 @@
+from scrapy.commands import ScrapyCommand
+from sqlalchemy import create_engine, text
+
+from xizang.models.models import upgrade_schema
+from xizang.utils.regions import area_name, lookup_many
+
+
+class Command(ScrapyCommand):
+    """按 area_code 批量补齐 winner_bid_info.area_name
+
+    scrapy backfill_regions [--all]
+    """
+
+    requires_project = True
+    default_settings = {'LOG_ENABLED': True}
+
+    def syntax(self):
+        return "[options]"
+
+    def short_desc(self):
+        return "Fill winner_bid_info.area_name from area_code in bulk"
+
+    def add_options(self, parser):
+        super().add_options(parser)
+        parser.add_argument('--all', action='store_true', help="recompute rows that already have area_name")
+
+    def run(self, args, opts):
+        engine = create_engine(self.settings.get('POSTGRES_URL'))
+        upgrade_schema(engine)
+        where = "area_code IS NOT NULL" if opts.all else "area_code IS NOT NULL AND area_name IS NULL"
+        with engine.begin() as conn:
+            # 不同的地区代码只有几百个，按代码而不是按行更新
+            codes = conn.execute(text(f"SELECT DISTINCT area_code FROM winner_bid_info WHERE {where}")).scalars().all()
+            names = [{'area_code': code, 'area_name': area_name(region)}
+                     for code, region in zip(codes, lookup_many(codes))]
+            if names:
+                conn.execute(text(f"UPDATE winner_bid_info SET area_name = :area_name "
+                                  f"WHERE area_code = :area_code AND {where}"), names)
+        unknown = sum(1 for row in names if not row['area_name'])
+        print(f"winner_bid_info: {len(names)} area codes filled, {unknown} unknown")
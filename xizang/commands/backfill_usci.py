@@ -0,0 +1,55 @@
+from itertools import islice
+
+from scrapy.commands import ScrapyCommand
+from sqlalchemy import create_engine, text
+
+from xizang.models.models import upgrade_schema
+from xizang.utils.usci import decode_many
+
+
+class Command(ScrapyCommand):
+    """校验 company_info.corp_code 并回填登记地、主体类型
+
+    scrapy backfill_usci [--batch-size 5000] [--all] [--show-invalid]
+    """
+
+    requires_project = True
+    default_settings = {'LOG_ENABLED': True}
+
+    def syntax(self):
+        return "[options]"
+
+    def short_desc(self):
+        return "Validate company_info.corp_code checksums and fill the decoded columns"
+
+    def add_options(self, parser):
+        super().add_options(parser)
+        parser.add_argument('--batch-size', type=int, default=5000, help="rows per update batch")
+        parser.add_argument('--all', action='store_true', help="recompute rows that were already checked")
+        parser.add_argument('--show-invalid', action='store_true', help="print codes that fail the checksum")
+
+    def run(self, args, opts):
+        engine = create_engine(self.settings.get('POSTGRES_URL'))
+        upgrade_schema(engine)
+        query = "SELECT id, name, corp_code FROM company_info"
+        if not opts.all:
+            query += " WHERE usci_valid IS NULL"
+        total = invalid = 0
+        # 服务端游标逐批读取，另一个连接按批写回，整表不进内存
+        with engine.connect() as reader, engine.connect() as writer:
+            rows = reader.execution_options(stream_results=True, yield_per=opts.batch_size).execute(text(query))
+            while batch := list(islice(rows, opts.batch_size)):
+                decoded = decode_many([row.corp_code for row in batch])
+                writer.execute(
+                    text("UPDATE company_info SET usci_valid = :valid, reg_province = :province, "
+                         "reg_city = :city, entity_type = :entity_type WHERE id = :id"),
+                    [{**usci._asdict(), 'id': row.id} for row, usci in zip(batch, decoded)],
+                )
+                writer.commit()
+                for row, usci in zip(batch, decoded):
+                    if not usci.valid:
+                        invalid += 1
+                        if opts.show_invalid:
+                            print(f"{row.corp_code}\t{row.name}\texpected check {usci.check}")
+                total += len(batch)
+        print(f"company_info: checked {total} codes, {invalid} invalid")
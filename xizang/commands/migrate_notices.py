@@ -0,0 +1,63 @@
+from sqlalchemy import create_engine, inspect, text
+from scrapy.commands import ScrapyCommand
+
+from xizang.models.models import upgrade_schema
+from xizang.pipelines.notice_store import NOTICE_TABLES, notice_hash, save_notices
+
+
+class Command(ScrapyCommand):
+    """把 project / winner_bid_info 中内联的 notice_content 迁移到 notice_blob
+
+    scrapy migrate_notices [--batch-size 500] [--drop-column]
+    """
+
+    requires_project = True
+    default_settings = {'LOG_ENABLED': True}
+
+    def syntax(self):
+        return "[options]"
+
+    def short_desc(self):
+        return "Move inline notice_content into the compressed notice_blob table"
+
+    def add_options(self, parser):
+        super().add_options(parser)
+        parser.add_argument('--batch-size', type=int, default=500, help="rows per transaction")
+        parser.add_argument('--drop-column', action='store_true',
+                            help="drop notice_content after all rows are migrated")
+
+    def run(self, args, opts):
+        engine = create_engine(self.settings.get('POSTGRES_URL'))
+        upgrade_schema(engine)
+        for table in NOTICE_TABLES:
+            columns = {column['name'] for column in inspect(engine).get_columns(table)}
+            if 'notice_content' not in columns:
+                print(f"{table}: already migrated")
+                continue
+            moved = self.migrate_table(engine, table, opts.batch_size)
+            print(f"{table}: moved {moved} notices")
+            if opts.drop_column:
+                with engine.begin() as conn:
+                    conn.execute(text(f"ALTER TABLE {table} DROP COLUMN notice_content"))
+                print(f"{table}: dropped notice_content")
+
+    @staticmethod
+    def migrate_table(engine, table, batch_size):
+        """分批把原文写入 notice_blob，并把行改为只保存哈希，每批一个事务"""
+        moved = 0
+        while True:
+            with engine.begin() as conn:
+                rows = conn.execute(text(
+                    f"SELECT id, notice_content FROM {table} "
+                    f"WHERE notice_content IS NOT NULL ORDER BY id LIMIT :limit FOR UPDATE SKIP LOCKED"
+                ), {'limit': batch_size}).all()
+                if not rows:
+                    return moved
+                notices = [content for _, content in rows if content]
+                save_notices(conn, notices)
+                conn.execute(
+                    text(f"UPDATE {table} SET notice_hash = :notice_hash, notice_content = NULL WHERE id = :id"),
+                    [{'id': row_id, 'notice_hash': notice_hash(content) if content else None}
+                     for row_id, content in rows],
+                )
+                moved += len(rows)
@@ -0,0 +1,180 @@
+import json
+import logging
+import numbers
+import resource
+import time
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.httpobj import urlparse_cached
+from scrapy.utils.reactor import listen_tcp
+from twisted.internet.error import CannotListenError
+from twisted.web import resource as web_resource, server
+
+from xizang.utils.metrics import REGISTRY, Gauge
+
+logger = logging.getLogger(__name__)
+
+REQUESTS = REGISTRY.counter('xizang_requests_scheduled_total', 'Requests scheduled', ('spider',))
+RESPONSES = REGISTRY.counter('xizang_responses_total', 'Responses received', ('spider', 'domain', 'status'))
+LATENCY = REGISTRY.histogram('xizang_response_latency_seconds', 'Download latency', ('spider', 'domain'))
+ITEMS = REGISTRY.counter('xizang_items_scraped_total', 'Items scraped', ('spider', 'item'))
+DROPPED = REGISTRY.counter('xizang_items_dropped_total', 'Items dropped', ('spider', 'item'))
+
+
+class MetricsResource(web_resource.Resource):
+    isLeaf = True
+
+    def __init__(self, registry):
+        super().__init__()
+        self.registry = registry
+
+    def render_GET(self, request):
+        request.setHeader(b'Content-Type', b'text/plain; version=0.0.4; charset=utf-8')
+        return self.registry.render().encode('utf-8')
+
+
+class MetricsExporter:
+    """在本地端口以 Prometheus 文本格式输出爬取、pipeline 和渲染指标
+
+    多个 scrapyd 任务同时运行时依次尝试 METRICS_PORT 范围内的端口，实际端口见日志。
+    爬虫可以用 metrics_progress 声明要导出的进度计数属性。
+    """
+
+    def __init__(self, crawler, portrange, host):
+        self.crawler = crawler
+        self.portrange = portrange
+        self.host = host
+        self.port = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('METRICS_ENABLED'):
+            raise NotConfigured
+        portrange = [int(port) for port in crawler.settings.getlist('METRICS_PORT', [9410, 9420])]
+        ext = cls(crawler, portrange, crawler.settings.get('METRICS_HOST', '127.0.0.1'))
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(ext.request_scheduled, signal=signals.request_scheduled)
+        crawler.signals.connect(ext.response_received, signal=signals.response_received)
+        crawler.signals.connect(ext.item_scraped, signal=signals.item_scraped)
+        crawler.signals.connect(ext.item_dropped, signal=signals.item_dropped)
+        return ext
+
+    def spider_opened(self, spider):
+        try:
+            self.port = listen_tcp(self.portrange, self.host, server.Site(MetricsResource(REGISTRY)))
+        except CannotListenError as e:
+            # 端口被其它任务占满时只是没有指标，不影响爬取
+            logger.warning(f"Metrics disabled, no free port in {self.portrange}: {e}")
+            return
+        address = self.port.getHost()
+        logger.info(f"Metrics available at http://{address.host}:{address.port}/metrics")
+        REGISTRY.add_collector(self.collect)
+
+    def spider_closed(self, spider):
+        REGISTRY.remove_collector(self.collect)
+        if self.port is not None:
+            return self.port.stopListening()
+
+    def request_scheduled(self, request, spider):
+        REQUESTS.inc(spider=spider.name)
+
+    def response_received(self, response, request, spider):
+        domain = urlparse_cached(request).hostname or ''
+        RESPONSES.inc(spider=spider.name, domain=domain, status=response.status)
+        latency = request.meta.get('download_latency')
+        if latency is not None:
+            LATENCY.observe(latency, spider=spider.name, domain=domain)
+
+    def item_scraped(self, item, response, spider):
+        ITEMS.inc(spider=spider.name, item=type(item).__name__)
+
+    def item_dropped(self, item, response, exception, spider):
+        DROPPED.inc(spider=spider.name, item=type(item).__name__)
+
+    def collect(self):
+        """抓取时读取的即时值：调度队列、下载中请求、爬虫进度和 Scrapy stats"""
+        spider = self.crawler.spider
+        name = spider.name if spider else ''
+        engine = self.crawler.engine
+        queues = Gauge('xizang_queue_size', 'Requests waiting in scheduler / downloader', ('spider', 'queue'))
+        if engine is not None and engine.slot is not None:
+            queues.set(len(engine.slot.scheduler), spider=name, queue='scheduler')
+            queues.set(len(engine.downloader.active), spider=name, queue='downloader')
+        progress = Gauge('xizang_spider_progress', 'Spider progress counters', ('spider', 'counter'))
+        for attr in getattr(spider, 'metrics_progress', ()):
+            progress.set(getattr(spider, attr, 0), spider=name, counter=attr)
+        # deferred、db_writer 队列峰值等 pipeline 状态都记录在 stats 中
+        stats = Gauge('xizang_stats', 'Numeric Scrapy stats values', ('spider', 'stat'))
+        for key, value in self.crawler.stats.get_stats().items():
+            if isinstance(value, numbers.Number) and not isinstance(value, bool):
+                stats.set(value, spider=name, stat=key)
+        return [queues, progress, stats]
+
+
+class CrawlBenchmark:
+    """统计整次爬取的吞吐：每秒响应数、每秒 item 数和进程峰值内存
+
+    配合 REPLAY_ARCHIVE 回放固定的工作量，比较并发设置和 pipeline 改动前后的结果；
+    BENCHMARK_REPORT 指定文件时每次运行追加一行 JSON。
+    """
+
+    # 与吞吐相关、需要随结果一起记录的设置
+    SETTINGS = ('CONCURRENT_REQUESTS', 'CONCURRENT_REQUESTS_PER_DOMAIN', 'DOWNLOAD_DELAY', 'AUTOTHROTTLE_ENABLED',
+                'REPLAY_ARCHIVE', 'REPLAY_LATENCY', 'DB_WRITER_THREADS', 'BID_SAVER_BATCH_SIZE',
+                'NOTICE_ANALYSIS_PROCESSES')
+
+    def __init__(self, crawler, report=None):
+        self.crawler = crawler
+        self.report = report
+        self.started = None
+        self.responses = 0
+        self.items = 0
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('BENCHMARK_ENABLED'):
+            raise NotConfigured
+        ext = cls(crawler, crawler.settings.get('BENCHMARK_REPORT'))
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(ext.response_received, signal=signals.response_received)
+        crawler.signals.connect(ext.item_scraped, signal=signals.item_scraped)
+        return ext
+
+    def spider_opened(self, spider):
+        self.started = time.monotonic()
+
+    def response_received(self, response, request, spider):
+        self.responses += 1
+
+    def item_scraped(self, item, response, spider):
+        self.items += 1
+
+    @staticmethod
+    def peak_rss_mb():
+        # Linux 上 ru_maxrss 单位为 KB
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    def spider_closed(self, spider, reason):
+        elapsed = time.monotonic() - self.started
+        result = {
+            'spider': spider.name,
+            'reason': reason,
+            'seconds': round(elapsed, 3),
+            'responses': self.responses,
+            'items': self.items,
+            'responses_per_s': round(self.responses / elapsed, 2) if elapsed else 0,
+            'items_per_s': round(self.items / elapsed, 2) if elapsed else 0,
+            'peak_rss_mb': round(self.peak_rss_mb(), 1),
+        }
+        for key in ('seconds', 'responses_per_s', 'items_per_s', 'peak_rss_mb'):
+            self.crawler.stats.set_value(f'benchmark/{key}', result[key], spider=spider)
+        logger.info(f"Benchmark {spider.name}: {result['seconds']}s, {result['responses_per_s']} responses/s, "
+                    f"{result['items_per_s']} items/s, peak RSS {result['peak_rss_mb']} MB")
+        if self.report:
+            result['time'] = time.strftime('%Y-%m-%d %H:%M:%S')
+            result['settings'] = {name: self.crawler.settings.get(name) for name in self.SETTINGS}
+            with open(self.report, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(result, ensure_ascii=False) + '\n')
@@ -49,12 +49,14 @@ class ProjectItem(scrapy.Item):
     platformName = scrapy.Field()
     classifyShow = scrapy.Field()
     url = scrapy.Field()
+    detail_url = scrapy.Field()  # 交易列表中的项目详情页
     notice_content = scrapy.Field()
     districtShow = scrapy.Field()  # 地区
     session_size = scrapy.Field()  #标段数量
     project_id = scrapy.Field()  # 招标编号
     company_req = scrapy.Field()
     person_req = scrapy.Field()
+    professional_titles = scrapy.Field()  # 公告要求的注册专业/岗位
     construction_funds = scrapy.Field()
     project_duration = scrapy.Field()
 
@@ -1,252 +1,563 @@
-# Define here the models for your spider middleware
-#
-# See documentation in:
-# https://docs.scrapy.org/en/latest/topics/spider-middleware.html
-import time
-import re
-from scrapy import signals
-from fake_useragent import UserAgent
-
-# useful for handling different item types with a single interface
-
-
-from selenium import webdriver
-from scrapy.http import HtmlResponse
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.select import Select
-
-import random
-import base64
-
-class RandomUseProxyWithProbabilityMiddleware:
-    def __init__(self, proxy_url, proxy_auth, proxy_probability):
-        self.proxy_url = proxy_url
-        self.proxy_auth = proxy_auth
-        self.proxy_probability = proxy_probability  # 走代理的概率 (0~1)
-
-        if self.proxy_auth:
-            self.encoded_auth = base64.b64encode(self.proxy_auth.encode()).decode()
-        else:
-            self.encoded_auth = None
-
-    @classmethod
-    def from_crawler(cls, crawler):
-        return cls(
-            proxy_url=crawler.settings.get('PROXY_URL'),
-            proxy_auth=crawler.settings.get('PROXY_AUTH'),
-            proxy_probability=crawler.settings.getfloat('PROXY_PROBABILITY', 0.5)  # 默认50%
-        )
-
-    def process_request(self, request, spider):
-        if random.random() < self.proxy_probability:
-            # 走代理
-            request.meta['proxy'] = self.proxy_url
-            if self.encoded_auth:
-                request.headers['Proxy-Authorization'] = f'Basic {self.encoded_auth}'
-            spider.logger.debug(f"Using proxy {self.proxy_url}")
-        else:
-            # 不使用代理，直连
-            spider.logger.debug("Using local network (no proxy)")
-
-
-class SimulateSearch(object):
-    def __init__(self):
-        self.driver = None
-
-    def process_request(self, request, spider):
-        if spider.name == "bid_list":
-            options = webdriver.ChromeOptions()
-            options.add_argument('--headless')  # 无头模式
-            self.driver = webdriver.Chrome()
-            try:
-                self.driver.get(request.url)
-                self.driver.implicitly_wait(30)
-
-                self.driver.find_element(By.ID, 'choose_time_02').click()
-                # 定位 <select> 元素
-                select_elem = self.driver.find_element(By.ID, "provinceId")
-                select = Select(select_elem)
-                 # 按 value 属性选择
-                select.select_by_value("540000")  # 540000 西藏
-                self.driver.find_element(By.ID, "choose_stage_0102").click()
-                self.driver.find_element(By.ID, "searchButton").click()
-                self.driver.implicitly_wait(60)
-                return HtmlResponse(
-                    url=self.driver.current_url,
-                    body=self.driver.page_source.encode('utf-8'),
-                    encoding='utf-8',
-                    request=request
-                )
-            except Exception as e:
-                print(e)
-                return HtmlResponse(url=request.url, status=500, request=request)
-
-    def spider_closed(self, spider):
-        self.driver.quit()
-
-class SeleniumMiddleware(object):
-    company_url_pattern = r'^https://ggzy\.xizang\.gov\.cn/ztxx_(\d+)\.jhtml$'
-    def process_request(self, request, spider):
-        if re.match(request.url, self.company_url_pattern):
-            options = webdriver.FirefoxOptions()
-            options.add_argument('--headless')  # 无头模式
-            self.driver = webdriver.Firefox(options=options)
-            try:
-                self.driver.get(request.url)
-                # 等待页面加载完成
-                time.sleep(3)
-                # 返回处理后的页面
-                return HtmlResponse(
-                    url=self.driver.current_url,
-                    body=self.driver.page_source.encode('utf-8'),
-                    encoding='utf-8',
-                    request=request
-                )
-            except Exception as e:
-                spider.logger.error(f"Selenium Error: {str(e)}")
-                return HtmlResponse(url=request.url, status=500, request=request)
-        if request.meta.get('click_actions'):
-            options = webdriver.FirefoxOptions()
-            options.add_argument('--headless')  # 无头模式
-            self.driver = webdriver.Firefox(options=options)
-            try:
-                self.driver.get(request.url)
-                for action in request.meta['click_actions']:
-                    button = action['selector']
-                    selector_type = action['selector_type']
-                    delay = action['delay']
-                        # 执行点击操作
-                    if selector_type == 'xpath':
-                        self.driver.find_element(By.XPATH, value=button).click()
-                    else:
-                        self.driver.find_element(By.CSS_SELECTOR, value=button).click()
-                    time.sleep(delay)
-                    # 返回处理后的页面
-                return HtmlResponse(
-                    url=self.driver.current_url,
-                    body=self.driver.page_source.encode('utf-8'),
-                    encoding='utf-8',
-                    request=request
-                )
-            except Exception as e:
-                    spider.logger.error(f"Selenium Error: {str(e)}")
-                    return HtmlResponse(url=request.url, status=500, request=request)
-
-    def spider_closed(self):
-        self.driver.quit()
-
-
-class RandomUserAgent(object):
-    def process_request(self, request, spider):
-        ua = UserAgent()
-        user_agent = ua.random
-        request.headers['User-Agent'] = user_agent
-
-        # Add more realistic headers to avoid detection
-        request.headers['Accept'] = 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7'
-        request.headers['Accept-Language'] = 'zh-CN,zh;q=0.9,en;q=0.8'
-        request.headers['Accept-Encoding'] = 'gzip, deflate, br'
-        request.headers['Connection'] = 'keep-alive'
-        request.headers['Upgrade-Insecure-Requests'] = '1'
-        request.headers['Sec-Fetch-Dest'] = 'document'
-        request.headers['Sec-Fetch-Mode'] = 'navigate'
-        request.headers['Sec-Fetch-Site'] = 'none'
-        request.headers['Sec-Fetch-User'] = '?1'
-
-        # Add a referer for requests to ggzy.gov.cn
-        if 'ggzy.gov.cn' in request.url:
-            request.headers['Referer'] = 'https://www.ggzy.gov.cn/'
-
-
-class XizangSpiderMiddleware:
-    # Not all methods need to be defined. If a method is not defined,
-    # scrapy acts as if the spider middleware does not modify the
-    # passed objects.
-
-    @classmethod
-    def from_crawler(cls, crawler):
-        # This method is used by Scrapy to create your spiders.
-        s = cls()
-        crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
-        return s
-
-    def process_spider_input(self, response, spider):
-        # Called for each response that goes through the spider
-        # middleware and into the spider.
-
-        # Should return None or raise an exception.
-        return None
-
-    def process_spider_output(self, response, result, spider):
-        # Called with the results returned from the Spider, after
-        # it has processed the response.
-
-        # Must return an iterable of Request, or item objects.
-        for i in result:
-            yield i
-
-    def process_spider_exception(self, response, exception, spider):
-        # Called when a spider or process_spider_input() method
-        # (from other spider middleware) raises an exception.
-
-        # Should return either None or an iterable of Request or item objects.
-        pass
-
-    def process_start_requests(self, start_requests, spider):
-        # Called with the start requests of the spider, and works
-        # similarly to the process_spider_output() method, except
-        # that it doesn’t have a response associated.
-
-        # Must return only requests (not items).
-        for r in start_requests:
-            yield r
-
-    def spider_opened(self, spider):
-        spider.logger.info("Spider opened: %s" % spider.name)
-
-
-class XizangDownloaderMiddleware:
-    # Not all methods need to be defined. If a method is not defined,
-    # scrapy acts as if the downloader middleware does not modify the
-    # passed objects.
-
-    @classmethod
-    def from_crawler(cls, crawler):
-        # This method is used by Scrapy to create your spiders.
-        s = cls()
-        crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
-        return s
-
-    def process_request(self, request, spider):
-        # Called for each request that goes through the downloader
-        # middleware.
-
-        # Must either:
-        # - return None: continue processing this request
-        # - or return a Response object
-        # - or return a Request object
-        # - or raise IgnoreRequest: process_exception() methods of
-        #   installed downloader middleware will be called
-        return None
-
-    def process_response(self, request, response, spider):
-        # Called with the response returned from the downloader.
-
-        # Must either;
-        # - return a Response object
-        # - return a Request object
-        # - or raise IgnoreRequest
-        return response
-
-    def process_exception(self, request, exception, spider):
-        # Called when a download handler or a process_request()
-        # (from other downloader middleware) raises an exception.
-
-        # Must either:
-        # - return None: continue processing this exception
-        # - return a Response object: stops process_exception() chain
-        # - return a Request object: stops process_exception() chain
-        pass
-
-    def spider_opened(self, spider):
-        spider.logger.info("Spider opened: %s" % spider.name)
+# Define here the models for your spider middleware
+#
+# See documentation in:
+# https://docs.scrapy.org/en/latest/topics/spider-middleware.html
+import logging
+import re
+import time
+import weakref
+
+from scrapy import signals
+from scrapy.exceptions import IgnoreRequest, NotConfigured
+from fake_useragent import UserAgent
+
+# useful for handling different item types with a single interface
+
+
+from scrapy.http import HtmlResponse, TextResponse
+from scrapy.utils.httpobj import urlparse_cached
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.select import Select
+from selenium.webdriver.support.ui import WebDriverWait
+
+import random
+import base64
+
+from xizang.utils.browser_pool import BrowserPool
+from xizang.utils.extractors import time_extractors
+from xizang.utils.metrics import REGISTRY
+from xizang.utils.render import wait_until_ready
+from xizang.utils.replay import Archive, ArchiveWriter, archive_path, replay_key
+from xizang.utils.timing import TimedSelector, TimingTable
+
+logger = logging.getLogger(__name__)
+
+
+class RandomUseProxyWithProbabilityMiddleware:
+    def __init__(self, proxy_url, proxy_auth, proxy_probability):
+        self.proxy_url = proxy_url
+        self.proxy_auth = proxy_auth
+        self.proxy_probability = proxy_probability  # 走代理的概率 (0~1)
+
+        if self.proxy_auth:
+            self.encoded_auth = base64.b64encode(self.proxy_auth.encode()).decode()
+        else:
+            self.encoded_auth = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(
+            proxy_url=crawler.settings.get('PROXY_URL'),
+            proxy_auth=crawler.settings.get('PROXY_AUTH'),
+            proxy_probability=crawler.settings.getfloat('PROXY_PROBABILITY', 0.5)  # 默认50%
+        )
+
+    def process_request(self, request, spider):
+        if random.random() < self.proxy_probability:
+            # 走代理
+            request.meta['proxy'] = self.proxy_url
+            if self.encoded_auth:
+                request.headers['Proxy-Authorization'] = f'Basic {self.encoded_auth}'
+            spider.logger.debug(f"Using proxy {self.proxy_url}")
+        else:
+            # 不使用代理，直连
+            spider.logger.debug("Using local network (no proxy)")
+
+
+class SimulateSearch(object):
+    def __init__(self, pool, wait_timeout=10):
+        self.pool = pool
+        self.wait_timeout = wait_timeout
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        s = cls(BrowserPool.from_crawler(crawler, 'chrome'),
+                wait_timeout=crawler.settings.getint('SELENIUM_WAIT_TIMEOUT', 10))
+        crawler.signals.connect(s.spider_closed, signal=signals.spider_closed)
+        return s
+
+    def process_request(self, request, spider):
+        if spider.name == "bid_list":
+            d = self.pool.run(self._search, request.url, request.meta.get('render_wait', 'network_idle'),
+                              request.meta.get('render_timeout', self.wait_timeout))
+            d.addCallbacks(_rendered_response, _render_failed,
+                           callbackArgs=(request,), errbackArgs=(request, spider))
+            return d
+
+    @staticmethod
+    def _search(driver, url, wait, timeout):
+        driver.get(url)
+        WebDriverWait(driver, 30).until(EC.element_to_be_clickable((By.ID, 'choose_time_02')))
+
+        driver.find_element(By.ID, 'choose_time_02').click()
+        # 定位 <select> 元素
+        select_elem = driver.find_element(By.ID, "provinceId")
+        select = Select(select_elem)
+        # 按 value 属性选择
+        select.select_by_value("540000")  # 540000 西藏
+        driver.find_element(By.ID, "choose_stage_0102").click()
+        driver.find_element(By.ID, "searchButton").click()
+        # 等搜索结果就绪，而不是固定等待
+        wait_until_ready(driver, wait, timeout, logger)
+        return driver.current_url, driver.page_source
+
+    def spider_closed(self, spider):
+        return self.pool.close()
+
+
+def _rendered_response(result, request):
+    url, page_source = result
+    return HtmlResponse(
+        url=url,
+        body=page_source.encode('utf-8'),
+        encoding='utf-8',
+        request=request
+    )
+
+
+def _render_failed(failure, request, spider):
+    spider.logger.error(f"Selenium Error: {failure.getErrorMessage()}")
+    return HtmlResponse(url=request.url, status=500, request=request)
+
+
+class SeleniumMiddleware(object):
+    """用浏览器渲染页面
+
+    request.meta 可选参数：
+    - render_wait: 页面就绪条件，{'xpath': ...}、{'css': ...} 或 'network_idle'，
+      默认等待 document.readyState 为 complete
+    - render_timeout: 等待就绪的最长秒数，默认 SELENIUM_WAIT_TIMEOUT
+    - click_actions: 依次点击的元素，每项可带 wait 作为点击后的就绪条件，
+      delay 为最长等待秒数
+    """
+    company_url_pattern = r'^https://ggzy\.xizang\.gov\.cn/ztxx_(\d+)\.jhtml$'
+
+    def __init__(self, pool, wait_timeout=10):
+        self.pool = pool
+        self.wait_timeout = wait_timeout
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        s = cls(BrowserPool.from_crawler(crawler, 'firefox'),
+                wait_timeout=crawler.settings.getint('SELENIUM_WAIT_TIMEOUT', 10))
+        crawler.signals.connect(s.spider_closed, signal=signals.spider_closed)
+        return s
+
+    def process_request(self, request, spider):
+        wait = request.meta.get('render_wait')
+        timeout = request.meta.get('render_timeout', self.wait_timeout)
+        if re.match(self.company_url_pattern, request.url):
+            d = self.pool.run(self._render_page, request.url, wait, timeout)
+        elif request.meta.get('click_actions'):
+            d = self.pool.run(self._render_clicks, request.url, request.meta['click_actions'], wait, timeout)
+        else:
+            return None
+        d.addCallbacks(_rendered_response, _render_failed,
+                       callbackArgs=(request,), errbackArgs=(request, spider))
+        return d
+
+    @staticmethod
+    def _render_page(driver, url, wait, timeout):
+        driver.get(url)
+        # 等待页面就绪
+        wait_until_ready(driver, wait, timeout, logger)
+        return driver.current_url, driver.page_source
+
+    @staticmethod
+    def _render_clicks(driver, url, click_actions, wait, timeout):
+        driver.get(url)
+        wait_until_ready(driver, wait, timeout, logger)
+        for action in click_actions:
+            button = action['selector']
+            selector_type = action['selector_type']
+            # 执行点击操作
+            if selector_type == 'xpath':
+                driver.find_element(By.XPATH, value=button).click()
+            else:
+                driver.find_element(By.CSS_SELECTOR, value=button).click()
+            # 点击后等到页面就绪为止，delay 只作为上限
+            wait_until_ready(driver, action.get('wait', 'network_idle'), action.get('delay', timeout), logger)
+        return driver.current_url, driver.page_source
+
+    def spider_closed(self, spider):
+        return self.pool.close()
+
+
+class RandomUserAgent(object):
+    """随机 User-Agent 及与之匹配的请求头
+
+    UA 数据集只在 from_crawler 时加载一次，并预先生成 profile_size 套请求头，
+    每个请求只需随机挑选一套整体写入。sticky 为 True 时同一主机始终使用同一套请求头。
+    """
+    browsers = ('Chrome', 'Edge', 'Firefox', 'Safari')
+    platforms = {'Windows': '"Windows"', 'Mac OS X': '"macOS"', 'Linux': '"Linux"', 'Ubuntu': '"Linux"'}
+    document_accept = {
+        'Chrome': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
+        'Edge': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
+        'Firefox': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        'Safari': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    }
+
+    def __init__(self, profiles, referers=None, sticky=False):
+        self.profiles = profiles
+        self.referers = referers or {}
+        self.sticky = sticky
+        self.host_profiles = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        profiles = cls.build_profiles(UserAgent().data_browsers, settings.getint('RANDOM_UA_PROFILES', 200))
+        return cls(
+            profiles,
+            referers=settings.getdict('RANDOM_UA_REFERERS', {'ggzy.gov.cn': 'https://www.ggzy.gov.cn/'}),
+            sticky=settings.getbool('RANDOM_UA_STICKY', False),
+        )
+
+    @classmethod
+    def build_profiles(cls, data_browsers, size):
+        """按数据集中的占比抽取桌面浏览器 UA，生成成套请求头"""
+        candidates = [ua for ua in data_browsers
+                      if ua['browser'] in cls.browsers and ua['type'] == 'desktop' and ua['os'] in cls.platforms]
+        weights = [ua['percent'] for ua in candidates]
+        return [cls.build_headers(ua) for ua in random.choices(candidates, weights=weights, k=size)]
+
+    @classmethod
+    def build_headers(cls, ua):
+        browser = ua['browser']
+        headers = {
+            'User-Agent': ua['useragent'],
+            'Accept': cls.document_accept[browser],
+            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+            # 未安装 brotli，HttpCompressionMiddleware 只能解 gzip/deflate
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive',
+            'Upgrade-Insecure-Requests': '1',
+            'Sec-Fetch-Dest': 'document',
+            'Sec-Fetch-Mode': 'navigate',
+            'Sec-Fetch-Site': 'none',
+            'Sec-Fetch-User': '?1',
+        }
+        # Chromium 内核会同时发送 Client Hints
+        if browser in ('Chrome', 'Edge'):
+            version = ua['useragent'].split('Chrome/')[-1].split('.')[0]
+            brand = 'Microsoft Edge' if browser == 'Edge' else 'Google Chrome'
+            headers['Sec-CH-UA'] = f'"Chromium";v="{version}", "{brand}";v="{version}", "Not.A/Brand";v="99"'
+            headers['Sec-CH-UA-Mobile'] = '?0'
+            headers['Sec-CH-UA-Platform'] = cls.platforms[ua['os']]
+        return headers
+
+    def process_request(self, request, spider):
+        if self.sticky:
+            host = urlparse_cached(request).hostname
+            profile = self.host_profiles.get(host)
+            if profile is None:
+                profile = self.host_profiles[host] = random.choice(self.profiles)
+        else:
+            profile = random.choice(self.profiles)
+
+        # JsonRequest 等自带的 Accept 保持不变
+        accept = request.headers.get('Accept')
+        request.headers.update(profile)
+        if accept:
+            request.headers['Accept'] = accept
+
+        # Add a referer for requests to ggzy.gov.cn
+        for domain, referer in self.referers.items():
+            if domain in request.url:
+                request.headers['Referer'] = referer
+                request.headers['Sec-Fetch-Site'] = 'same-site'
+                break
+
+
+class RecordMiddleware:
+    """把爬取中的每个请求和最终响应写入 RECORD_ARCHIVE 存档，供 ReplayMiddleware 回放
+
+    放在最靠近引擎的位置，记录的是经过重试、渲染等中间件处理后的响应。
+    """
+
+    def __init__(self, stats, path, ignore_params):
+        self.stats = stats
+        self.path = path
+        self.ignore_params = ignore_params
+        self.writer = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        path = crawler.settings.get('RECORD_ARCHIVE')
+        if not path:
+            raise NotConfigured
+        mw = cls(crawler.stats, path, crawler.settings.getlist('REPLAY_IGNORE_PARAMS'))
+        crawler.signals.connect(mw.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(mw.spider_closed, signal=signals.spider_closed)
+        return mw
+
+    def spider_opened(self, spider):
+        self.writer = ArchiveWriter(archive_path(self.path, spider))
+        logger.info(f"Recording responses to {self.writer.path}")
+
+    def spider_closed(self, spider):
+        if self.writer is not None:
+            self.writer.close()
+            logger.info(f"Recorded {self.writer.count} responses to {self.writer.path}")
+
+    def process_response(self, request, response, spider):
+        if 'replay' not in response.flags:
+            size = self.writer.write(replay_key(request, self.ignore_params), request, response)
+            self.stats.inc_value('record/responses', spider=spider)
+            self.stats.inc_value('record/bytes', size, spider=spider)
+        return response
+
+
+class ReplayMiddleware:
+    """从 REPLAY_ARCHIVE 存档返回响应，不访问网络
+
+    REPLAY_LATENCY 为 'recorded' 时按录制时的下载耗时延迟返回，为数字时固定延迟该秒数。
+    回放的响应在下载槽之前返回，DOWNLOAD_DELAY 和按域名的并发限制不生效，并发只受 CONCURRENT_REQUESTS 限制。
+    存档中没有的请求被忽略并计入 replay/missing。
+    """
+
+    def __init__(self, stats, path, latency, ignore_params):
+        self.stats = stats
+        self.path = path
+        self.archive = None
+        self.latency = latency
+        self.ignore_params = ignore_params
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        path = settings.get('REPLAY_ARCHIVE')
+        if not path:
+            raise NotConfigured
+        latency = settings.get('REPLAY_LATENCY', 'recorded')
+        if latency != 'recorded':
+            latency = float(latency)
+        mw = cls(crawler.stats, path, latency, settings.getlist('REPLAY_IGNORE_PARAMS'))
+        crawler.signals.connect(mw.spider_opened, signal=signals.spider_opened)
+        return mw
+
+    def spider_opened(self, spider):
+        self.archive = Archive(archive_path(self.path, spider))
+        logger.info(f"Replaying {len(self.archive)} responses from {self.archive.path}")
+
+    def process_request(self, request, spider):
+        record = self.archive.next_record(replay_key(request, self.ignore_params))
+        if record is None:
+            self.stats.inc_value('replay/missing', spider=spider)
+            logger.debug(f"No recorded response for {request}")
+            raise IgnoreRequest(f"No recorded response for {request.url}")
+        self.stats.inc_value('replay/responses', spider=spider)
+        # 回放的响应不再写入 HTTP 缓存
+        request.meta['dont_cache'] = True
+        response = Archive.build_response(record, request)
+        delay = (record.get('latency') or 0) if self.latency == 'recorded' else self.latency
+        request.meta['download_latency'] = delay
+        if delay <= 0:
+            return response
+        from twisted.internet import reactor
+        from twisted.internet.task import deferLater
+        return deferLater(reactor, delay, lambda: response)
+
+
+CALLBACK_SECONDS = REGISTRY.histogram(
+    'xizang_callback_seconds', 'Time spent in spider callbacks per response', ('spider', 'callback'))
+
+
+class CallbackTimingMiddleware:
+    """统计每个回调的调用次数和耗时，关闭时输出汇总
+
+    生成器回调的耗时累加每次取下一个结果的时间，异步回调中 await 的等待时间也计入。
+    CALLBACK_TIMING_XPATH 开启后 response.xpath/css 换成 TimedSelector，按表达式统计耗时和命中数，
+    extractors 中的预编译字段按 提取器名.字段名 一并统计。
+    """
+
+    def __init__(self, stats, xpath=False, summary_top=20):
+        self.stats = stats
+        self.summary_top = summary_top
+        self.callbacks = TimingTable()
+        self.xpaths = TimingTable() if xpath else None
+        self.selector_cls = TimedSelector.bind(self.xpaths) if xpath else None
+        if xpath:
+            time_extractors(self.xpaths)
+        self._started = weakref.WeakKeyDictionary()  # response -> 进入回调前的时间
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool('CALLBACK_TIMING_ENABLED'):
+            raise NotConfigured
+        mw = cls(
+            crawler.stats,
+            xpath=settings.getbool('CALLBACK_TIMING_XPATH'),
+            summary_top=settings.getint('CALLBACK_TIMING_SUMMARY_TOP', 20),
+        )
+        crawler.signals.connect(mw.spider_closed, signal=signals.spider_closed)
+        return mw
+
+    @staticmethod
+    def callback_name(response, spider):
+        callback = response.request.callback if response.request is not None else None
+        return getattr(callback, '__name__', None) or 'parse'
+
+    def process_spider_input(self, response, spider):
+        if self.selector_cls is not None and isinstance(response, TextResponse):
+            # TextResponse.selector 按需创建并缓存在 _cached_selector 上
+            response._cached_selector = self.selector_cls(response)
+        self._started[response] = time.perf_counter()
+
+    def _elapsed(self, response):
+        started = self._started.pop(response, None)
+        return time.perf_counter() - started if started is not None else 0.0
+
+    def _record(self, response, spider, seconds):
+        name = self.callback_name(response, spider)
+        self.callbacks.add(name, seconds)
+        self.stats.inc_value(f'callback_timing/{name}/calls', spider=spider)
+        self.stats.inc_value(f'callback_timing/{name}/seconds', seconds, spider=spider)
+        self.stats.max_value(f'callback_timing/{name}/max_seconds', seconds, spider=spider)
+        CALLBACK_SECONDS.observe(seconds, spider=spider.name, callback=name)
+
+    def process_spider_output(self, response, result, spider):
+        seconds = self._elapsed(response)
+        iterator = iter(result)
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    output = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    seconds += time.perf_counter() - started
+                yield output
+        finally:
+            self._record(response, spider, seconds)
+
+    async def process_spider_output_async(self, response, result, spider):
+        seconds = self._elapsed(response)
+        iterator = result.__aiter__()
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    output = await iterator.__anext__()
+                except StopAsyncIteration:
+                    return
+                finally:
+                    seconds += time.perf_counter() - started
+                yield output
+        finally:
+            self._record(response, spider, seconds)
+
+    def process_spider_exception(self, response, exception, spider):
+        # 回调本身抛出异常时不会经过 process_spider_output
+        if response in self._started:
+            self._record(response, spider, self._elapsed(response))
+
+    def spider_closed(self, spider):
+        if self.callbacks.calls:
+            spider.logger.info(self.callbacks.summary('Callback timing'))
+        if self.xpaths is not None and self.xpaths.calls:
+            for expr, calls, seconds, hits in self.xpaths.top(self.summary_top):
+                self.stats.set_value(f'xpath_timing/{expr}/calls', calls, spider=spider)
+                self.stats.set_value(f'xpath_timing/{expr}/seconds', round(seconds, 6), spider=spider)
+                self.stats.set_value(f'xpath_timing/{expr}/hits', hits, spider=spider)
+            spider.logger.info(self.xpaths.summary('XPath timing', self.summary_top))
+        if self.xpaths is not None:
+            time_extractors(None)
+
+
+class XizangSpiderMiddleware:
+    # Not all methods need to be defined. If a method is not defined,
+    # scrapy acts as if the spider middleware does not modify the
+    # passed objects.
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        # This method is used by Scrapy to create your spiders.
+        s = cls()
+        crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
+        return s
+
+    def process_spider_input(self, response, spider):
+        # Called for each response that goes through the spider
+        # middleware and into the spider.
+
+        # Should return None or raise an exception.
+        return None
+
+    def process_spider_output(self, response, result, spider):
+        # Called with the results returned from the Spider, after
+        # it has processed the response.
+
+        # Must return an iterable of Request, or item objects.
+        for i in result:
+            yield i
+
+    def process_spider_exception(self, response, exception, spider):
+        # Called when a spider or process_spider_input() method
+        # (from other spider middleware) raises an exception.
+
+        # Should return either None or an iterable of Request or item objects.
+        pass
+
+    def process_start_requests(self, start_requests, spider):
+        # Called with the start requests of the spider, and works
+        # similarly to the process_spider_output() method, except
+        # that it doesn’t have a response associated.
+
+        # Must return only requests (not items).
+        for r in start_requests:
+            yield r
+
+    def spider_opened(self, spider):
+        spider.logger.info("Spider opened: %s" % spider.name)
+
+
+class XizangDownloaderMiddleware:
+    # Not all methods need to be defined. If a method is not defined,
+    # scrapy acts as if the downloader middleware does not modify the
+    # passed objects.
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        # This method is used by Scrapy to create your spiders.
+        s = cls()
+        crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
+        return s
+
+    def process_request(self, request, spider):
+        # Called for each request that goes through the downloader
+        # middleware.
+
+        # Must either:
+        # - return None: continue processing this request
+        # - or return a Response object
+        # - or return a Request object
+        # - or raise IgnoreRequest: process_exception() methods of
+        #   installed downloader middleware will be called
+        return None
+
+    def process_response(self, request, response, spider):
+        # Called with the response returned from the downloader.
+
+        # Must either;
+        # - return a Response object
+        # - return a Request object
+        # - or raise IgnoreRequest
+        return response
+
+    def process_exception(self, request, exception, spider):
+        # Called when a download handler or a process_request()
+        # (from other downloader middleware) raises an exception.
+
+        # Must either:
+        # - return None: continue processing this exception
+        # - return a Response object: stops process_exception() chain
+        # - return a Request object: stops process_exception() chain
+        pass
+
+    def spider_opened(self, spider):
+        spider.logger.info("Spider opened: %s" % spider.name)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, UniqueConstraint, ForeignKeyConstraint, ARRAY
+from sqlalchemy import Column, Integer, BigInteger, String, Float, DateTime, ForeignKey, UniqueConstraint, ForeignKeyConstraint, ARRAY, LargeBinary, Boolean, Index, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
@@ -16,11 +16,13 @@ class Project(Base):
     platform_name = Column(String)
     classify_show = Column(String)
     url = Column(String)
-    notice_content = Column(String)
+    detail_url = Column(String)  # 交易列表中的项目详情页，增量爬取按此判断是否已爬过
+    notice_hash = Column(String(64))  # 公告内容见 notice_blob
     district_show = Column(String)
     session_size = Column(Integer)
     company_req = Column(String)
     person_req = Column(String)
+    professional_titles = Column(ARRAY(String))  # 公告要求的注册专业/岗位
     construction_funds = Column(String)
     project_duration = Column(String)
     crawl_time = Column(DateTime, default=datetime.now)
@@ -29,6 +31,56 @@ class Project(Base):
     bid_ranks = relationship("BidRank", backref="project", cascade="all, delete-orphan")
 
 
+class NoticeBlob(Base):
+    """公告原文，按内容哈希去重并压缩存储"""
+    __tablename__ = 'notice_blob'
+
+    content_hash = Column(String(64), primary_key=True)  # 原文 UTF-8 的 sha256
+    codec = Column(String, nullable=False)  # 压缩算法
+    content = Column(LargeBinary, nullable=False)
+    size = Column(Integer)  # 原文字节数
+    created_at = Column(DateTime, default=datetime.now)
+
+
+class CrawlWatermark(Base):
+    """增量爬取水位：各爬虫上次成功爬到的最新发布时间或已处理到的行号"""
+    __tablename__ = 'crawl_watermark'
+
+    name = Column(String, primary_key=True)  # 爬虫名
+    watermark = Column(DateTime)
+    position = Column(BigInteger)  # 已处理到的源表 id
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+
+class CompanyCrawlQueue(Base):
+    """待查询的投标公司，多个爬虫进程按租约领取"""
+    __tablename__ = 'company_crawl_queue'
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, unique=True, nullable=False)  # 公司名称
+    status = Column(String, nullable=False, default='pending')  # pending/leased/done/not_found/failed
+    attempts = Column(Integer, nullable=False, default=0)  # 已领取次数
+    leased_by = Column(String)
+    lease_until = Column(DateTime)
+    last_error = Column(String)
+    created_at = Column(DateTime, default=datetime.now)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+    __table_args__ = (
+        Index('ix_company_crawl_queue_status', 'status', 'lease_until'),
+    )
+
+
+class CompanyNameIndex(Base):
+    """规范化公司名称 -> 统一社会信用代码，投标人名称写法不同时也能找到已知公司"""
+    __tablename__ = 'company_name_index'
+
+    normalized_name = Column(String, primary_key=True)  # normalize_company_name 的结果
+    corp_code = Column(String, nullable=False, index=True)
+    name = Column(String, nullable=False)  # 公司名称
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+
 class BidSection(Base):
     __tablename__ = 'bid_section'
 
@@ -106,6 +158,11 @@ class CompanyInfo(Base):
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     others = Column(String)  # 备注
+    # 由 corp_code 解析，见 scrapy backfill_usci
+    usci_valid = Column(Boolean)  # 校验码是否正确
+    reg_province = Column(String)  # 登记管理机关所在省
+    reg_city = Column(String)  # 登记管理机关所在市
+    entity_type = Column(String)  # 主体类型
     # 建立与员工的关系
     employees = relationship("EmployeeInfo", back_populates="company")
 
@@ -161,12 +218,13 @@ class WinnerBidInfo(Base):
     corp_code = Column(String, ForeignKey('company_info.corp_code', ondelete='CASCADE'), nullable=False)  # 公司代码
     bidder_name = Column(String)  # 中标单位名称
     area_code = Column(String)  # 地区代码
+    area_name = Column(String)  # 地区代码对应的省市县名称
     win_amt = Column(Float)  # 中标金额
     create_time = Column(DateTime)  # 创建时间
     tender_org_name = Column(String)  # 招标单位
     tos = Column(String)  # 类别
     url = Column(String)  # 详情页URL
-    notice_content = Column(String)  # 公告内容
+    notice_hash = Column(String(64))  # 公告内容见 notice_blob
     
     # 添加时间戳
     updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), 
@@ -179,3 +237,17 @@ class WinnerBidInfo(Base):
 def create_tables(engine):
     Base.metadata.create_all(engine)
 
+
+def upgrade_schema(engine):
+    """建表，并给已有的表补上模型中新增的可空列"""
+    Base.metadata.create_all(engine)
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN IF NOT EXISTS {column.name} {column_type}"))
+
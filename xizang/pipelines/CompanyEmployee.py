@@ -3,11 +3,13 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 import logging
 
-from xizang.models.models import create_tables, CompanyInfo, EmployeeInfo, PersonPerformance
+from xizang.models.models import upgrade_schema, CompanyInfo, EmployeeInfo, PersonPerformance
+from xizang.pipelines.writer import DatabaseWriter
+from xizang.utils.metrics import timed
 from xizang.settings import POSTGRES_URL
 
 class CompanyEmployeePipeline:
-    def __init__(self):
+    def __init__(self, writer=None):
         self.engine = create_engine(
             POSTGRES_URL,
             pool_size=10,
@@ -16,16 +18,29 @@ class CompanyEmployeePipeline:
             pool_recycle=3600    # 1小时后回收连接
         )
         self.Session = sessionmaker(bind=self.engine)
-        # 创建数据库表
-        create_tables(self.engine)
+        # 建表并补上新增的列
+        upgrade_schema(self.engine)
         self.logger = logging.getLogger(__name__)
+        # 会话在写入线程间不能共享，只用一个写入线程
+        self.writer = writer or DatabaseWriter('company_employee', threads=1)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(writer=DatabaseWriter.from_crawler(crawler, 'company_employee', threads=1))
 
     def open_spider(self, spider):
         """爬虫开始时创建会话"""
         self.session = self.Session()
+        self.writer.start()
         self.logger.info("CompanyEmployeePipeline opened")
 
     def process_item(self, item, spider):
+        d = self.writer.submit(self._save_item, item)
+        d.addCallback(lambda _: item)
+        return d
+
+    def _save_item(self, item):
+        """在写入线程中保存item"""
         adapter = ItemAdapter(item)
         
         try:
@@ -45,9 +60,8 @@ class CompanyEmployeePipeline:
             self.logger.error(f"Error processing {item.__class__.__name__}: {e}")
             # 重新抛出异常，让Scrapy知道处理失败
             raise
-        
-        return item
 
+    @timed
     def _process_employee_item(self, adapter):
         """处理员工信息"""
         corp_code = adapter.get('corp_code')
@@ -102,6 +116,7 @@ class CompanyEmployeePipeline:
             self.session.add(employee)
             self.logger.debug(f"Added new employee: {adapter.get('name')}")
 
+    @timed
     def _process_company_item(self, adapter):
         """处理公司信息"""
         corp_code = adapter.get('corp_code')
@@ -140,6 +155,7 @@ class CompanyEmployeePipeline:
             self.session.add(company)
             self.logger.debug(f"Added new company: {adapter.get('name')}")
 
+    @timed
     def _process_performance_item(self, adapter):
         """处理个人业绩信息"""
         corp_code = adapter.get('corp_code')
@@ -189,6 +205,11 @@ class CompanyEmployeePipeline:
 
     def close_spider(self, spider):
         """爬虫结束时清理资源"""
+        d = self.writer.submit(self._close_session)
+        d.addBoth(lambda _: self.writer.stop())
+        return d
+
+    def _close_session(self):
         if hasattr(self, 'session') and self.session:
             try:
                 self.session.commit()  # 最后提交一次
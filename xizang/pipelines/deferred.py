@@ -0,0 +1,115 @@
+import json
+import logging
+import os
+import tempfile
+import time
+
+from itemadapter import ItemAdapter
+from scrapy.utils.misc import load_object
+
+logger = logging.getLogger(__name__)
+
+
+def _serialize(deferred_at, item):
+    record = {
+        'deferred_at': deferred_at,
+        'cls': f"{item.__class__.__module__}.{item.__class__.__name__}",
+        'data': ItemAdapter(item).asdict(),
+    }
+    return json.dumps(record, ensure_ascii=False, default=str).encode('utf-8') + b'\n'
+
+
+def dump_items(entries, path):
+    """把 [(deferred_at, item), ...] 以 JSON lines 追加写入文件"""
+    with open(path, 'ab') as f:
+        for deferred_at, item in entries:
+            f.write(_serialize(deferred_at, item))
+
+
+class DeferredItemIndex:
+    """按 project_id 索引的待处理 item
+
+    子表 item 先于所属项目到达时放入这里，项目入库后只取出该项目的 item。
+    内存中的条数超过 max_items 时，把最早挂起的项目整体溢写到临时文件。
+    """
+
+    def __init__(self, max_items=10000, spill_dir=None):
+        self.max_items = max_items
+        self.spill_dir = spill_dir
+        self._memory = {}  # project_id -> [(deferred_at, item), ...]，按首次挂起顺序
+        self._memory_count = 0
+        self._spilled = {}  # project_id -> [(offset, length), ...]
+        self._spilled_count = 0
+        self._spill_file = None
+
+    def __len__(self):
+        return self._memory_count + self._spilled_count
+
+    def __contains__(self, project_id):
+        return project_id in self._memory or project_id in self._spilled
+
+    @property
+    def spilled_count(self):
+        return self._spilled_count
+
+    def add(self, project_id, item):
+        self._memory.setdefault(project_id, []).append((time.time(), item))
+        self._memory_count += 1
+        while self._memory_count > self.max_items and len(self._memory) > 1:
+            self._spill_oldest()
+
+    def pop(self, project_id):
+        """取出某个项目的全部待处理 item，返回 [(deferred_at, item), ...]"""
+        entries = self._memory.pop(project_id, [])
+        self._memory_count -= len(entries)
+        positions = self._spilled.pop(project_id, None)
+        if positions:
+            self._spilled_count -= len(positions)
+            entries = self._read_spilled(positions) + entries
+        return entries
+
+    def oldest_age(self):
+        """内存中最早挂起 item 的等待秒数"""
+        for entries in self._memory.values():
+            return time.time() - entries[0][0]
+        return 0
+
+    def drain(self):
+        """取出全部剩余 item，用于爬虫结束时处理孤儿数据"""
+        entries = []
+        for project_id in list(self._spilled) + list(self._memory):
+            entries.extend(self.pop(project_id))
+        return entries
+
+    def close(self):
+        if self._spill_file:
+            path = self._spill_file.name
+            self._spill_file.close()
+            os.remove(path)
+            self._spill_file = None
+
+    def _spill_oldest(self):
+        project_id = next(iter(self._memory))
+        entries = self._memory.pop(project_id)
+        self._memory_count -= len(entries)
+        if self._spill_file is None:
+            self._spill_file = tempfile.NamedTemporaryFile(
+                prefix='deferred-items-', suffix='.jl', dir=self.spill_dir, delete=False)
+            logger.info(f"Spilling deferred items to {self._spill_file.name}")
+        self._spill_file.seek(0, os.SEEK_END)
+        positions = self._spilled.setdefault(project_id, [])
+        for deferred_at, item in entries:
+            line = _serialize(deferred_at, item)
+            positions.append((self._spill_file.tell(), len(line)))
+            self._spill_file.write(line)
+        self._spill_file.flush()
+        self._spilled_count += len(entries)
+
+    def _read_spilled(self, positions):
+        entries = []
+        for offset, length in positions:
+            self._spill_file.seek(offset)
+            record = json.loads(self._spill_file.read(length))
+            item = load_object(record['cls'])(record['data'])
+            entries.append((record['deferred_at'], item))
+        return entries
@@ -0,0 +1,80 @@
+import gzip
+import hashlib
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from xizang.models.models import NoticeBlob
+
+# 公告原文压缩算法：codec -> (压缩, 解压)
+CODECS = {
+    'gzip': (lambda data: gzip.compress(data, compresslevel=6), gzip.decompress),
+}
+DEFAULT_CODEC = 'gzip'
+
+# 改为只保存哈希的表
+NOTICE_TABLES = ('project', 'winner_bid_info')
+
+
+def notice_hash(html):
+    return hashlib.sha256(html.encode('utf-8')).hexdigest()
+
+
+def pack_notice(html, codec=DEFAULT_CODEC):
+    """公告原文 -> notice_blob 行"""
+    data = html.encode('utf-8')
+    return {
+        'content_hash': hashlib.sha256(data).hexdigest(),
+        'codec': codec,
+        'content': CODECS[codec][0](data),
+        'size': len(data),
+    }
+
+
+def unpack_notice(codec, content):
+    return CODECS[codec][1](content).decode('utf-8')
+
+
+def load_notice(session, content_hash):
+    """按哈希读取公告原文，不存在时返回 None"""
+    blob = session.get(NoticeBlob, content_hash)
+    if blob is None:
+        return None
+    return unpack_notice(blob.codec, blob.content)
+
+
+def save_notices(session, htmls):
+    """写入库中还没有的公告，返回本次插入的哈希集合
+
+    先按哈希查询已存在的公告，已有的公告不再压缩和传输。
+    """
+    by_hash = {}
+    for html in htmls:
+        by_hash.setdefault(notice_hash(html), html)
+    if not by_hash:
+        return set()
+    existing = set(session.scalars(
+        select(NoticeBlob.content_hash).where(NoticeBlob.content_hash.in_(list(by_hash)))
+    ))
+    missing = [pack_notice(html) for content_hash, html in by_hash.items() if content_hash not in existing]
+    if missing:
+        # 并发写入同一公告时以先写入者为准
+        session.execute(pg_insert(NoticeBlob.__table__).on_conflict_do_nothing(index_elements=['content_hash']),
+                        missing)
+    return {row['content_hash'] for row in missing}
+
+
+class NoticeBlobStream:
+    """UpsertBuffer 中的公告写入流，行为 {'content_hash', 'html'}，写入时再压缩"""
+
+    name = 'notice_blob'
+    key_columns = ('content_hash',)
+
+    def key(self, row):
+        return row['content_hash']
+
+    def merge(self, old, new):
+        return old
+
+    def execute(self, session, rows):
+        save_notices(session, [row['html'] for row in rows])
@@ -0,0 +1,154 @@
+import logging
+import time
+
+from sqlalchemy import func, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+logger = logging.getLogger(__name__)
+
+
+class UpsertStream:
+    """单张表的一类写入：按冲突键去重，刷新时以 INSERT ... ON CONFLICT 批量执行"""
+
+    def __init__(self, name, table, key_columns, constraint=None, update_columns=None, keep_existing=()):
+        self.name = name
+        self.table = table
+        self.key_columns = tuple(key_columns)
+        self.constraint = constraint
+        # update_columns 为 None 时冲突即跳过(DO NOTHING)
+        self.update_columns = update_columns
+        # 这些列在新值为空时保留库中原值，等价于旧逻辑里"只更新 item 中出现的字段"
+        self.keep_existing = set(keep_existing)
+        self.statement = self._build_statement()
+
+    def _build_statement(self):
+        stmt = pg_insert(self.table)
+        target = {'constraint': self.constraint} if self.constraint else {'index_elements': list(self.key_columns)}
+        if self.update_columns is None:
+            return stmt.on_conflict_do_nothing(**target)
+        set_ = {}
+        for column in self.update_columns:
+            if column in self.keep_existing:
+                set_[column] = func.coalesce(stmt.excluded[column], self.table.c[column])
+            else:
+                set_[column] = stmt.excluded[column]
+        return stmt.on_conflict_do_update(set_=set_, **target)
+
+    def key(self, row):
+        return tuple(row[column] for column in self.key_columns)
+
+    def merge(self, old, new):
+        # 同一批次内相同冲突键只保留最后一次写入，否则 PostgreSQL 会报
+        # "ON CONFLICT DO UPDATE command cannot affect row a second time"
+        return new
+
+    def execute(self, session, rows):
+        session.execute(self.statement, rows)
+
+
+class StageStream:
+    """项目阶段推进：只升不降，按目标阶段分组，每组一条 UPDATE"""
+
+    name = 'project_stage'
+    key_columns = ('project_id',)
+
+    def __init__(self, table):
+        self.table = table
+
+    def key(self, row):
+        return row['project_id']
+
+    def merge(self, old, new):
+        return new if new['stage'] > old['stage'] else old
+
+    def execute(self, session, rows):
+        by_stage = {}
+        for row in rows:
+            by_stage.setdefault(row['stage'], []).append(row['project_id'])
+        for stage, project_ids in by_stage.items():
+            session.execute(
+                update(self.table)
+                .where(self.table.c.project_id.in_(project_ids))
+                .where(func.coalesce(self.table.c.stage, 0) < stage)
+                .values(stage=stage)
+            )
+
+
+class UpsertBuffer:
+    """按表缓冲待写入的行，达到条数上限或等待时间上限时整体刷新
+
+    流的注册顺序即刷新顺序，需保证外键依赖的父表排在前面。
+    """
+
+    def __init__(self, max_rows=500, max_age=5.0):
+        self.max_rows = max_rows
+        self.max_age = max_age
+        self.streams = {}
+        self._rows = {}
+        self._size = 0
+        self._first_added = None
+
+    def register(self, stream):
+        self.streams[stream.name] = stream
+        self._rows[stream.name] = {}
+        return stream
+
+    def add(self, name, row):
+        stream = self.streams[name]
+        rows = self._rows[name]
+        key = stream.key(row)
+        if key in rows:
+            rows[key] = stream.merge(rows[key], row)
+        else:
+            rows[key] = row
+            self._size += 1
+        if self._first_added is None:
+            self._first_added = time.monotonic()
+
+    def __len__(self):
+        return self._size
+
+    def should_flush(self):
+        if not self._size:
+            return False
+        if self._size >= self.max_rows:
+            return True
+        return time.monotonic() - self._first_added >= self.max_age
+
+    def drain(self):
+        """取出当前缓冲内容并清空，返回 [(stream, rows), ...]"""
+        batches = [(self.streams[name], list(rows.values())) for name, rows in self._rows.items() if rows]
+        for rows in self._rows.values():
+            rows.clear()
+        self._size = 0
+        self._first_added = None
+        return batches
+
+
+def write_batches(session, batches):
+    """在一个事务里写入全部批次；失败时回滚并逐行重试，隔离出坏数据
+
+    返回 (写入行数, 失败行数)
+    """
+    total = sum(len(rows) for _, rows in batches)
+    try:
+        for stream, rows in batches:
+            stream.execute(session, rows)
+        session.commit()
+        return total, 0
+    except Exception as e:
+        session.rollback()
+        logger.warning(f"Batch write of {total} rows failed, retrying row by row: {e}")
+
+    written = failed = 0
+    for stream, rows in batches:
+        for row in rows:
+            try:
+                stream.execute(session, [row])
+                session.commit()
+                written += 1
+            except Exception as e:
+                session.rollback()
+                failed += 1
+                logger.error(f"Failed to write {stream.name} row {stream.key(row)}: {e}")
+    return written, failed
@@ -0,0 +1,110 @@
+import logging
+import time
+
+from twisted.internet import defer, threads
+from twisted.python.failure import Failure
+from twisted.python.threadpool import ThreadPool
+
+from xizang.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+PENDING = REGISTRY.gauge('xizang_db_writer_pending', 'Writes submitted and not yet finished', ('writer',))
+JOB_SECONDS = REGISTRY.histogram('xizang_db_writer_job_seconds', 'Time spent running writes', ('writer', 'job'))
+
+
+class DatabaseWriter:
+    """在专用线程中执行阻塞的数据库写入，避免 Postgres 变慢时卡住 reactor 线程
+
+    submit() 返回 Deferred，pipeline 直接把它作为 process_item 的返回值，
+    Scrapy 会等它完成后才继续处理该响应的后续 item，从而保留 CONCURRENT_ITEMS 背压。
+    同时在途的任务数不超过 max_pending，超出的任务在 reactor 侧排队等待。
+    需要保证写入顺序的 pipeline 使用单线程（threads=1）。
+    """
+
+    def __init__(self, name, threads=1, max_pending=100, stats=None):
+        self.name = name
+        self.stats = stats
+        self.pool = ThreadPool(minthreads=threads, maxthreads=threads, name=f'db-writer-{name}')
+        self.semaphore = defer.DeferredSemaphore(max_pending)
+        self.pending = set()
+        self._shutdown_trigger = None
+
+    @classmethod
+    def from_crawler(cls, crawler, name, threads=None):
+        return cls(
+            name,
+            threads=threads or crawler.settings.getint('DB_WRITER_THREADS', 1),
+            max_pending=crawler.settings.getint('DB_WRITER_MAX_PENDING', 100),
+            stats=crawler.stats,
+        )
+
+    def start(self):
+        if self.pool.started:
+            return
+        from twisted.internet import reactor
+
+        self.pool.start()
+        # 异常退出时也要回收线程，否则进程无法结束
+        self._shutdown_trigger = reactor.addSystemEventTrigger('during', 'shutdown', self.pool.stop)
+
+    def submit(self, func, *args, **kwargs):
+        """在写入线程中执行 func(*args, **kwargs)，返回携带其结果的 Deferred"""
+        submitted = time.monotonic()
+        d = self.semaphore.run(self._run, submitted, func, *args, **kwargs)
+        self.pending.add(d)
+        d.addBoth(self._done, d)
+        self._inc('submitted')
+        self._max('queue_peak', len(self.pending))
+        PENDING.set(len(self.pending), writer=self.name)
+        return d
+
+    def stop(self):
+        """等待所有在途任务完成后停止线程池"""
+        d = defer.DeferredList(list(self.pending), consumeErrors=True)
+        d.addCallback(self._stop_pool)
+        return d
+
+    def _stop_pool(self, _):
+        from twisted.internet import reactor
+
+        if self._shutdown_trigger is not None:
+            reactor.removeSystemEventTrigger(self._shutdown_trigger)
+            self._shutdown_trigger = None
+        if self.pool.started:
+            self.pool.stop()
+        logger.info(f"Database writer {self.name} stopped")
+
+    def _run(self, submitted, func, *args, **kwargs):
+        from twisted.internet import reactor
+
+        self._max('max_wait_seconds', round(time.monotonic() - submitted, 3))
+        return threads.deferToThreadPool(reactor, self.pool, self._timed, func, *args, **kwargs)
+
+    def _timed(self, func, *args, **kwargs):
+        from twisted.internet import reactor
+
+        started = time.monotonic()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.monotonic() - started
+            JOB_SECONDS.observe(elapsed, writer=self.name, job=func.__name__)
+            reactor.callFromThread(self._inc, 'busy_seconds', elapsed)
+
+    def _done(self, result, d):
+        self.pending.discard(d)
+        PENDING.set(len(self.pending), writer=self.name)
+        if isinstance(result, Failure):
+            self._inc('failed')
+        else:
+            self._inc('completed')
+        return result
+
+    def _inc(self, key, count=1):
+        if self.stats:
+            self.stats.inc_value(f'db_writer/{self.name}/{key}', count)
+
+    def _max(self, key, value):
+        if self.stats:
+            self.stats.max_value(f'db_writer/{self.name}/{key}', value)
@@ -6,9 +6,14 @@ import json
 from xizang.items import ProjectItem, BidItem, BidSectionItem, BidRankItem
 from datetime import datetime, timedelta
 from scrapy.exceptions import CloseSpider
+from scrapy.utils.defer import maybe_deferred_to_future
 from w3lib.url import add_or_replace_parameter
 import pytz
-from xizang.utils.util import analyse_notice,extract_url_from_click,extract_section_number_str,is_number
+from xizang.utils.incremental import CrawlState, parse_time_show
+from xizang.utils.extractors import extract
+from xizang.utils.notice_pool import NoticeAnalyzer
+from xizang.utils.table import Table, find_table, parse_tables
+from xizang.utils.util import extract_url_from_click,extract_section_number_str,is_number
 
 
 class BidInfoSpider(scrapy.Spider):
@@ -23,9 +28,21 @@ class BidInfoSpider(scrapy.Spider):
         }
     }
     # scrapy crawl bid_info -a start_date='2025-03-01' -a end_date='2025-04-01'
+    # 增量模式下不传 start_date 时从上次的水位开始；-a incremental=0 强制全量
+    # 日期范围按 window_days 天切分成多个窗口并发查询：-a window_days=7
     # 0101招标 0102 开标 0103 结果 0104澄清
-    def __init__(self, start_date=None, end_date=None, *args, **kwargs):
+    list_url = 'https://deal.ggzy.gov.cn/ds/deal/dealList_find.jsp'
+    # MetricsExporter 导出的进度计数
+    metrics_progress = ('total_projects', 'processed_projects', 'total_lots', 'processed_lots',
+                        'total_bids', 'processed_bids')
+
+    def __init__(self, start_date=None, end_date=None, incremental=None, window_days=None, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.start_date_given = bool(start_date)
+        self.window_days = window_days
+        self.incremental = incremental
+        self.crawl_state = None
+        self.latest_time_show = None
         self.duration = 7
         # 获取当前日期
         today = datetime.now()
@@ -61,19 +78,62 @@ class BidInfoSpider(scrapy.Spider):
         self.total_bids = 0
         self.processed_bids = 0
 
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        spider.notice_analyzer = NoticeAnalyzer.from_crawler(crawler)
+        spider.window_days = max(1, int(spider.window_days or crawler.settings.getint('BID_INFO_WINDOW_DAYS', 7)))
+        if spider.incremental is None:
+            spider.incremental = crawler.settings.getbool('BID_INFO_INCREMENTAL', True)
+        else:
+            spider.incremental = spider.incremental not in ('0', 'false', 'False', 'no')
+        if spider.incremental:
+            spider.load_crawl_state(crawler.settings.get('POSTGRES_URL'))
+        return spider
+
+    def load_crawl_state(self, db_url):
+        """加载已入库项目的阶段和水位，数据库不可用时退回全量爬取"""
+        try:
+            self.crawl_state = CrawlState(db_url, self.name).load()
+        except Exception as e:
+            self.logger.warning(f"无法加载增量状态，本次全量爬取: {e}")
+            self.incremental = False
+            return
+        watermark = self.crawl_state.watermark
+        self.logger.info(f"增量模式: 已知项目 {len(self.crawl_state.stages_by_project)} 个，水位 {watermark}")
+        if watermark and not self.start_date_given:
+            # 水位当天可能还有未爬完的项目，从当天开始
+            self.start_date = datetime(watermark.year, watermark.month, watermark.day)
+
     def start_requests(self):
         # 日期已在__init__中设置，这里直接使用
-        url = (f"https://deal.ggzy.gov.cn/ds/deal/dealList_find.jsp?"
-               f"TIMEBEGIN_SHOW={self.start_date.strftime('%Y-%m-%d')}&"
-               f"TIMEEND_SHOW={self.end_date.strftime('%Y-%m-%d')}&"
-               f"TIMEBEGIN={self.start_date.strftime('%Y-%m-%d')}&"
-               f"TIMEEND={self.end_date.strftime('%Y-%m-%d')}&"
+        self.logger.info(f'scrawl from: {self.start_date.strftime("%Y-%m-%d")} to {self.end_date.strftime("%Y-%m-%d")}')
+        windows = self.date_windows(self.start_date, self.end_date, self.window_days)
+        self.crawler.stats.set_value('bid_info/windows', len(windows))
+        # 每个窗口的第一页同时发出，拿到总页数后再一次性发出其余页
+        for begin, end in windows:
+            yield self.list_request(begin, end, 1)
+
+    @staticmethod
+    def date_windows(start_date, end_date, days):
+        """把 [start_date, end_date] 切成每段 days 天的闭区间"""
+        windows = []
+        begin = start_date
+        while begin <= end_date:
+            end = min(begin + timedelta(days=days - 1), end_date)
+            windows.append((begin, end))
+            begin = end + timedelta(days=1)
+        return windows
+
+    def list_request(self, begin, end, page):
+        begin, end = begin.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')
+        url = (f"{self.list_url}?"
+               f"TIMEBEGIN_SHOW={begin}&TIMEEND_SHOW={end}&TIMEBEGIN={begin}&TIMEEND={end}&"
                f"SOURCE_TYPE=1&DEAL_TIME=06&DEAL_CLASSIFY=01&DEAL_STAGE=0101&"
                f"DEAL_PROVINCE=540000&DEAL_CITY=0&DEAL_PLATFORM=0&"
-               f"BID_PLATFORM=0&DEAL_TRADE=0&isShowAll=1&PAGENUMBER=1&FINDTXT=")
-
-        self.logger.info(f'scrawl from: {self.start_date.strftime("%Y-%m-%d")} to {self.end_date.strftime("%Y-%m-%d")}')
-        yield scrapy.Request(url=url, callback=self.parse, method='POST')
+               f"BID_PLATFORM=0&DEAL_TRADE=0&isShowAll=1&PAGENUMBER={page}&FINDTXT=")
+        self.crawler.stats.inc_value('bid_info/list_pages')
+        return scrapy.Request(url=url, callback=self.parse, method='POST', meta={'window': (begin, end), 'page': page})
 
     def parse(self, response):
         try:
@@ -83,7 +143,7 @@ class BidInfoSpider(scrapy.Spider):
                 self.logger.error(f"Unexpected response structure: {data}")
                 return None
 
-            self.total_projects = len(data['data'])
+            self.total_projects += len(data['data'])
             self.logger.info(f"processing projects: {self.total_projects}, processed: {self.processed_projects}")
 
             n = 0
@@ -97,6 +157,14 @@ class BidInfoSpider(scrapy.Spider):
                 # if n > 2: return
                 # 创建并填充 ProjectItem
 
+                time_show = parse_time_show(item['timeShow'])
+                if time_show and (self.latest_time_show is None or time_show > self.latest_time_show):
+                    self.latest_time_show = time_show
+                if self.crawl_state and self.crawl_state.stage(detail_url=item['url']) >= 3:
+                    # 已有中标候选人的项目不会再变化
+                    self.crawler.stats.inc_value('bid_info/skipped_complete')
+                    continue
+
                 project_item = ProjectItem()
                 if title.endswith("招标公告"):
                     title = title[:-4]
@@ -106,6 +174,7 @@ class BidInfoSpider(scrapy.Spider):
                 project_item['platformName'] = item['platformName']
                 project_item['classifyShow'] = item['classifyShow']
                 project_item['url'] = item['url']
+                project_item['detail_url'] = item['url']
                 project_item['districtShow'] = item['districtShow']
                 
                 # 发送请求处理项目详情
@@ -117,11 +186,13 @@ class BidInfoSpider(scrapy.Spider):
                 )
                 # return None
 
-            cur_page = data['currentpage'] + 1
-            if cur_page <= data['ttlpage']:
-                cur_page += 1
-                url = add_or_replace_parameter(response.url, 'PAGENUMBER', str(cur_page))
-                yield scrapy.Request(url=url, callback=self.parse, method='POST')
+            # 只由窗口的第一页展开其余页
+            if response.meta.get('page', data['currentpage']) == 1:
+                for page in range(2, data['ttlpage'] + 1):
+                    url = add_or_replace_parameter(response.url, 'PAGENUMBER', str(page))
+                    self.crawler.stats.inc_value('bid_info/list_pages')
+                    yield scrapy.Request(url=url, callback=self.parse, method='POST',
+                                         meta={'window': response.meta.get('window'), 'page': page})
 
         except json.JSONDecodeError:
             self.logger.error("响应不是有效的JSON格式")
@@ -130,18 +201,24 @@ class BidInfoSpider(scrapy.Spider):
     def parse_stages(self, response):
         logging.debug('开始分析四个阶段')
         project_item = response.meta['project_item']
+        page = extract('bid_info.stages', response.selector.root)
         try:
-            project_item['project_id'] = response.xpath("//*[@class='p_o']/span[1]/text()").get().split('：')[1]
+            project_item['project_id'] = page['project_no'].split('：')[1]
         except IndexError:
             logging.error('get project id error!')
             return None
-        notice_first = response.xpath('//*[@id="div_0101"]/ul/li/a/@onclick').extract_first()
+        # 已入库的项目只补爬缺少的阶段
+        stage = self.crawl_state.stage(project_item.get('detail_url'), project_item['project_id']) if self.crawl_state else 0
+        if stage >= 3:
+            self.crawler.stats.inc_value('bid_info/skipped_complete')
+            return None
+        notice_first = page['notice']
         if not notice_first:
             logging.info(f'{project_item["title"]}: notice is empty, skip.')
             return None
 
-        section_list = response.xpath('//*[@id="div_0102"]/ul/li/a/@onclick').extract()
-        section_name_list = response.xpath('//*[@id="div_0102"]/ul/li/a/text()').extract()
+        section_list = page['sections']
+        section_name_list = page['section_names']
 
         if not section_list:
             logging.debug('标段为空')
@@ -149,13 +226,18 @@ class BidInfoSpider(scrapy.Spider):
         project_item['session_size'] = len(section_list)
 
         url = extract_url_from_click(notice_first)
-        if url:
+        if stage >= 1:
+            self.crawler.stats.inc_value('bid_info/skipped_notice')
+        elif url:
             project_item['url'] = url
             logging.debug( f'开始处理{project_item["title"]}的招标公告。')
             yield scrapy.Request(url=url, callback=self.parse_notice, meta={'project_item': project_item})
 
 
         logging.debug('开始开标记录标段')
+        if stage >= 2:
+            self.crawler.stats.inc_value('bid_info/skipped_sections', len(section_list))
+            section_list = []
         for n, section in enumerate(section_list):
             bid_section_item = BidSectionItem()
             try:
@@ -175,7 +257,7 @@ class BidInfoSpider(scrapy.Spider):
             yield scrapy.Request(url=url, callback=self.parse_bids, meta={'bid_section_item': bid_section_item})
 
 
-        result_list = response.xpath('//*[@id="div_0104"]/ul/li/a/@onclick').extract()
+        result_list = page['results']
         logging.debug('开始解析候选人')
         for result in result_list:
             url = extract_url_from_click(result)
@@ -184,27 +266,22 @@ class BidInfoSpider(scrapy.Spider):
 
 
 
-    def parse_notice(self, response):
+    async def parse_notice(self, response):
         project_item = response.meta['project_item']
-        analyse_notice(response.text, project_item)
+        # NOTICE_ANALYSIS_PROCESSES > 0 时在进程池中解析
+        await maybe_deferred_to_future(self.notice_analyzer.analyse(response.text, project_item))
 
         logging.debug(f'project content:{dict(project_item)}')
         self.processed_projects += 1
         yield project_item
 
-    def get_control_price(self, response):
-        th_list = response.xpath('//table//thead//tr[1]/th')
-        index = 0
-        for i, th in enumerate(th_list):
-            text = th.xpath('string(.)').get()
-            if '控制价' in text:
-                index = i
-                break
-
-        node_list = response.xpath(f'//table//table//tr')
-        logging.debug(f'index:{index}')
-        for node in node_list:
-            price = node.xpath(f'./td[{index}]/text()').get()
+    @staticmethod
+    def get_control_price(tables):
+        """表头含“控制价”的列中第一个数值"""
+        table = find_table(tables, '控制价')
+        if table is None:
+            return 0
+        for price in table.values(table.column('控制价')):
             if is_number(price):
                 return float(price)
         return 0
@@ -215,15 +292,28 @@ class BidInfoSpider(scrapy.Spider):
         # bid_section_item['section_name'] = response.xpath('//*[@class="h4_o"]/text()').get().strip()
 
 
-        bid_open_time = response.xpath('//*[@class="p_o"]/span[1]/text()').get().split('：')
+        page = extract('bid_info.bid_record', response.selector.root)
+        bid_open_time = page['open_time'].split('：')
         if len(bid_open_time) > 1 and bid_open_time[0] != '开标时间':
             self.logger. error(f'获取 {bid_section_item["section_name"]} 开标时间有误')
             yield bid_section_item
             return None
 
-        bid_section_item['info_source'] = response.xpath('//*[@id="platformName"]/text()').get() # 信息来源
+        bid_section_item['info_source'] = page['info_source'] # 信息来源
         bid_section_item['bid_open_time'] = bid_open_time[-1]
-        rows = response.xpath('//*[@class="detail_Table"]/tr[4]/td/table//tr')
+        # 开标记录表只遍历一次，按表头找投标人、报价和控制价列
+        tables = parse_tables(response.selector.root)
+        bid_table = find_table(tables, '投标人')
+        if bid_table is not None:
+            bidder_col = bid_table.column('投标人')
+            amount_col = bid_table.column('报价', default=1)
+        else:
+            # 表头不同或没有表头时按原来的位置取，投标人、报价为第 1、2 列
+            self.logger.warning(f'{bid_section_item["section_name"]} 开标记录表头中没有投标人列，按位置解析')
+            self.crawler.stats.inc_value('bid_info/bids_header_miss')
+            bid_table = Table(page['bid_table']) if page['bid_table'] is not None else None
+            bidder_col, amount_col = 0, 1
+        rows = bid_table.rows if bid_table is not None else []
         bid_section_item['bid_size'] = len(rows)
         self.total_bids += len(rows)
         self.processed_lots += 1
@@ -232,14 +322,13 @@ class BidInfoSpider(scrapy.Spider):
                         f"session {self.processed_lots}/{self.total_lots}, "
                         f"bids {self.processed_bids}/{self.total_bids}")
 
-        control_price = self.get_control_price(response)
+        control_price = self.get_control_price(tables)
         bid_section_item['lot_ctl_amt'] = control_price
         yield bid_section_item
 
         for row in rows:
-            bidder_name = row.xpath('./td[1]/text()').get()
+            bidder_name = row[bidder_col] if bidder_col < len(row) else ''
             if not bidder_name:   #如果名字为空说明不是数据，跳过
-                yield bid_section_item
                 continue
 
             bid_item = BidItem()
@@ -247,14 +336,13 @@ class BidInfoSpider(scrapy.Spider):
             bid_item['section_id'] = bid_section_item['section_id']
             bid_item['bid_open_time'] = bid_section_item['bid_open_time']
             bid_item['project_id'] = bid_section_item['project_id']
-            bid_amt = row.xpath('./td[2]/text()').get()
+            bid_amt = row[amount_col] if amount_col < len(row) else None
             if is_number(bid_amt):
                 bid_item['bid_amount'] = float(bid_amt)
             else:
                 bid_item['bid_amount'] = 0
 
-            if bidder_name:
-                bid_item['bidder_name'] = bidder_name.strip()
+            bid_item['bidder_name'] = bidder_name
 
             self.processed_bids += 1
             yield bid_item
@@ -264,51 +352,43 @@ class BidInfoSpider(scrapy.Spider):
         logging.debug('开始解招标结果')
         project_item = response.meta['project_item']
 
-        if '标候选人公示' in response.xpath('//*[@class="h4_o"]/text()').get():
-            return self.parse_candidates(response, project_item)
+        # 标段名称按项目名称前四个字查找
+        page = extract('bid_info.candidates', response.selector.root, keyword=project_item['title'][0:4])
+        if '标候选人公示' in page['title']:
+            return self.parse_candidates(page, project_item)
 
 
-    def parse_candidates(self, response, project_item):
+    def parse_candidates(self, page, project_item):
         logging.debug('开始解析候选人')
-        res_nodes = response.xpath('//*[@id="mycontent"]//tbody/tr')
-        if not res_nodes:
+        content = page['content']
+        # 每个标段一张候选人表：首行为第一中标候选人及投标价格，“项目负责人”行为其项目经理
+        tables = [t for t in parse_tables(content) if t.rows and len(t.rows[0]) >= 3] if content is not None else []
+        if not tables:
             logging.debug('候选人解析为空！')
             return None
 
         project_name = project_item['title']
         project_id = project_item['project_id']
-        company_list = response.xpath('//*[@id="mycontent"]//tbody/tr/td[2]/text()').extract()
         filtered_company_list = []
         manager_list = []
-        manager_list_org = response.xpath('//*[@id="mycontent"]//tbody/tr/td[3]/text()').extract()
         win_amt = []
-        if len(manager_list_org) != len(company_list):
-            logging.error(f'公司名单长度{len(company_list)}和其他元素长度{len(manager_list_org)}不一致')
-            return None
-
-        for i in range(0, len(company_list), 12):
-            filtered_company_list.append(company_list[i])  # 只取第一名
-
-            if i > len(manager_list_org):
-                win_amt.append('')
-            else:
-                win_amt.append(manager_list_org[i])  # 取投标价格
-
-            if (i+3) > len(manager_list_org):
-                manager_list.append('')
-            else:
-                manager_list.append(manager_list_org[i+3])  # 取排名第一的经理
-
-
-        project_keyword = project_name[0:4]
-        section_name_list = response.xpath(f'//*[@id="mycontent"]/div/div/div/div[2]/p[contains(text(), "{project_keyword}")]').extract()
+        for table in tables:
+            first = table.row('第一') or table.rows[0]
+            filtered_company_list.append(first[1])  # 只取第一名
+            win_amt.append(first[2])  # 取投标价格
+            manager = table.row('项目负责人', '项目经理') or (table.rows[3] if len(table.rows) > 3 else None)
+            manager_list.append(manager[2] if manager and len(manager) > 2 else '')  # 取排名第一的经理
+
+        section_name_list = page['section_names']
         logging.debug(f'section_name_list: {len(section_name_list)}')
         open_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         try:
-            open_time = response.xpath('//*[@class="p_o"]/span[contains(text(), "发布时间")]/text()').get().strip().split('：')[1]
-        except IndexError as e:
+            open_time = page['publish_time'].split('：')[1]
+        except (AttributeError, IndexError) as e:
             logging.debug(f'get open_time error: {e}')
-        for i in range(0, len(section_name_list)):
+        if len(section_name_list) != len(tables):
+            logging.warning(f'标段数{len(section_name_list)}和候选人表数{len(tables)}不一致')
+        for i in range(0, min(len(section_name_list), len(tables))):
             bid_rank = BidRankItem()
             bid_rank['project_id'] = project_id
             section_id = extract_section_number_str(section_name_list[i])
@@ -319,4 +399,12 @@ class BidInfoSpider(scrapy.Spider):
             bid_rank['manager_name'] = manager_list[i]
             bid_rank['win_amt'] = win_amt[i]
             bid_rank['open_time'] = open_time
-            yield bid_rank
\ No newline at end of file
+            yield bid_rank
+    def closed(self, reason):
+        if not self.crawl_state:
+            return
+        # 只有正常结束时才推进水位，中途失败的下次从原水位重爬
+        if reason == 'finished' and self.latest_time_show:
+            self.crawl_state.save_watermark(self.latest_time_show)
+            self.logger.info(f"增量水位更新为 {self.latest_time_show}")
+        self.crawl_state.close()
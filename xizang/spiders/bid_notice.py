@@ -1,11 +1,13 @@
 from xizang.items import ProjectItem, BidSectionItem
-from xizang.utils.util import analyse_notice, extract_section_number_str
+from xizang.utils.notice_pool import NoticeAnalyzer
+from xizang.utils.regions import city_name
+from xizang.utils.util import extract_section_number_str
 import scrapy
 from scrapy.http import JsonRequest
+from scrapy.utils.defer import maybe_deferred_to_future
 import json
 import logging
 import secrets
-import os
 
 
 def parse_cookie_string(cookie_str):
@@ -33,6 +35,13 @@ class BidNoticeSpider(scrapy.Spider):
         }
     }
     total_projects = 0
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        spider.notice_analyzer = NoticeAnalyzer.from_crawler(crawler)
+        return spider
+
     def start_requests(self):
         rand_param = secrets.token_hex(6)
         body =  {"page": 1, "pageSize": 100, "searchName": "", "registerStatus": ""}
@@ -45,17 +54,21 @@ class BidNoticeSpider(scrapy.Spider):
             cookies=parse_cookie_string(self.cookie)
         )
 
-    def parse_notice(self, response):
+    async def parse_notice(self, response):
         if response.status != 200:
             logging.warning(f'error:{response.message}')
         project = response.meta.get('project')
         res = json.loads(response.text)
         project['session_size'] = len(res['data']['listData'])
+        # 先把所有公告提交解析，启用进程池时可以并行
+        pending = []
         for item in res['data']['listData']:
-            html_text = item['txt']
-            project['districtShow'] = self.parse_city(item['areaNo'])
+            notice = project.copy()
+            notice['districtShow'] = self.parse_city(item['areaNo'])
+            pending.append(self.notice_analyzer.analyse(item['txt'], notice))
+        for d in pending:
             self.total_projects +=1
-            yield analyse_notice(html_text, project)
+            yield await maybe_deferred_to_future(d)
 
     def parse(self, response):
         res = json.loads(response.text)
@@ -102,18 +115,10 @@ class BidNoticeSpider(scrapy.Spider):
         #         cookies=parse_cookie_string(self.cookie)
         #     )
 
-    def parse_city(self, area_code):
-        if len(area_code) > 4:
-            area_code = area_code[:4]
-        # 获取当前脚本文件所在目录
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        cities_path = os.path.join(base_dir, '..', 'cities.json')
-        with open(cities_path, encoding='utf-8') as f:
-            city_dic = json.load(f)
-        for city in city_dic:
-            if city['code'] == area_code:
-                return city['name']
-        return ''
+    @staticmethod
+    def parse_city(area_code):
+        """地区编码对应的地市名称，区划数据在 regions 导入时加载一次"""
+        return city_name(area_code)
 
     def closed(self, reason):
         logging.info(f'共更新项目:{self.total_projects}')
@@ -1,13 +1,41 @@
 import scrapy
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
+from scrapy import signals
+from scrapy.exceptions import DontCloseSpider
 from urllib.parse import quote
 from xizang.items import CompanyItem, EmployeeItem, PersonPerformanceItem
-from xizang.settings import POSTGRES_URL
+from xizang.utils.company_names import CompanyNameIndex
+from xizang.utils.company_queue import CompanyQueue
+from xizang.utils.extractors import extract
+from sqlalchemy import text
+import json
 import time
 import logging
 
 
+def read_corp_codes(path):
+    """读取公司代码文件，返回 [(corp_code, name), ...]，缺少的一项为空字符串
+
+    每行一个公司：scrapy crawl corp_list -o corps.jsonl 导出的 JSON 行(取 corp_code、name，其余字段忽略)，
+    或 代码[,名称] / 代码<tab>名称，没有代码的行写作 ,名称。也可以是 -o corps.json 导出的 JSON 数组。
+    """
+    with open(path, encoding='utf-8-sig') as f:
+        content = f.read()
+    if content.lstrip().startswith('['):
+        records = json.loads(content)
+    else:
+        records = []
+        for line in content.splitlines():
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if line.startswith('{'):
+                records.append(json.loads(line))
+            else:
+                corp_code, _, name = line.replace('\t', ',').partition(',')
+                records.append({'corp_code': corp_code, 'name': name})
+    return [((record.get('corp_code') or '').strip(), (record.get('name') or '').strip()) for record in records]
+
+
 class CompanyEmpInfoSpider(scrapy.Spider):
     """在西藏信息查询网站，查询西藏公司及员工信息"""
 
@@ -19,110 +47,187 @@ class CompanyEmpInfoSpider(scrapy.Spider):
             'xizang.pipelines.CompanyEmployee.CompanyEmployeePipeline': 300,
         }
     }
-    def __init__(self, *args, **kwargs):
+    # 待查询公司来自 company_crawl_queue，多个进程同时运行时各自领取不重叠的公司；
+    # 指定 corp_codes 时改为刷新已知代码的公司：
+    #   scrapy crawl company_emp_info -a corp_codes=db          # company_info 中的全部公司
+    #   scrapy crawl company_emp_info -a corp_codes=corps.jsonl # 文件，格式见 read_corp_codes
+    def __init__(self, corp_codes=None, *args, **kwargs):
         super(CompanyEmpInfoSpider, self).__init__(*args, **kwargs)
-        # 数据库连接
-        self.engine = create_engine(POSTGRES_URL)
-        self.Session = sessionmaker(bind=self.engine)
-        self.session = self.Session()
-        
+        self.queue = None
+        self.claimed = 0
+        self.corp_codes = corp_codes
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        spider.queue = CompanyQueue.from_settings(crawler.settings)
+        spider.names = CompanyNameIndex.from_settings(crawler.settings)
+        spider.batch_size = crawler.settings.getint('COMPANY_QUEUE_BATCH_SIZE', 50)
+        spider.run_limit = crawler.settings.getint('COMPANY_QUEUE_RUN_LIMIT', 200)
+        crawler.signals.connect(spider.spider_idle, signal=signals.spider_idle)
+        return spider
+
     def start_requests(self):
-        # 查询需要获取信息的公司
-        query = text("""
-            SELECT bidder_name
-            FROM (
-                SELECT DISTINCT bidder_name
-                FROM bid
-                WHERE bidder_name NOT IN (SELECT name FROM company_info)
-                  AND bidder_name != ''
-            ) AS sub
-            ORDER BY RANDOM()
-            LIMIT 200;
-        """)
-        
-        companies = self.session.execute(query).fetchall()
-        self.logger.info(f"Found {len(companies)} companies to process")
-        
-        # 使用生成器处理公司列表
-        for name in self.expand_companies(companies):
+        if self.corp_codes:
+            self.names.load()
+            yield from self.corp_code_requests()
+            return
+        # 只把上次之后新增的投标人入队，代替每次启动时对 bid 全表反连接
+        self.queue.fill()
+        # 规范化名称已知的公司直接刷新详情，不再搜索
+        self.names.load()
+        yield from self.claim_requests()
+
+    def load_companies(self):
+        """corp_codes 指定的公司，文件中缺少的名称从 company_info 补齐"""
+        if self.corp_codes == 'db':
+            with self.names.engine.connect() as conn:
+                return conn.execute(text(
+                    "SELECT corp_code, name FROM company_info WHERE name != 'Temporary Company' ORDER BY id"
+                )).all()
+        companies = read_corp_codes(self.corp_codes)
+        unnamed = [corp_code for corp_code, name in companies if corp_code and not name]
+        if not unnamed:
+            return companies
+        with self.names.engine.connect() as conn:
+            names = dict(conn.execute(text(
+                "SELECT corp_code, name FROM company_info WHERE corp_code = ANY(:codes)"
+            ), {'codes': unnamed}).all())
+        return [(corp_code, name or names.get(corp_code, '')) for corp_code, name in companies]
+
+    def corp_code_requests(self):
+        """有代码的公司直接请求详情，只有代码未知的名称才搜索"""
+        seen = set()
+        for corp_code, name in self.load_companies():
+            if not corp_code:
+                corp_code, name = self.names.get(name) or ('', name)
+            if corp_code in seen or (corp_code and not name):
+                # 没有名称的公司无法入库
+                self.crawler.stats.inc_value('company_codes/skipped')
+                continue
             company_item = CompanyItem()
-            company_item["name"] = name # company name
-            # company_item["name"] ='元润建设工程有限公司'
-            # 构建搜索URL
-            search_url = f'{self.base_url}/outside/corps?keywords={quote(company_item["name"])}'
-            logging.info(f'开始爬取{company_item["name"]}')
-            yield scrapy.Request(
-                url=search_url,
-                callback=self.parse_search_result,
-                meta={'company_item': company_item}
-            )
+            company_item['name'] = name
+            if corp_code:
+                seen.add(corp_code)
+                company_item['corp_code'] = corp_code
+                self.crawler.stats.inc_value('company_codes/direct')
+                yield from self.detail_requests(company_item, None)
+            elif name:
+                self.crawler.stats.inc_value('company_codes/searched')
+                yield self.search_request(company_item, None)
+
+    def claim_requests(self):
+        limit = self.batch_size
+        if self.run_limit:
+            limit = min(limit, self.run_limit - self.claimed)
+        if limit <= 0:
             return
+        self.names.flush()
+        companies = self.queue.claim(limit)
+        self.claimed += len(companies)
+        self.logger.info(f"Claimed {len(companies)} companies to process")
+        self.crawler.stats.inc_value('company_queue/claimed', len(companies))
+        for queue_id, name in companies:
+            company_item = CompanyItem()
+            company_item["name"] = name # company name
+            known = self.names.get(name)
+            if known:
+                company_item['corp_code'], company_item['name'] = known
+                self.crawler.stats.inc_value('company_queue/index_hits')
+                yield from self.detail_requests(company_item, queue_id)
+                continue
+            yield self.search_request(company_item, queue_id)
 
+    def search_request(self, company_item, queue_id):
+        # 构建搜索URL
+        search_url = f'{self.base_url}/outside/corps?keywords={quote(company_item["name"])}'
+        logging.info(f'开始爬取{company_item["name"]}')
+        return scrapy.Request(
+            url=search_url,
+            callback=self.parse_search_result,
+            errback=self.company_failed,
+            meta={'company_item': company_item, 'queue_id': queue_id}
+        )
 
-    def expand_companies(self, companies):
-        """展开包含分号的公司名称，生成器返回公司名称"""
-        for company in companies:
-            name = company[0] if company and len(company) > 0 else ""
-            if ';' in name:
-                # 分割并逐个返回公司名称
-                names = name.split(';')
-                for single_name in names:
-                    cleaned_name = single_name.strip()
-                    if cleaned_name:  # 只返回非空名称
-                        yield cleaned_name
-            else:
-                cleaned_name = name.strip()
-                if cleaned_name:  # 只返回非空名称
-                    yield cleaned_name
+    def spider_idle(self, spider):
+        """一批处理完后继续领取，队列为空或达到本次上限时结束"""
+        if self.corp_codes:
+            return
+        requests = list(self.claim_requests())
+        if not requests:
+            return
+        for request in requests:
+            self.crawler.engine.crawl(request)
+        raise DontCloseSpider
+
+    def company_failed(self, failure):
+        request = failure.request
+        self.logger.warning(f"查询公司 {request.meta['company_item']['name']} 失败: {failure.getErrorMessage()}")
+        # corp_codes 模式的请求不在队列中(queue_id 为 None)
+        if request.meta.get('queue_id') is not None:
+            self.crawler.stats.inc_value('company_queue/retried')
+            self.queue.retry(request.meta['queue_id'], failure.getErrorMessage())
 
     def parse_search_result(self, response):
         company_item = response.meta['company_item']
         # 获取公司代码
-        corp_code = response.xpath('//*[@id="tab1"]/div[2]/div[1]/div[2]/table/tbody/tr/td[4]/text()').get()
+        corp_code = extract('company.search', response.selector.root)['corp_code']
         
         if corp_code:
             company_item['corp_code'] = corp_code
-            # 构建详情页URL
-            detail_url = f'{self.base_url}/outside/corpdetail?corpcode={corp_code}'
-            yield scrapy.Request(
-                url=detail_url,
-                callback=self.parse_company_detail,
-                meta={
-                    'company_item': company_item
-                }
-            )
-            # 获取当前毫秒级时间戳
-            timestamp_ms = int(time.time() * 1000)
-            # 查询注册建造师
-            emp_url = f'{self.base_url}/outside/corplistbypersonreg?corpcode={corp_code}&pageIndex=1&_={timestamp_ms}'
-            yield scrapy.Request(url=emp_url, callback=self.parse_employee, meta={'company_item': company_item})
-
-            # 查询安全员
-            security_emp_url = f'{self.base_url}/outside/corplistbypostclass?corpcode={corp_code}&pageIndex=1&_={timestamp_ms}'
-            yield scrapy.Request(url=security_emp_url, callback=self.parse_security, meta={'company_item': company_item})
+            self.names.add(company_item['name'], corp_code)
+            yield from self.detail_requests(company_item, response.meta['queue_id'])
         else:
             self.logger.warning(f"No company code found for {company_item['name']}")
+            self.crawler.stats.inc_value('company_queue/not_found')
+            if response.meta.get('queue_id') is not None:
+                self.queue.not_found(response.meta['queue_id'])
+
 
+    def detail_requests(self, company_item, queue_id):
+        """已知代码的公司：详情、注册建造师、安全员三个请求"""
+        corp_code = company_item['corp_code']
+        # 构建详情页URL
+        detail_url = f'{self.base_url}/outside/corpdetail?corpcode={corp_code}'
+        yield scrapy.Request(
+            url=detail_url,
+            callback=self.parse_company_detail,
+            errback=self.company_failed,
+            meta={
+                'company_item': company_item,
+                'queue_id': queue_id,
+            }
+        )
+        # 获取当前毫秒级时间戳
+        timestamp_ms = int(time.time() * 1000)
+        # 查询注册建造师
+        emp_url = f'{self.base_url}/outside/corplistbypersonreg?corpcode={corp_code}&pageIndex=1&_={timestamp_ms}'
+        yield scrapy.Request(url=emp_url, callback=self.parse_employee, meta={'company_item': company_item})
+
+        # 查询安全员
+        security_emp_url = f'{self.base_url}/outside/corplistbypostclass?corpcode={corp_code}&pageIndex=1&_={timestamp_ms}'
+        yield scrapy.Request(url=security_emp_url, callback=self.parse_security, meta={'company_item': company_item})
 
     def parse_company_detail(self, response):
         company_item = response.meta['company_item']
-        company_item['corp'] = response.xpath('//td[contains(text(), "法人姓名")]/following-sibling::td[1]/text()').get()
-        company_item['corp_asset'] = response.xpath('//td[contains(text(), "注册资本")]/following-sibling::td[1]/text()').get()
-        company_item['reg_address'] = response.xpath(
-            '//td[contains(text(), "经营地址")]/following-sibling::td[1]/text()').get()
-        company_item['valid_date'] = response.xpath(
-            '//td[contains(text(), "报送有效期")]/following-sibling::td[1]/text()').get()
-        qualifications_list = response.xpath('//*[@id="file1"]/div/table/tbody/tr/td[3]/text()').getall()
+        page = extract('company.detail', response.selector.root)
+        company_item['corp'] = page['corp']
+        company_item['corp_asset'] = page['corp_asset']
+        company_item['reg_address'] = page['reg_address']
+        company_item['valid_date'] = page['valid_date']
+        qualifications_list = page['qualifications']
         # 只保留包含"承包一级"、"承包贰级"或"承包三级"的条目，并去重
         keywords = {"工程施工", "工程专业", "承包贰级","承包壹级"}
         filtered_qua = list({
             q for q in qualifications_list if any(kw in q for kw in keywords)
         })
         company_item['qualifications'] = filtered_qua
-        others = response.xpath("//*[@class='tooltip-bottom']/text()").get()
-        if others:
-            company_item['others'] = others.strip()
+        if page['others']:
+            company_item['others'] = page['others']
         logging.info(f'公司信息获取完成：{company_item["name"]}')
+        self.crawler.stats.inc_value('company_queue/done')
+        if response.meta.get('queue_id') is not None:
+            self.queue.done(response.meta['queue_id'])
         yield company_item
 
     def parse_employee_perform(self, response):
@@ -131,37 +236,31 @@ class CompanyEmpInfoSpider(scrapy.Spider):
         logging.info(f'获取{employee["name"]}员工,个人业绩')
         #'http://221.13.83.27:8010/outside/_viewpersonperformancedetail/20558'
 
-        project_name = response.xpath('string(//td[contains(text(), "项目名称")]/following-sibling::td[1])').get().strip()
-        record_id = response.xpath('string(//td[contains(text(), "个人业绩记录编号")]/following-sibling::td[1])').get().strip()
-        company_id = response.xpath('string(//td[contains(text(), "企业业绩记录编号")]/following-sibling::td[1])').get().strip()
-
-        id_number = response.xpath('string(//td[contains(text(), "人员证件号码")]/following-sibling::td[1])').get().strip()
-        if id_number:
-            employee['id_number'] = id_number
+        page = extract('company.performance', response.selector.root)
+        if page['id_number']:
+            employee['id_number'] = page['id_number']
             yield employee
-        perform['project_name'] = project_name
-        perform['record_id'] = record_id
-        perform['company_id'] = company_id
+        perform['project_name'] = page['project_name']
+        perform['record_id'] = page['record_id']
+        perform['company_id'] = page['company_id']
 
         yield perform
 
     def parse_employee_detail(self, response):
         employee = response.meta['employee']
         logging.info(f'开始解析注册人员{employee["name"]}详情')
-        birth_date = response.xpath(
-            'string(//td[contains(text(), "出生日期")]/following-sibling::td[1])').get().strip()
-        if birth_date:
-            employee['birth_date'] = birth_date
+        page = extract('company.person_detail', response.selector.root)
+        if page['birth_date']:
+            employee['birth_date'] = page['birth_date']
         yield employee
 
         # 如果业绩栏为空则直接返回员工信息
-        cols = response.xpath('//tbody/tr').extract()
-        if not cols:
+        if not page['rows']:
             logging.info(f'{employee["name"]}业绩为空')
             return
-        detail_urls = response.xpath('//tbody/tr/td[6]/a/@data-details').extract()
-        data_levels = response.xpath('//tbody/tr/td[2]/text()').extract()
-        roles = response.xpath('//tbody/tr/td[5]/text()').extract()
+        detail_urls = page['detail_urls']
+        data_levels = page['data_levels']
+        roles = page['roles']
 
         timestamp_ms = int(time.time() * 1000)
         for role,url,level in zip(roles,detail_urls,data_levels):
@@ -187,7 +286,8 @@ class CompanyEmpInfoSpider(scrapy.Spider):
     def parse_employee(self, response):
         company_item = response.meta['company_item']
         corp_code = company_item['corp_code']
-        person_list = response.xpath('//tbody/tr')
+        page = extract('company.list', response.selector.root)
+        person_list = page['rows']
         if len(person_list) == 0:
             logging.warning(f"{company_item['name']}：无项目经理")
 
@@ -196,19 +296,19 @@ class CompanyEmpInfoSpider(scrapy.Spider):
         for person in person_list:
             employee_item = EmployeeItem()
             employee_item['corp_code'] = corp_code
-            name = person.xpath('./td[2]//a/text()').get()
-            if not name:
+            row = extract('company.employee_row', person)
+            if not row['name']:
                 logging.warning('get name failed')
                 continue
-            employee_item['name'] = name.strip()
-            employee_item['major'] = person.xpath('./td[7]/text()').get().strip().split('、')
+            employee_item['name'] = row['name']
+            employee_item['major'] = row['major'].split('、')
             employee_item['corp_code'] = corp_code
-            employee_item['cert_code'] = person.xpath('./td[3]/text()').get()
-            employee_item['role'] = person.xpath('./td[4]/text()').get()
-            employee_item['valid_date'] = person.xpath('./td[6]/text()').get()
+            employee_item['cert_code'] = row['cert_code']
+            employee_item['role'] = row['role']
+            employee_item['valid_date'] = row['valid_date']
             # 添加公司名称用于个人业绩记录
             employee_item['corp_name'] = company_item['name']
-            url = person.xpath('./td[2]//a/@href').get()
+            url = row['href']
             logging.debug(f'开始分析员工：{employee_item["name"]}')
 
             if url.startswith('/outside/persondetail'):
@@ -222,7 +322,7 @@ class CompanyEmpInfoSpider(scrapy.Spider):
             else:
                 logging.warning(f'员工：{employee_item["name"]}：无个人详情')
                 yield employee_item
-        page_nums = response.xpath('//*[@class="page-item page-num"]//text()').extract()
+        page_nums = page['pages']
         if len(page_nums) == 0:
             logging.info(f"No other pages found for {company_item['name']}")
             return None
@@ -241,18 +341,20 @@ class CompanyEmpInfoSpider(scrapy.Spider):
     def parse_security(self, response):
         company_item = response.meta['company_item']
         corp_code = company_item['corp_code']
-        person_list = response.xpath('//tbody/tr')
+        page = extract('company.list', response.selector.root)
+        person_list = page['rows']
         if len(person_list) == 0:
             logging.info(f"No security employee found for {company_item['name']}")
         for person in person_list:
             employee_item = EmployeeItem()
             employee_item['corp_code'] = corp_code
-            if not person.xpath('./td[2]/text()').get():
+            row = extract('company.security_row', person)
+            if not row['name']:
                 logging.info(f"No security employee found for {company_item['name']}")
                 continue
-            employee_item['name'] = person.xpath('./td[2]/text()').get().strip()
-            employee_item['cert_code'] = person.xpath('./td[5]/text()').get()
-            employee_item['valid_date'] = person.xpath('./td[7]/text()').get()
+            employee_item['name'] = row['name']
+            employee_item['cert_code'] = row['cert_code']
+            employee_item['valid_date'] = row['valid_date']
             if 'B' in employee_item['cert_code']:
                 employee_item['role'] = '安全员B'
             elif 'C' in employee_item['cert_code']:
@@ -261,7 +363,7 @@ class CompanyEmpInfoSpider(scrapy.Spider):
                 continue
 
             yield employee_item
-        page_nums = response.xpath('//*[@class="page-item page-num"]//text()').extract()
+        page_nums = page['pages']
         if len(page_nums) == 0:
             logging.info(f"No other pages found for {company_item['name']}")
             return None
@@ -273,4 +375,7 @@ class CompanyEmpInfoSpider(scrapy.Spider):
             yield scrapy.Request(url=next_url, callback=self.parse_security, meta={'company_item': company_item, 'seen': True})
 
     def closed(self, reason):
-        self.session.close() 
\ No newline at end of file
+        # 写入完成标记并归还未完成的租约，corp_codes 模式没有用到队列
+        if not self.corp_codes:
+            self.queue.close()
+        self.names.close()
\ No newline at end of file
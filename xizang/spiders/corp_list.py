@@ -1,5 +1,6 @@
 import scrapy
 from xizang.items import CompanyItem
+from xizang.utils.extractors import extract
 from datetime import datetime, timedelta
 from scrapy.exceptions import CloseSpider
 import re
@@ -20,7 +21,7 @@ class CompanyListSpider(scrapy.Spider):
         yield scrapy.Request(url=self.start_url, callback=self.parse)
 
     def parse(self, response):
-        node_list = response.xpath('//*[@class="detail_content_right_box_content_ul"]/li')
+        node_list = extract('corp_list.list', response.selector.root)['rows']
         if not node_list:
             return None
         end_date = (datetime.today() - timedelta(days=self.duration)).date()  # 爬虫截止日期
@@ -28,14 +29,13 @@ class CompanyListSpider(scrapy.Spider):
         self.logger.info(f'爬虫截止日期: {end_date}')
         for li in node_list:
             item = CompanyItem()
-            onclick_js = li.xpath('.//p[@onclick]/@onclick').extract_first()
-            url = onclick_js.split("'")[1]  # 分割字符串提取路径
+            row = extract('corp_list.row', li)
+            url = row['onclick'].split("'")[1]  # 分割字符串提取路径
             item['link'] = response.urljoin(url)  # 转换为完整 URL
             # 提取公司名称（第二个 span 的文本）
-            item['name'] = li.xpath('.//span[2]/text()').extract_first()
-            # 提取日期（第二个 p 的文本）
-            item['date'] = li.xpath('./p[2]/text()').extract_first()
-            cur_date = datetime.strptime(item['date'], "%Y-%m-%d").date()  # 4.12
+            item['name'] = row['name']
+            # 提取日期（第二个 p 的文本），只用于判断是否到达截止日期，CompanyItem 中没有该字段
+            cur_date = datetime.strptime(row['date'], "%Y-%m-%d").date()  # 4.12
 
             if cur_date <= end_date:
                 raise CloseSpider(f"搜索日期:[{datetime.today().strftime('%Y-%m-%d')}, {end_date}],搜索结束!")
@@ -45,7 +45,6 @@ class CompanyListSpider(scrapy.Spider):
         page_limit = int(re.search(r'limit: (\d+)', response.text).group(1))
         page_num = count // page_limit + 1
         self.logger.info(f'total items: {count}, page limit: {page_limit}, page number: {page_num}')
-        print(f'total items: {count}, page limit: {page_limit}, page number: {page_num}')
         n = 1
         while n <= page_num:
             n += 1
@@ -55,21 +54,9 @@ class CompanyListSpider(scrapy.Spider):
 
     def parse_detail(self, response):
         item = response.meta['item']
-        content_table = response.xpath('//*[@class="content-text"]/div/div/table')
-
-        item['corp'] = content_table.xpath('./tr[1]/td[2]/text()').extract_first()
-        item['corp_code'] = content_table.xpath('./tr[1]/td[4]/text()').extract_first()
-
-        item['corp_role'] = content_table.xpath('./tr[2]/td[2]/text()').extract_first()
-        item['corp_name'] = content_table.xpath('./tr[2]/td[4]/text()').extract_first()
-
-        item['corp_type'] = content_table.xpath('./tr[3]/td[2]/text()').extract_first()
-        item['corp_asset'] = content_table.xpath('./tr[3]/td[4]/text()').extract_first()
-
-        item['agent_type'] = content_table.xpath('./tr[4]/td[2]/text()').extract_first()
-        item['location'] = content_table.xpath('./tr[4]/td[4]/text()').extract_first()
-
-        item['city'] = content_table.xpath('./tr[5]/td[2]/text()').extract_first()
+        # 企业信息表各格位置见 extractors 中的 corp_list.detail，CompanyItem 没有的字段不填
+        page = extract('corp_list.detail', response.selector.root)
+        item.update({key: value for key, value in page.items() if key in item.fields})
 
         return item
 
@@ -1,10 +1,12 @@
 import scrapy
 import json
+import math
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 
 from xizang.items import BidWinItem,CompanyItem
 from xizang.settings import POSTGRES_URL
+from xizang.utils.usci import is_valid
 
 class NationalBidListSpider(scrapy.Spider):
     """在公共交易中心查公司全国业绩"""
@@ -30,20 +32,29 @@ class NationalBidListSpider(scrapy.Spider):
         companies = self.session.execute(query).fetchall()
         self.logger.info(f"Found {len(companies)} companies to process")
         for row in companies:
-            body = {"uniscid": row[0], "page": 1, "tos": '01'}  # tos 01 代表工程建设
+            if not is_valid(row[0]):
+                # 旧的 9 位组织机构代码或录入错误，只记录，仍然查询
+                self.crawler.stats.inc_value('usci/invalid')
+                self.logger.warning(f"统一社会信用代码校验未通过: {row[0]} {row[1]}")
             company = CompanyItem()
             company['corp_code'] = row[0]
             company['name'] = row[1]
-            yield scrapy.Request(
-                url=self.start_url,
-                method='POST',
-                body=json.dumps(body),  # 关键：用 json.dumps 转成字符串
-                callback=self.parse,
-                meta={'company': company}
-            )
+            yield self.list_request(company, 1)
+
+    def list_request(self, company, page):
+        body = {"uniscid": company['corp_code'], "page": page, "tos": '01'}  # tos 01 代表工程建设
+        self.crawler.stats.inc_value('national_bid_list/pages_planned')
+        return scrapy.Request(
+            url=self.start_url,
+            method='POST',
+            body=json.dumps(body),  # 关键：用 json.dumps 转成字符串
+            callback=self.parse,
+            meta={'company': company, 'page': page}
+        )
 
     def parse(self, response):
         company = response.meta['company']
+        self.crawler.stats.inc_value('national_bid_list/pages_fetched')
         data = json.loads(response.text)
         total = int(data['total'])
         bid_list = data.get("data",[])
@@ -72,19 +83,13 @@ class NationalBidListSpider(scrapy.Spider):
                 meta={'item': item}
             )
 
-        cur_page = data.get("page")
-        rows = data.get("rows")
-        total_page = int(total) // rows + 1
-        while cur_page <= total_page:
-            cur_page += 1
-            body = {"uniscid": company["corp_code"], "page": cur_page, "tos": ''}  # tos 1 代表工程建设
-            yield scrapy.Request(
-                url=self.start_url,
-                method='POST',
-                body=json.dumps(body),  # 关键：用 json.dumps 转成字符串
-                callback=self.parse,
-                meta={'company': company}
-            )
+        # 只在第一页规划分页，其余页一次性发出
+        if response.meta.get('page', 1) != 1:
+            return
+        rows = data.get("rows") or len(bid_list)
+        total_page = math.ceil(total / rows)
+        for page in range(2, total_page + 1):
+            yield self.list_request(company, page)
 
     def parse_detail(self, response):
         res = json.loads(response.text)
@@ -92,6 +97,7 @@ class NationalBidListSpider(scrapy.Spider):
         item = response.meta.get("item")
         if data is None or len(data) == 0:
             yield item
+            return
         item['url'] = data.get("url")
         item['notice_content'] = data.get("content")
         yield item
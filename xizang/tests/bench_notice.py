@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+招标公告解析开销对比：BeautifulSoup(html.parser) + 在 HTML 上跑正则 vs lxml 一次解析 + 在纯文本上跑正则
+
+python xizang/tests/bench_notice.py [公告文件或目录 ...] [-n 轮数]
+
+不带参数时使用 xizang/tests 下的样例公告，也可以传入从 project.notice_content 导出的 .html 文件目录。
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from bs4 import BeautifulSoup
+
+from xizang.items import ProjectItem
+from xizang.utils.util import (analyse_notice, extract_construction_qualification, extract_duration,
+                               extract_funding_source, extract_profession_and_level)
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def legacy_analyse_notice(html_text, project):
+    """旧实现：html.parser 去 script 后在整段 HTML 上匹配"""
+    soup = BeautifulSoup(html_text, "html.parser")
+    for script in soup.find_all("script"):
+        script.decompose()
+    pure_text = str(soup)
+    project['construction_funds'] = extract_funding_source(pure_text)
+    project['project_duration'] = extract_duration(pure_text)
+    project['company_req'] = extract_construction_qualification(pure_text)
+    project['person_req'] = extract_profession_and_level(pure_text)
+    project['notice_content'] = pure_text
+    return project
+
+
+def load_corpus(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith('.html'))
+        else:
+            files.append(path)
+    corpus = []
+    for file in files:
+        with open(file, encoding='utf-8') as f:
+            corpus.append(f.read())
+    return corpus
+
+
+def bench(name, func, corpus, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for html in corpus:
+            func(html, ProjectItem())
+    elapsed = time.perf_counter() - started
+    count = len(corpus) * rounds
+    size = sum(len(html) for html in corpus) * rounds
+    per_notice = elapsed / count * 1e3
+    print(f"{name:<8} {count:>6} notices  {elapsed:8.3f}s  {per_notice:8.2f} ms/notice  "
+          f"{size / elapsed / 1e6:6.2f} MB/s")
+    return per_notice
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('paths', nargs='*')
+    parser.add_argument('-n', '--rounds', type=int, default=20)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.paths or [os.path.join(TESTS_DIR, 'test.html')])
+    print(f"corpus: {len(corpus)} notices, {sum(len(html) for html in corpus) / 1e3:.0f}k chars")
+
+    # 两种实现的抽取结果应一致
+    for html in corpus:
+        old = legacy_analyse_notice(html, ProjectItem())
+        new = analyse_notice(html, ProjectItem())
+        for field in ('construction_funds', 'project_duration', 'company_req', 'person_req'):
+            if old[field] != new[field]:
+                print(f"  {field} differs: {old[field]!r} -> {new[field]!r}")
+
+    legacy = bench('legacy', legacy_analyse_notice, corpus, args.rounds)
+    current = bench('lxml', analyse_notice, corpus, args.rounds)
+    print(f"speedup: {legacy / current:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
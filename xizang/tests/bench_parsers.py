@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+离线解析基准：在 xizang/tests/fixtures 下的样例页面上逐个运行爬虫回调和公告解析，输出耗时、吞吐和内存分配
+
+python xizang/tests/bench_parsers.py [-n 轮数] [-k 名称过滤] [--fields] [--save 结果.json] [--baseline 结果.json]
+
+--fields 额外输出 extractors 中每个预编译字段的累计耗时(计时本身会拉高回调耗时，不要与基准对比)。
+
+--baseline 与之前保存的结果对比，单次耗时或峰值内存超出 --tolerance 比例时以状态码 1 退出，可在部署前检查解析回归。
+除 bid_show.json 中的公告(取自 tests/test.html)外，样例页面都是按爬虫 XPath 手写的合成页面，
+表格整齐、表头统一，只用于发现解析回归和比较改动前后的相对耗时，不代表真实公告上的耗时，见 fixtures/README.md。
+真实页面上的吞吐用 RECORD_ARCHIVE 录制一次爬取，再以 REPLAY_ARCHIVE + BENCHMARK_ENABLED 回放测量。
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from xizang.tests.helpers import CASES, load_fixture, make_response, make_spider, run_case
+from xizang.utils.extractors import time_extractors
+from xizang.utils.timing import TimingTable
+
+
+def bench(case, spider, body, rounds):
+    run_case(case, spider, make_response(case, body))  # 预热
+    elapsed = 0.0
+    outputs = 0
+    for _ in range(rounds):
+        response = make_response(case, body)
+        started = time.perf_counter()
+        outputs += len(run_case(case, spider, response))
+        elapsed += time.perf_counter() - started
+
+    # 单独跑几轮统计内存分配，避免 tracemalloc 的开销计入耗时
+    peak = retained = 0
+    samples = min(rounds, 5)
+    tracemalloc.start()
+    for _ in range(samples):
+        response = make_response(case, body)
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        result = run_case(case, spider, response)
+        current, top = tracemalloc.get_traced_memory()
+        peak = max(peak, top - before)
+        retained += current - before
+        del result
+    tracemalloc.stop()
+
+    return {
+        'calls': rounds,
+        'ms_per_call': elapsed / rounds * 1e3,
+        'calls_per_s': rounds / elapsed,
+        'mb_per_s': len(body) * rounds / elapsed / 1e6,
+        'outputs_per_call': outputs / rounds,
+        'peak_kb': peak / 1024,
+        'retained_kb': retained / samples / 1024,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """返回超出基准的 [(名称, 指标, 基准值, 当前值)]"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for metric in ('ms_per_call', 'peak_kb'):
+            if result[metric] > base[metric] * (1 + tolerance):
+                regressions.append((name, metric, base[metric], result[metric]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--rounds', type=int, default=200)
+    parser.add_argument('-k', '--filter', default='', help='只运行名称包含该字符串的用例')
+    parser.add_argument('--fields', action='store_true', help='统计 extractors 各字段耗时')
+    parser.add_argument('--save', help='把结果保存为 json')
+    parser.add_argument('--baseline', help='与之前保存的结果对比')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args()
+
+    # 回调中的 info/warning 日志会淹没结果
+    logging.disable(logging.WARNING)
+    fields = TimingTable() if args.fields else None
+    time_extractors(fields)
+    spiders = {}
+    results = {}
+    print(f"{'case':<40} {'ms/call':>9} {'calls/s':>9} {'MB/s':>7} {'outputs':>8} {'peak KB':>9} {'kept KB':>8}")
+    for case in CASES:
+        if args.filter not in case.name:
+            continue
+        spider = None
+        if case.spider is not None:
+            spider = spiders.get(case.spider) or spiders.setdefault(case.spider, make_spider(case.spider))
+        result = results[case.name] = bench(case, spider, load_fixture(case.fixture), args.rounds)
+        print(f"{case.name:<40} {result['ms_per_call']:9.3f} {result['calls_per_s']:9.0f} {result['mb_per_s']:7.2f} "
+              f"{result['outputs_per_call']:8.1f} {result['peak_kb']:9.1f} {result['retained_kb']:8.1f}")
+
+    if fields is not None:
+        print()
+        print(fields.summary('Extractor fields'))
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for name, metric, base, current in regressions:
+            print(f"REGRESSION {name} {metric}: {base:.3f} -> {current:.3f}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
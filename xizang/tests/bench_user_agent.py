@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+RandomUserAgent 每个请求的开销对比：每次新建 UserAgent() vs 预生成请求头
+
+python xizang/tests/bench_user_agent.py [请求数]
+"""
+
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from fake_useragent import UserAgent
+from scrapy import Request
+from scrapy.utils.test import get_crawler
+
+from xizang.middlewares import RandomUserAgent
+
+
+def legacy_process_request(request):
+    """旧实现：每个请求都重新加载 UA 数据集并逐个设置请求头"""
+    ua = UserAgent()
+    request.headers['User-Agent'] = ua.random
+    request.headers['Accept'] = 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7'
+    request.headers['Accept-Language'] = 'zh-CN,zh;q=0.9,en;q=0.8'
+    request.headers['Accept-Encoding'] = 'gzip, deflate, br'
+    request.headers['Connection'] = 'keep-alive'
+    request.headers['Upgrade-Insecure-Requests'] = '1'
+    request.headers['Sec-Fetch-Dest'] = 'document'
+    request.headers['Sec-Fetch-Mode'] = 'navigate'
+    request.headers['Sec-Fetch-Site'] = 'none'
+    request.headers['Sec-Fetch-User'] = '?1'
+    if 'ggzy.gov.cn' in request.url:
+        request.headers['Referer'] = 'https://www.ggzy.gov.cn/'
+
+
+def bench(name, func, requests):
+    started = time.perf_counter()
+    for request in requests:
+        func(request)
+    elapsed = time.perf_counter() - started
+    per_request = elapsed / len(requests) * 1e6
+    print(f"{name:<12} {len(requests):>6} requests  {elapsed:8.3f}s  {per_request:10.1f} us/request")
+    return per_request
+
+
+def main(count):
+    urls = ['https://deal.ggzy.gov.cn/ds/deal/dealList_find.jsp', 'http://221.13.83.27:8010/outside/corps']
+    make_requests = lambda n: [Request(urls[i % 2]) for i in range(n)]
+
+    started = time.perf_counter()
+    middleware = RandomUserAgent.from_crawler(get_crawler())
+    print(f"from_crawler: {time.perf_counter() - started:.3f}s, {len(middleware.profiles)} profiles")
+
+    # 旧实现太慢，只取少量样本
+    legacy = bench('legacy', legacy_process_request, make_requests(min(count, 200)))
+    pooled = bench('pooled', lambda r: middleware.process_request(r, None), make_requests(count))
+    middleware.sticky = True
+    bench('sticky', lambda r: middleware.process_request(r, None), make_requests(count))
+    print(f"speedup: {legacy / pooled:.0f}x")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,110 @@
+"""
+解析用例和离线运行爬虫回调的辅助函数，bench_parsers.py 与 test_*.py 共用
+"""
+
+import json
+import os
+from collections import namedtuple
+
+from scrapy.http import HtmlResponse, Request, TextResponse
+from scrapy.utils.test import get_crawler
+
+from xizang.items import BidSectionItem, BidWinItem, CompanyItem, EmployeeItem, PersonPerformanceItem, ProjectItem
+from xizang.settings import POSTGRES_URL
+from xizang.spiders.bid_info import BidInfoSpider
+from xizang.spiders.company_emp_info import CompanyEmpInfoSpider
+from xizang.spiders.national_bid_list import NationalBidListSpider
+from xizang.utils.util import analyse_notice_fields
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(TESTS_DIR, 'fixtures')
+
+PROJECT_TITLE = '噶尔县门士乡农田集中连片整治项目'
+PROJECT_ID = 'E5425000001000123001'
+CORP_CODE = '91540000MA6T1B2C39'
+CORP_NAME = '西藏天路建筑工程有限公司'
+DEAL_URL = 'https://www.ggzy.gov.cn/information'
+CORP_URL = 'http://221.13.83.27:8010/outside'
+
+# spider 为 None 时 callback 是直接处理页面文本的函数
+Case = namedtuple('Case', 'name spider callback fixture url meta')
+
+
+def _employee():
+    return EmployeeItem(name='张建国', corp_code=CORP_CODE, corp_name=CORP_NAME, role='一级注册建造师')
+
+
+CASES = [
+    Case('bid_info.parse', BidInfoSpider, 'parse', 'dealList_find.json',
+         'https://deal.ggzy.gov.cn/ds/deal/dealList_find.jsp?PAGENUMBER=1',
+         lambda: {'page': 1, 'window': ('2025-04-01', '2025-04-07')}),
+    Case('bid_info.parse_stages', BidInfoSpider, 'parse_stages', 'stages.html',
+         f'{DEAL_URL}/html/a/540000/0101/202504/01/005400000001.shtml',
+         lambda: {'project_item': ProjectItem(title=PROJECT_TITLE)}),
+    Case('bid_info.parse_bids', BidInfoSpider, 'parse_bids', 'detail_Table.html',
+         f'{DEAL_URL}/html/b/540000/0102/202504/23/0054a1b2c3d4e5f60718293a4b5c6d7e8f90.shtml',
+         lambda: {'bid_section_item': BidSectionItem(project_id=PROJECT_ID, section_id='001',
+                                                     section_name=PROJECT_TITLE + '001', session_size=2)}),
+    Case('bid_info.parse_bids_headerless', BidInfoSpider, 'parse_bids', 'detail_Table_headerless.html',
+         f'{DEAL_URL}/html/b/540000/0102/202504/23/0054a1b2c3d4e5f60718293a4b5c6d7e8f91.shtml',
+         lambda: {'bid_section_item': BidSectionItem(project_id=PROJECT_ID, section_id='002',
+                                                     section_name=PROJECT_TITLE + '002', session_size=2)}),
+    Case('bid_info.parse_results', BidInfoSpider, 'parse_results', 'candidates.html',
+         f'{DEAL_URL}/html/b/540000/0104/202504/25/0054f0e1d2c3b4a5968778695a4b3c2d1e0f.shtml',
+         lambda: {'project_item': ProjectItem(title=PROJECT_TITLE, project_id=PROJECT_ID)}),
+    Case('bid_info.analyse_notice', None, analyse_notice_fields, '../test.html', None, None),
+    Case('company_emp_info.parse_search_result', CompanyEmpInfoSpider, 'parse_search_result', 'corps.html',
+         f'{CORP_URL}/corps?keywords=%E8%A5%BF%E8%97%8F',
+         lambda: {'company_item': CompanyItem(name=CORP_NAME), 'queue_id': 1}),
+    Case('company_emp_info.parse_company_detail', CompanyEmpInfoSpider, 'parse_company_detail', 'corpdetail.html',
+         f'{CORP_URL}/corpdetail?corpcode={CORP_CODE}',
+         lambda: {'company_item': CompanyItem(name=CORP_NAME, corp_code=CORP_CODE), 'queue_id': 1}),
+    Case('company_emp_info.parse_employee', CompanyEmpInfoSpider, 'parse_employee', 'corplistbypersonreg.html',
+         f'{CORP_URL}/corplistbypersonreg?corpcode={CORP_CODE}&pageIndex=1',
+         lambda: {'company_item': CompanyItem(name=CORP_NAME, corp_code=CORP_CODE)}),
+    Case('company_emp_info.parse_security', CompanyEmpInfoSpider, 'parse_security', 'corplistbypostclass.html',
+         f'{CORP_URL}/corplistbypostclass?corpcode={CORP_CODE}&pageIndex=1',
+         lambda: {'company_item': CompanyItem(name=CORP_NAME, corp_code=CORP_CODE)}),
+    Case('company_emp_info.parse_employee_detail', CompanyEmpInfoSpider, 'parse_employee_detail',
+         'listpersonperformance.html', f'{CORP_URL}/listpersonperformance?personid=20558',
+         lambda: {'employee': _employee()}),
+    Case('company_emp_info.parse_employee_perform', CompanyEmpInfoSpider, 'parse_employee_perform',
+         'personperformancedetail.html', f'{CORP_URL}/_viewpersonperformancedetail/30811',
+         lambda: {'employee': _employee(), 'perform': PersonPerformanceItem(name='张建国')}),
+    Case('national_bid_list.parse', NationalBidListSpider, 'parse', 'bid_list.json',
+         'https://data.ggzy.gov.cn/yjcx/index/bid_list',
+         lambda: {'company': CompanyItem(name=CORP_NAME, corp_code=CORP_CODE), 'page': 1}),
+    Case('national_bid_list.parse_detail', NationalBidListSpider, 'parse_detail', 'bid_show.json',
+         'https://data.ggzy.gov.cn/yjcx/index/bid_show',
+         lambda: {'item': BidWinItem(bidder_name=CORP_NAME, corp_code=CORP_CODE)}),
+    Case('national_bid_list.analyse_notice', None,
+         lambda text: analyse_notice_fields(json.loads(text)['data']['content']), 'bid_show.json', None, None),
+]
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), 'rb') as f:
+        return f.read()
+
+
+def make_spider(spider_cls, **kwargs):
+    """离线创建爬虫：不读增量状态，公告在当前进程解析，数据库连接只创建不使用"""
+    crawler = get_crawler(spider_cls, {'POSTGRES_URL': POSTGRES_URL, 'BID_INFO_INCREMENTAL': False,
+                                       'NOTICE_ANALYSIS_PROCESSES': 0})
+    return spider_cls.from_crawler(crawler, **kwargs)
+
+
+def make_response(case, body):
+    if case.spider is None:
+        return body.decode('utf-8')
+    request = Request(case.url, meta=case.meta())
+    cls = TextResponse if case.fixture.endswith('.json') else HtmlResponse
+    return cls(case.url, body=body, encoding='utf-8', request=request)
+
+
+def run_case(case, spider, response):
+    """运行回调并取出全部结果"""
+    if case.spider is None:
+        return [case.callback(response)]
+    result = getattr(spider, case.callback)(response)
+    return list(result) if result is not None else []
@@ -0,0 +1,88 @@
+import json
+from datetime import datetime
+
+from scrapy.http import HtmlResponse, Request, TextResponse
+from scrapy.utils.test import get_crawler
+
+from xizang.items import ProjectItem
+from xizang.spiders.bid_info import BidInfoSpider
+from xizang.utils.incremental import CrawlState
+
+LIST_URL = 'https://deal.ggzy.gov.cn/ds/deal/dealList_find.jsp?PAGENUMBER=1'
+DETAIL_PAGE = """
+<html><body>
+<p class="p_o"><span>项目编号：{project_id}</span></p>
+<div id="div_0101"><ul><li><a onclick="showDetail(this, '0101', '/html/b/540000/0101/1.shtml')">招标公告</a></li></ul></div>
+<div id="div_0102"><ul><li><a onclick="showDetail(this, '0102', '/html/b/540000/0102/1.shtml')">测试项目</a></li></ul></div>
+<div id="div_0104"><ul><li><a onclick="showDetail(this, '0104', '/html/b/540000/0104/1.shtml')">中标候选人公示</a></li></ul></div>
+</body></html>
+"""
+
+
+def make_spider(stages_by_url=None, stages_by_project=None):
+    crawler = get_crawler(BidInfoSpider, {'BID_INFO_INCREMENTAL': False})
+    spider = BidInfoSpider.from_crawler(crawler)
+    state = CrawlState.__new__(CrawlState)
+    state.stages_by_url = stages_by_url or {}
+    state.stages_by_project = stages_by_project or {}
+    state.watermark = None
+    spider.crawl_state = state
+    return spider
+
+
+def listing(*urls):
+    data = {'data': [{'title': f'项目{i}招标公告', 'timeShow': f'2025-04-0{i + 1}', 'platformName': '',
+                      'classifyShow': '', 'url': url, 'districtShow': ''} for i, url in enumerate(urls)],
+            'currentpage': 1, 'ttlpage': 1}
+    return TextResponse(LIST_URL, body=json.dumps(data).encode(), encoding='utf-8',
+                        request=Request(LIST_URL, meta={'page': 1}))
+
+
+def detail(project_id, stage_url='https://www.ggzy.gov.cn/information/html/a/1.shtml'):
+    item = ProjectItem(title='测试项目', detail_url=stage_url)
+    request = Request(stage_url, meta={'project_item': item})
+    return HtmlResponse(stage_url, body=DETAIL_PAGE.format(project_id=project_id).encode(),
+                        encoding='utf-8', request=request)
+
+
+def callbacks(results):
+    return [r.callback.__name__ for r in results if isinstance(r, Request)]
+
+
+def test_listing_skips_complete_projects_and_tracks_watermark():
+    spider = make_spider(stages_by_url={'https://a/1': 3})
+    results = list(spider.parse(listing('https://a/1', 'https://a/2')))
+    assert [r.url for r in results if r.callback == spider.parse_stages] == ['https://a/2']
+    assert spider.crawler.stats.get_value('bid_info/skipped_complete') == 1
+    assert spider.latest_time_show.day == 2
+
+
+def test_detail_fetches_only_missing_stages():
+    assert callbacks(make_spider().parse_stages(detail('P1'))) == ['parse_notice', 'parse_bids', 'parse_results']
+    spider = make_spider(stages_by_project={'P1': 1})
+    assert callbacks(spider.parse_stages(detail('P1'))) == ['parse_bids', 'parse_results']
+    spider = make_spider(stages_by_project={'P1': 2})
+    assert callbacks(spider.parse_stages(detail('P1'))) == ['parse_results']
+    spider = make_spider(stages_by_project={'P1': 3})
+    assert callbacks(spider.parse_stages(detail('P1'))) == []
+
+
+def test_date_range_split_into_windows():
+    windows = BidInfoSpider.date_windows(datetime(2025, 1, 1), datetime(2025, 1, 20), 7)
+    assert [(b.day, e.day) for b, e in windows] == [(1, 7), (8, 14), (15, 20)]
+    spider = make_spider()
+    spider.start_date, spider.end_date = datetime(2025, 1, 1), datetime(2025, 1, 20)
+    assert [r.meta['window'] for r in spider.start_requests()] == [
+        ('2025-01-01', '2025-01-07'), ('2025-01-08', '2025-01-14'), ('2025-01-15', '2025-01-20')]
+
+
+def test_first_page_fans_out_remaining_pages():
+    spider = make_spider()
+    request = spider.list_request(datetime(2025, 1, 1), datetime(2025, 1, 7), 1)
+    body = json.dumps({'data': [], 'currentpage': 1, 'ttlpage': 4}).encode()
+    pages = [r.meta['page'] for r in spider.parse(TextResponse(request.url, body=body, request=request))]
+    assert pages == [2, 3, 4]
+
+    request = spider.list_request(datetime(2025, 1, 1), datetime(2025, 1, 7), 3)
+    body = json.dumps({'data': [], 'currentpage': 3, 'ttlpage': 4}).encode()
+    assert list(spider.parse(TextResponse(request.url, body=body, request=request))) == []
@@ -0,0 +1,114 @@
+import logging
+
+from sqlalchemy.dialects import postgresql
+
+from xizang.items import BidItem, BidRankItem, ProjectItem
+from xizang.pipelines.bidSaver import BidSaverPipeline
+from xizang.pipelines.deferred import DeferredItemIndex
+from xizang.pipelines.notice_store import notice_hash, pack_notice, unpack_notice
+
+
+class DummySpider:
+    logger = logging.getLogger('dummy')
+
+
+def make_pipeline():
+    # 仅构造缓冲区，不连接数据库
+    pipeline = BidSaverPipeline.__new__(BidSaverPipeline)
+    pipeline.stats = None
+    pipeline.project_cache = set()
+    pipeline.notice_hashes = set()
+    pipeline.deferred = DeferredItemIndex(max_items=100)
+    pipeline.buffer = BidSaverPipeline._create_buffer(batch_size=100, flush_interval=60)
+    return pipeline
+
+
+def make_bid(bidder, amount):
+    bid = BidItem()
+    bid['project_id'] = 'P1'
+    bid['section_id'] = '001'
+    bid['section_name'] = '测试项目001'
+    bid['bidder_name'] = bidder
+    bid['bid_amount'] = amount
+    bid['bid_open_time'] = '2025-04-01 10:00:00'
+    return bid
+
+
+def test_rows_deduplicated_by_conflict_key():
+    pipeline = make_pipeline()
+    pipeline.project_cache.add('P1')
+    spider = DummySpider()
+    pipeline.process_item(make_bid('甲公司', 1.0), spider)
+    pipeline.process_item(make_bid('甲公司', 2.0), spider)
+    pipeline.process_item(make_bid('乙公司', 3.0), spider)
+
+    batches = dict((stream.name, rows) for stream, rows in pipeline.buffer.drain())
+    assert [row['bid_amount'] for row in batches['bid']] == [2.0, 3.0]
+    assert len(batches['bid_section_placeholder']) == 1
+    assert len(pipeline.buffer) == 0
+
+
+def test_flush_order_follows_foreign_keys():
+    pipeline = make_pipeline()
+    spider = DummySpider()
+    rank = BidRankItem(project_id='P1', section_id='001', section_name='测试项目001',
+                       bidder_name='甲公司', rank=1, manager_name='张三', win_amt='12.5')
+    pipeline.process_item(rank, spider)
+    assert 'P1' in pipeline.deferred
+
+    project = ProjectItem(project_id='P1', title='测试项目', timeShow='2025-04-01 10:00:00',
+                          notice_content='<p>公告</p>')
+    pipeline.process_item(project, spider)
+    assert len(pipeline.deferred) == 0
+
+    names = [stream.name for stream, _ in pipeline.buffer.drain()]
+    assert names == ['notice_blob', 'project', 'bid_section_winner', 'bid_rank', 'project_stage']
+
+
+def test_project_rows_keep_only_notice_hash():
+    pipeline = make_pipeline()
+    spider = DummySpider()
+    for project_id in ('P1', 'P2'):
+        pipeline.process_item(ProjectItem(project_id=project_id, title='测试项目', timeShow='2025-04-01 10:00:00',
+                                          notice_content='<p>同一公告</p>'), spider)
+
+    batches = dict((stream.name, rows) for stream, rows in pipeline.buffer.drain())
+    assert len(batches['notice_blob']) == 1
+    assert {row['notice_hash'] for row in batches['project']} == {notice_hash('<p>同一公告</p>')}
+    assert all('notice_content' not in row for row in batches['project'])
+
+    blob = pack_notice('<p>同一公告</p>' * 100)
+    assert len(blob['content']) < blob['size']
+    assert unpack_notice(blob['codec'], blob['content']) == '<p>同一公告</p>' * 100
+
+
+def test_stage_only_moves_forward():
+    pipeline = make_pipeline()
+    pipeline.buffer.add('project_stage', {'project_id': 'P1', 'stage': 3})
+    pipeline.buffer.add('project_stage', {'project_id': 'P1', 'stage': 2})
+    (stream, rows), = pipeline.buffer.drain()
+    assert rows == [{'project_id': 'P1', 'stage': 3}]
+
+
+def test_upsert_statement_uses_named_constraint():
+    pipeline = make_pipeline()
+    sql = str(pipeline.buffer.streams['bid'].statement.compile(dialect=postgresql.dialect()))
+    assert 'ON CONFLICT ON CONSTRAINT uix_project_section_bidder DO UPDATE' in sql
+    sql = str(pipeline.buffer.streams['bid_section_placeholder'].statement.compile(dialect=postgresql.dialect()))
+    assert sql.endswith('ON CONFLICT ON CONSTRAINT uix_project_section DO NOTHING')
+
+
+def test_deferred_items_spill_and_release_by_project(tmp_path):
+    index = DeferredItemIndex(max_items=2, spill_dir=tmp_path)
+    for project_id in ('P1', 'P2', 'P3'):
+        index.add(project_id, make_bid(f'{project_id}公司', 1.0))
+    assert len(index) == 3
+    assert index.spilled_count == 1
+
+    (deferred_at, item), = index.pop('P1')
+    assert isinstance(item, BidItem)
+    assert item['bidder_name'] == 'P1公司'
+    assert index.spilled_count == 0
+    assert len(index.drain()) == 2
+    index.close()
+    assert list(tmp_path.iterdir()) == []
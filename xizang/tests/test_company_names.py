@@ -0,0 +1,62 @@
+from xizang.tests.helpers import make_spider
+from xizang.spiders.company_emp_info import CompanyEmpInfoSpider
+from xizang.utils.company_names import CompanyNameIndex, normalize_company_name
+
+
+def test_normalize_company_name():
+    name = '西藏天路建筑工程有限公司（拉萨分公司）'
+    assert normalize_company_name(name) == '西藏天路建筑工程有限公司(拉萨分公司)'
+    assert normalize_company_name(' 西藏天路建筑工程有限公司 (拉萨分公司)。') == normalize_company_name(name)
+    assert normalize_company_name('中铁【西藏】ｂｕｉｌｄ有限公司') == '中铁(西藏)BUILD有限公司'
+    assert normalize_company_name(None) == ''
+
+
+def test_index_lookup_and_add():
+    index = CompanyNameIndex('postgresql://localhost/xizang')
+    index.names = {normalize_company_name('西藏高原建设集团有限公司'): ('91540000MA6T1B2C39', '西藏高原建设集团有限公司')}
+    assert index.get('西藏高原建设集团 有限公司')[0] == '91540000MA6T1B2C39'
+    assert index.get('西藏新公司') is None
+
+    index.add('西藏高原建设集团有限公司', '91540000MA6T1B2C39')
+    assert index._added == []
+    index.add('西藏新公司；', '91540100MA6T000000')
+    assert index.get('西藏新公司') == ('91540100MA6T000000', '西藏新公司；')
+    assert [row['normalized_name'] for row in index._added] == ['西藏新公司']
+
+
+def test_corp_code_mode(tmp_path):
+    path = tmp_path / 'corps.txt'
+    path.write_text('\n'.join([
+        '# corp_code,name',
+        '91540000MA6T1B2C39,西藏天路建筑工程有限公司',
+        # corp_list -o corps.jsonl 导出的一行
+        '{"link": "https://ggzy.xizang.gov.cn/jyqyxx/1024488.jhtml", "name": "西藏新公司", '
+        '"corp": "赵德胜", "corp_code": "91540100MA6T000000", "corp_name": "西藏新公司"}',
+        '91540000MA6T1B2C39\t西藏天路建筑工程有限公司',
+        ',西藏高原建设集团（有限公司）',
+        ',西藏未知公司',
+    ]), encoding='utf-8')
+    spider = make_spider(CompanyEmpInfoSpider, corp_codes=str(path))
+    spider.names.names = {normalize_company_name('西藏高原建设集团(有限公司)'): ('91540000MA6T0000XX', '西藏高原建设集团')}
+
+    requests = list(spider.corp_code_requests())
+    callbacks = [r.callback.__name__ for r in requests]
+    assert callbacks.count('parse_company_detail') == 3
+    assert callbacks[-1] == 'parse_search_result' and 'keywords=' in requests[-1].url
+    assert requests[0].url.endswith('corpdetail?corpcode=91540000MA6T1B2C39')
+    assert requests[0].meta['queue_id'] is None
+    assert requests[6].meta['company_item']['name'] == '西藏高原建设集团'
+    assert spider.crawler.stats.get_value('company_codes/skipped') == 1
+
+
+def test_corp_code_mode_leaves_queue_alone(tmp_path):
+    class Queue:
+        closed = False
+
+        def close(self):
+            self.closed = True
+
+    spider = make_spider(CompanyEmpInfoSpider, corp_codes=str(tmp_path / 'corps.txt'))
+    spider.queue = Queue()
+    spider.closed('finished')
+    assert not spider.queue.closed
@@ -0,0 +1,39 @@
+from lxml import html
+
+from xizang.utils.extractors import EXTRACTORS, Extractor, Field, extract, time_extractors
+from xizang.utils.timing import TimingTable
+
+PAGE = html.document_fromstring("""
+<table>
+<tr><td>法人姓名</td><td>赵德胜</td></tr>
+<tr><td>出生日期</td><td> <b>1978-09-16</b> </td></tr>
+</table>
+<div id="mycontent"><div><div><div><div></div><div>
+<p>测试项目(1标段)</p><p>公示期</p><p>测试项目(<span>2</span>标段)</p>
+</div></div></div></div></div>
+""")
+
+
+def test_variables_bound_per_field_and_per_call():
+    labels = Extractor(
+        'labels',
+        corp=Field('//td[contains(text(), $label)]/following-sibling::td[1]/text()', label='法人姓名'),
+        birth=Field('string(//td[contains(text(), $label)]/following-sibling::td[1])', strip=True, label='出生日期'),
+        missing=Field('//td[contains(text(), $label)]/text()', label='注册资本'),
+    )
+    assert labels(PAGE) == {'corp': '赵德胜', 'birth': '1978-09-16', 'missing': None}
+    # 调用时传入的变量覆盖默认值，元素按文本返回
+    names = extract('bid_info.candidates', PAGE, keyword='测试项目')['section_names']
+    assert names == ['测试项目(1标段)', '测试项目(2标段)']
+
+
+def test_field_timing():
+    timings = TimingTable()
+    time_extractors(timings)
+    try:
+        extract('company.detail', PAGE)
+    finally:
+        time_extractors(None)
+    assert timings.calls['company.detail.corp'] == 1
+    assert timings.hits['company.detail.qualifications'] == 0
+    assert set(name.split('.')[0] for name in EXTRACTORS) == {'bid_info', 'company', 'corp_list'}
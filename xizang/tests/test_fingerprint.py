@@ -0,0 +1,45 @@
+import json
+
+from scrapy import Request
+from scrapy.http import TextResponse
+from scrapy.utils.test import get_crawler
+
+from xizang.items import CompanyItem
+from xizang.spiders.national_bid_list import NationalBidListSpider
+from xizang.utils.fingerprint import CanonicalJsonRequestFingerprinter
+
+URL = 'https://data.ggzy.gov.cn/yjcx/index/bid_list'
+
+
+def test_json_body_key_order_does_not_change_fingerprint():
+    fingerprinter = CanonicalJsonRequestFingerprinter()
+    a = Request(URL, method='POST', body=json.dumps({"uniscid": "X", "page": 2, "tos": "01"}))
+    b = Request(URL, method='POST', body='{"tos":"01", "page":2, "uniscid":"X"}')
+    c = Request(URL, method='POST', body=json.dumps({"uniscid": "X", "page": 3, "tos": "01"}))
+    assert fingerprinter.fingerprint(a) == fingerprinter.fingerprint(b)
+    assert fingerprinter.fingerprint(a) != fingerprinter.fingerprint(c)
+    # 非 JSON 请求体保持原样
+    assert fingerprinter.fingerprint(Request(URL, method='POST', body='a=1')) != \
+        fingerprinter.fingerprint(Request(URL, method='POST', body='a=2'))
+
+
+def test_pages_planned_once_from_first_page():
+    crawler = get_crawler(NationalBidListSpider)
+    spider = NationalBidListSpider.from_crawler(crawler)
+    company = CompanyItem(corp_code='91540000000000000X', name='测试公司')
+
+    bid = {'id': 1, 'project_name': 'p', 'bid_price': 1, 'create_time': '', 'tos': '01',
+           'area_code': '540000', 'tender_org_name': ''}
+    request = spider.list_request(company, 1)
+    body = json.dumps({'total': 45, 'rows': 10, 'page': 1, 'data': [bid]})
+    results = list(spider.parse(TextResponse(URL, body=body.encode(), request=request)))
+    pages = [json.loads(r.body)['page'] for r in results if r.callback == spider.parse]
+    assert pages == [2, 3, 4, 5]
+    assert all(json.loads(r.body)['tos'] == '01' for r in results if r.callback == spider.parse)
+
+    request = spider.list_request(company, 3)
+    body = json.dumps({'total': 45, 'rows': 10, 'page': 3, 'data': [bid]})
+    results = list(spider.parse(TextResponse(URL, body=body.encode(), request=request)))
+    assert [r for r in results if r.callback == spider.parse] == []
+    assert crawler.stats.get_value('national_bid_list/pages_planned') == 6
+    assert crawler.stats.get_value('national_bid_list/pages_fetched') == 2
@@ -0,0 +1,71 @@
+import time
+
+from scrapy import Request, Spider
+from scrapy.http import HtmlResponse
+from scrapy.utils.test import get_crawler
+
+from xizang.utils.httpcache import SqliteCacheStorage, UrlPatternPolicy
+
+RULES = [
+    (r'[?&]_=\d+', -1),
+    (r'dealList_find\.jsp', 60),
+    (r'/information/', 0),
+]
+DETAIL = 'https://www.ggzy.gov.cn/information/html/a/540000/0101/1.shtml'
+LISTING = 'https://deal.ggzy.gov.cn/ds/deal/dealList_find.jsp?PAGENUMBER=1'
+
+
+def make_storage(tmp_path, **settings):
+    crawler = get_crawler(Spider, {'HTTPCACHE_DIR': str(tmp_path), 'HTTPCACHE_TTL_RULES': RULES, **settings})
+    spider = crawler._create_spider('cache_test')
+    crawler.stats.open_spider(spider)
+    storage = SqliteCacheStorage(crawler.settings)
+    storage.open_spider(spider)
+    return storage, spider, crawler
+
+
+def store(storage, spider, url, body=b'<html>ok</html>'):
+    request = Request(url)
+    storage.store_response(spider, request, HtmlResponse(url, body=body, headers={'X-Test': '1'}))
+    return request
+
+
+def test_policy_follows_ttl_rules(tmp_path):
+    _, _, crawler = make_storage(tmp_path)
+    policy = UrlPatternPolicy(crawler.settings)
+    assert policy.should_cache_request(Request(DETAIL))
+    assert policy.should_cache_request(Request(LISTING))
+    assert not policy.should_cache_request(Request('http://221.13.83.27:8010/outside/corplistbypersonreg?_=1'))
+    assert not policy.should_cache_request(Request('https://example.com/'))
+
+
+def test_cached_response_round_trip_and_expiry(tmp_path):
+    storage, spider, crawler = make_storage(tmp_path)
+    detail = store(storage, spider, DETAIL)
+    listing = store(storage, spider, LISTING)
+
+    response = storage.retrieve_response(spider, detail)
+    assert response.body == b'<html>ok</html>'
+    assert response.headers['X-Test'] == b'1'
+
+    storage.db.execute("UPDATE responses SET expires_at = ? WHERE expires_at IS NOT NULL", (time.time() - 1,))
+    assert storage.retrieve_response(spider, listing) is None
+    assert storage.retrieve_response(spider, detail) is not None  # 永久缓存不受影响
+    assert crawler.stats.get_value('httpcache/expired') == 1
+    storage.close_spider(spider)
+
+
+def test_evicts_least_recently_used(tmp_path):
+    storage, spider, crawler = make_storage(tmp_path, HTTPCACHE_SQLITE_MAX_MB=1)
+    body = b'x' * 300_000
+    first = store(storage, spider, DETAIL + '?1', body)
+    second = store(storage, spider, DETAIL + '?2', body)
+    storage.retrieve_response(spider, first)  # first 最近被访问
+    store(storage, spider, DETAIL + '?3', body)
+    store(storage, spider, DETAIL + '?4', body)
+
+    assert storage.retrieve_response(spider, second) is None
+    assert storage.retrieve_response(spider, first) is not None
+    assert storage.total_bytes <= 1024 * 1024
+    assert crawler.stats.get_value('httpcache/evicted') >= 1
+    storage.close_spider(spider)
@@ -0,0 +1,39 @@
+from xizang.utils.matcher import build_pattern, match_qualifications
+from xizang.utils.util import (analyse_notice_fields, extract_construction_qualification, extract_profession_and_level,
+                               extract_professional_titles)
+
+
+TEXT = "投标人须具备房屋建筑工程施工总承包叁级及以上资质，项目经理须具备建筑工程专业贰级建造师，市政公用专业优先。"
+
+
+def test_single_scan_finds_all_kinds_with_offsets():
+    matches = match_qualifications(TEXT)
+    assert [(m.kind, m.text) for m in matches] == [
+        ('company', '房屋建筑工程施工总承包叁级'),
+        ('title', '建筑工程'),
+        ('constructor', '贰级建造师'),
+        ('title', '市政公用专业'),
+    ]
+    for m in matches:
+        assert TEXT[m.start:m.end] == m.text
+    assert matches[0].category == '房屋建筑工程' and matches[0].level == '叁级'
+    assert matches[2].level == '贰级'
+
+
+def test_extractors_keep_return_format():
+    assert extract_construction_qualification(TEXT) == ['房屋建筑工程施工总承包叁级']
+    assert extract_profession_and_level(TEXT) == '贰级建造师'
+    assert extract_profession_and_level('无人员要求') == ''
+    assert extract_professional_titles(TEXT) == ['建筑工程', '市政公用专业']
+
+
+def test_notice_fields_include_titles():
+    fields = analyse_notice_fields(f'<div><p>{TEXT}</p><p>项目负责人须具备建筑工程专业注册建造师</p></div>')
+    assert fields['person_req'] == '贰级建造师'
+    # 重复出现的岗位只保留一次
+    assert fields['professional_titles'] == ['建筑工程', '市政公用专业']
+
+
+def test_longest_category_wins():
+    pattern = build_pattern(['建筑工程', '房屋建筑工程'], [])
+    assert match_qualifications('房屋建筑工程施工总承包一级', pattern)[0].category == '房屋建筑工程'
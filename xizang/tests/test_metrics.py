@@ -0,0 +1,36 @@
+import socket
+
+from scrapy import Spider
+from scrapy.utils.test import get_crawler
+
+from xizang.extensions import MetricsExporter
+from xizang.utils.metrics import Registry
+
+
+def test_render_prometheus_text():
+    registry = Registry()
+    registry.counter('requests_total', 'Requests', ('spider',)).inc(spider='bid_info')
+    histogram = registry.histogram('latency_seconds', 'Latency', ('domain',), buckets=(0.1, 1))
+    histogram.observe(0.5, domain='a"b')
+    text = registry.render()
+    assert '# TYPE requests_total counter\nrequests_total{spider="bid_info"} 1\n' in text
+    assert 'latency_seconds_bucket{domain="a\\"b",le="0.1"} 0' in text
+    assert 'latency_seconds_bucket{domain="a\\"b",le="1"} 1' in text
+    assert 'latency_seconds_bucket{domain="a\\"b",le="+Inf"} 1' in text
+    assert 'latency_seconds_count{domain="a\\"b"} 1' in text
+
+
+def test_exporter_keeps_crawling_without_free_port():
+    busy = socket.socket()
+    busy.bind(('127.0.0.1', 0))
+    busy.listen()
+    port = busy.getsockname()[1]
+    try:
+        crawler = get_crawler(Spider, {'METRICS_ENABLED': True, 'METRICS_PORT': [port, port]})
+        exporter = MetricsExporter.from_crawler(crawler)
+        spider = crawler._create_spider('company')
+        exporter.spider_opened(spider)
+        assert exporter.port is None
+        assert exporter.spider_closed(spider) is None
+    finally:
+        busy.close()
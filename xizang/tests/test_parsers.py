@@ -0,0 +1,124 @@
+from datetime import date
+
+import pytest
+from scrapy import Request
+from scrapy.exceptions import CloseSpider
+from scrapy.http import HtmlResponse
+
+from xizang.tests.helpers import CASES, load_fixture, make_response, make_spider, run_case
+from xizang.spiders.corp_list import CompanyListSpider
+
+CASES_BY_NAME = {case.name: case for case in CASES}
+
+
+def run(name):
+    case = CASES_BY_NAME[name]
+    spider = make_spider(case.spider) if case.spider else None
+    return run_case(case, spider, make_response(case, load_fixture(case.fixture)))
+
+
+def requests(results):
+    return [r for r in results if isinstance(r, Request)]
+
+
+def items(results, cls_name):
+    return [r for r in results if type(r).__name__ == cls_name]
+
+
+@pytest.mark.parametrize('name', sorted(CASES_BY_NAME))
+def test_fixture_yields_output(name):
+    assert run(name)
+
+
+def test_bid_info_fixtures():
+    listing = requests(run('bid_info.parse'))
+    # 监理项目被跳过，第一页展开第 2、3 页
+    assert len([r for r in listing if r.callback.__name__ == 'parse_stages']) == 9
+    assert [r.meta['page'] for r in listing if r.callback.__name__ == 'parse'] == [2, 3]
+
+    stages = run('bid_info.parse_stages')
+    assert [r.callback.__name__ for r in stages] == ['parse_notice', 'parse_bids', 'parse_bids', 'parse_results']
+    assert stages[0].meta['project_item']['project_id'] == 'E5425000001000123001'
+
+    results = run('bid_info.parse_bids')
+    section = items(results, 'BidSectionItem')[0]
+    assert section['bid_size'] == 6
+    assert section['lot_ctl_amt'] == 3968500.0
+    bids = items(results, 'BidItem')
+    assert len(bids) == 6
+    assert bids[0]['bidder_name'] == '西藏天路建筑工程有限公司'
+    assert bids[0]['bid_amount'] == 3856214.52
+    assert bids[0]['bid_open_time'] == '2025-04-23 10:00'
+
+    ranks = run('bid_info.parse_results')
+    assert [(r['section_id'], r['bidder_name'], r['manager_name']) for r in ranks] == [
+        ('001', '西藏天路建筑工程有限公司', '张建国'), ('002', '西藏高原建设集团有限公司', '李明')]
+    assert ranks[0]['open_time'] == '2025-04-25 09:30'
+
+
+def test_company_emp_info_fixtures():
+    search = run('company_emp_info.parse_search_result')
+    assert [r.callback.__name__ for r in search] == ['parse_company_detail', 'parse_employee', 'parse_security']
+    assert search[0].meta['company_item']['corp_code'] == '91540000MA6T1B2C39'
+
+    company = run('company_emp_info.parse_company_detail')[0]
+    assert company['corp'] == '赵德胜'
+    assert sorted(company['qualifications']) == [
+        '地基基础工程专业承包贰级', '市政公用工程施工总承包贰级', '建筑工程施工总承包贰级', '水利水电工程施工总承包贰级']
+
+    employees = requests(run('company_emp_info.parse_employee'))
+    assert len([r for r in employees if r.callback.__name__ == 'parse_employee_detail']) == 5
+    assert employees[0].meta['employee']['major'] == ['建筑工程', '市政公用工程']
+
+    security = items(run('company_emp_info.parse_security'), 'EmployeeItem')
+    assert [(e['name'], e['role']) for e in security] == [('洛桑', '安全员B'), ('周平', '安全员C'), ('格桑卓玛', '安全员C')]
+
+    detail = run('company_emp_info.parse_employee_detail')
+    assert detail[0]['birth_date'] == '1978-09-16'
+    assert [r.meta['perform']['data_level'] for r in detail[1:]] == ['省级', '省级', '市级']
+
+    employee, perform = run('company_emp_info.parse_employee_perform')
+    assert employee['id_number'] == '540102197809161234'
+    assert perform['record_id'] == 'PP5400002023000187'
+
+
+def test_national_bid_list_fixtures():
+    results = run('national_bid_list.parse')
+    assert len([r for r in results if r.callback.__name__ == 'parse_detail']) == 10
+    assert [r.meta['page'] for r in results if r.callback.__name__ == 'parse'] == [2, 3]
+
+    item = run('national_bid_list.parse_detail')[0]
+    assert item['url'] == 'http://ggzy.xizang.gov.cn/jyxxgcgg/1219973.jhtml'
+    assert item['notice_content'].startswith('<!DOCTYPE html>')
+
+
+def test_bid_info_headerless_bid_table():
+    # 开标记录表没有表头时按位置取投标人、报价
+    case = CASES_BY_NAME['bid_info.parse_bids_headerless']
+    spider = make_spider(case.spider)
+    results = run_case(case, spider, make_response(case, load_fixture(case.fixture)))
+    section = items(results, 'BidSectionItem')[0]
+    assert section['bid_size'] == 6
+    bids = items(results, 'BidItem')
+    assert [b['bidder_name'] for b in bids][:2] == ['西藏天路建筑工程有限公司', '西藏高原建设集团有限公司']
+    assert bids[0]['bid_amount'] == 3856214.52
+    assert spider.crawler.stats.get_value('bid_info/bids_header_miss') == 1
+
+
+def test_corp_list_fixtures():
+    # 截止日期为 2025-04-01：前两行在范围内，第三行触发结束
+    spider = make_spider(CompanyListSpider, duration=(date.today() - date(2025, 4, 1)).days)
+    url = 'https://ggzy.xizang.gov.cn/search/queryContents.jhtml'
+    response = HtmlResponse(url, body=load_fixture('corp_list.html'), encoding='utf-8')
+    results = []
+    with pytest.raises(CloseSpider):
+        for result in spider.parse(response):
+            results.append(result)
+    assert [r.url for r in results] == ['https://ggzy.xizang.gov.cn/jyqyxx/1024501.jhtml',
+                                        'https://ggzy.xizang.gov.cn/jyqyxx/1024488.jhtml']
+    assert results[0].meta['item']['name'] == '西藏天路建筑工程有限公司'
+
+    detail = HtmlResponse(results[0].url, body=load_fixture('corp_list_detail.html'), encoding='utf-8',
+                          request=results[0])
+    item = spider.parse_detail(detail)
+    assert (item['corp_code'], item['name'], item['corp']) == ('91540000MA6T1B2C39', '西藏天路建筑工程有限公司', '赵德胜')
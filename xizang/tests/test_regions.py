@@ -0,0 +1,20 @@
+from xizang.utils.regions import EMPTY, area_name, lookup, lookup_many, province_from_usci, regions_from_usci
+
+
+def test_lookup_prefixes():
+    region = lookup('540102')
+    assert (region.province, region.city) == ('西藏自治区', '拉萨市')
+    assert area_name(region) == '西藏自治区拉萨市'
+    # 直辖市的“市辖区”不重复拼接
+    assert area_name(lookup('1101')) == '北京市'
+    assert lookup('99').province == ''
+    assert lookup('54a1') == lookup(None) == EMPTY
+
+
+def test_usci_regions():
+    assert province_from_usci('91540000MA6T1B2C39') == '西藏自治区'
+    assert province_from_usci('bad') == ''
+    regions = regions_from_usci(['91540000MA6T1B2C39', '91110108MA01ABCD12', '91540000MA6T1B2C39'])
+    assert [r.province for r in regions] == ['西藏自治区', '北京市', '西藏自治区']
+    assert regions[0] is regions[2]
+    assert lookup_many([]) == []
@@ -0,0 +1,58 @@
+import json
+
+import pytest
+from scrapy import Spider
+from scrapy.exceptions import IgnoreRequest
+from scrapy.http import HtmlResponse, JsonRequest, Request, TextResponse
+from scrapy.utils.test import get_crawler
+
+from xizang.middlewares import RecordMiddleware, ReplayMiddleware
+
+
+def test_record_then_replay(tmp_path):
+    archive = str(tmp_path / '{spider}.jsonl.gz')
+    crawler = get_crawler(Spider, {'RECORD_ARCHIVE': archive, 'REPLAY_ARCHIVE': archive, 'REPLAY_LATENCY': 0,
+                                   'REPLAY_IGNORE_PARAMS': ['_']})
+    spider = crawler._create_spider('company')
+
+    recorder = RecordMiddleware.from_crawler(crawler)
+    recorder.spider_opened(spider)
+    page = Request('http://221.13.83.27:8010/outside/corplistbypersonreg?corpcode=1&pageIndex=1&_=1700000000000')
+    api = JsonRequest('https://data.ggzy.gov.cn/yjcx/index/bid_list', data={'uniscid': '1', 'page': 1})
+    recorder.process_response(page, HtmlResponse(page.url, body='<p>张三</p>'.encode(), encoding='utf-8'), spider)
+    recorder.process_response(api, TextResponse(api.url, body=b'{"total": 0}', encoding='utf-8'), spider)
+    recorder.spider_closed(spider)
+
+    replayer = ReplayMiddleware.from_crawler(crawler)
+    replayer.spider_opened(spider)
+    # 时间戳参数不同、JSON 键顺序不同的请求命中同一条录制
+    request = Request(page.url.replace('1700000000000', '1800000000000'))
+    response = replayer.process_request(request, spider)
+    assert isinstance(response, HtmlResponse)
+    assert response.xpath('//p/text()').get() == '张三'
+    assert response.request is request and 'replay' in response.flags
+    assert request.meta['dont_cache']
+
+    request = Request(api.url, method='POST', body=json.dumps({'page': 1, 'uniscid': '1'}))
+    assert json.loads(replayer.process_request(request, spider).text) == {'total': 0}
+
+    with pytest.raises(IgnoreRequest):
+        replayer.process_request(Request('http://221.13.83.27:8010/outside/corps'), spider)
+    assert crawler.stats.get_value('replay/responses') == 2
+    assert crawler.stats.get_value('replay/missing') == 1
+
+
+def test_benchmark_report(tmp_path):
+    from xizang.extensions import CrawlBenchmark
+
+    report = tmp_path / 'bench.jsonl'
+    crawler = get_crawler(Spider, {'BENCHMARK_ENABLED': True, 'BENCHMARK_REPORT': str(report)})
+    spider = crawler._create_spider('company')
+    benchmark = CrawlBenchmark.from_crawler(crawler)
+    benchmark.spider_opened(spider)
+    benchmark.response_received(None, None, spider)
+    benchmark.spider_closed(spider, 'finished')
+
+    result = json.loads(report.read_text(encoding='utf-8'))
+    assert result['responses'] == 1 and result['peak_rss_mb'] > 0
+    assert crawler.stats.get_value('benchmark/peak_rss_mb') == result['peak_rss_mb']
@@ -0,0 +1,33 @@
+from lxml import html
+
+from xizang.utils.table import find_table, parse_tables
+
+PAGE = """
+<table class="detail_Table">
+<tr><th>标段名称</th><td colspan="3">测试项目(1标段)</td></tr>
+<tr><td colspan="4">
+<table>
+<thead><tr><th>投标人名称</th><th>投标报价(元)</th><th>招标控制价(元)</th><th>项目经理</th></tr></thead>
+<tr><td> 甲公司 </td><td>100.5</td><td>120</td><td>张<!-- 注释 -->三</td></tr>
+<tr><td>乙公司</td><td colspan="2">无效</td><td>李四</td></tr>
+</table>
+</td></tr>
+</table>
+"""
+
+
+def test_nested_table_found_by_header():
+    tables = parse_tables(html.document_fromstring(PAGE))
+    assert len(tables) == 1
+    outer = tables[0]
+    assert outer.header == []
+    # 外层单元格文本不含嵌套表格
+    assert outer.rows[1] == ['', '', '', '']
+
+    bids = find_table(tables, '投标人', '控制价')
+    assert bids is outer.tables[0]
+    assert bids.values(bids.column('投标人')) == ['甲公司', '乙公司']
+    assert bids.values(bids.column('控制价')) == ['120', '']
+    assert bids.values(bids.column('项目经理')) == ['张三', '李四']
+    assert bids.column('中标价') is None
+    assert find_table(tables, '中标价') is None
@@ -0,0 +1,38 @@
+from scrapy import Spider
+from scrapy.http import HtmlResponse, Request
+from scrapy.utils.test import get_crawler
+
+from xizang.middlewares import CallbackTimingMiddleware
+
+BODY = b'<table><tr><td>a</td><td>b</td></tr><tr><td>c</td></tr></table>'
+
+
+class TableSpider(Spider):
+    name = 'table'
+
+    def parse_table(self, response):
+        for row in response.xpath('//tr'):
+            yield {'cells': row.xpath('./td/text()').getall()}
+
+
+def test_callback_and_xpath_timing():
+    crawler = get_crawler(TableSpider, {'CALLBACK_TIMING_ENABLED': True, 'CALLBACK_TIMING_XPATH': True})
+    spider = crawler._create_spider()
+    crawler.stats.open_spider(spider)
+    mw = CallbackTimingMiddleware.from_crawler(crawler)
+    request = Request('http://example.com', callback=spider.parse_table)
+    response = HtmlResponse(request.url, body=BODY, request=request)
+
+    mw.process_spider_input(response, spider)
+    items = list(mw.process_spider_output(response, spider.parse_table(response), spider))
+    mw.spider_closed(spider)
+
+    assert items == [{'cells': ['a', 'b']}, {'cells': ['c']}]
+    stats = crawler.stats.get_stats()
+    assert stats['callback_timing/parse_table/calls'] == 1
+    assert stats['callback_timing/parse_table/seconds'] > 0
+    assert stats['xpath_timing///tr/calls'] == 1
+    assert stats['xpath_timing///tr/hits'] == 2
+    # 子节点上的相对表达式同样被记录
+    assert stats['xpath_timing/./td/text()/calls'] == 2
+    assert stats['xpath_timing/./td/text()/hits'] == 3
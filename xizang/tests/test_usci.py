@@ -0,0 +1,28 @@
+from xizang.utils.usci import check_digit, decode, decode_many, is_valid
+
+
+def test_check_digit():
+    assert check_digit('91350100M000100Y4') == '3'
+    assert check_digit('91540000MA6T1B2C3') == '9'
+    # I、O 等不在字符集中
+    assert check_digit('9135010OM000100Y4') is None
+
+
+def test_is_valid():
+    assert is_valid(' 91350100m000100y43 ')
+    assert not is_valid('91350100M000100Y44')
+    assert not is_valid('91350100M000100Y4')
+    assert not is_valid(None)
+
+
+def test_decode_many():
+    codes = ['91540000MA6T1B2C39', '52540102MJY123456C', '52540102MJY1234560', 'bad', None]
+    valid, org, typo, bad, empty = decode_many(codes)
+    assert valid == decode('91540000MA6T1B2C39')
+    assert (valid.valid, valid.province, valid.entity_type) == (True, '西藏自治区', '企业')
+    assert (org.province, org.city, org.entity_type) == ('西藏自治区', '拉萨市', '民办非企业单位')
+    assert (org.valid, org.check) == (True, 'C')
+    # 校验码写错时仍能解析出登记地
+    assert (typo.valid, typo.check, typo.city) == (False, 'C', '拉萨市')
+    assert bad.valid is False and bad.check is None and bad.entity_type == ''
+    assert empty.code == '' and not empty.valid
@@ -0,0 +1,14 @@
+from xizang.utils.util import clean_notice
+
+
+def test_clean_notice_strips_scripts_and_splits_blocks():
+    html, text = clean_notice('<div><p>工期：120日历天</p><script>var a = 1;</script><p>二、资格要求</p></div>')
+    assert 'script' not in html
+    assert [line.strip() for line in text.splitlines() if line.strip()] == ['工期：120日历天', '二、资格要求']
+
+
+def test_clean_notice_empty_documents():
+    assert clean_notice('') == ('', '')
+    assert clean_notice('  ') == ('', '')
+    # 只有注释时 lxml 报 Document is empty
+    assert clean_notice('<!-- x -->') == ('', '')
@@ -0,0 +1,221 @@
+import logging
+import weakref
+from collections import deque
+from functools import partial
+
+from selenium import webdriver
+from twisted.internet import defer, threads
+from twisted.python.threadpool import ThreadPool
+
+from xizang.utils.metrics import REGISTRY
+from xizang.utils.render import BLOCKED_RESOURCE_PATTERNS
+
+logger = logging.getLogger(__name__)
+
+RENDER_SECONDS = REGISTRY.histogram('xizang_selenium_render_seconds', 'Time spent rendering pages', ('browser',))
+BROWSERS_BUSY = REGISTRY.gauge('xizang_selenium_busy', 'Browsers currently rendering', ('browser',))
+
+
+def create_driver(browser='firefox', lean=False, blocked_urls=()):
+    """创建无头浏览器
+
+    lean 为 True 时不加载图片、字体和样式表，DOM 就绪即返回(pageLoadStrategy=eager)；
+    blocked_urls 为额外屏蔽的 URL 通配符(如第三方统计脚本)，仅 Chrome 支持。
+    """
+    if browser == 'chrome':
+        options = webdriver.ChromeOptions()
+        options.add_argument('--headless')  # 无头模式
+        if lean:
+            options.page_load_strategy = 'eager'
+            options.add_argument('--blink-settings=imagesEnabled=false')
+            options.add_experimental_option('prefs', {
+                'profile.managed_default_content_settings.images': 2,
+                'profile.managed_default_content_settings.stylesheets': 2,
+            })
+        driver = webdriver.Chrome(options=options)
+        patterns = (BLOCKED_RESOURCE_PATTERNS if lean else []) + list(blocked_urls)
+        if patterns:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+        return driver
+    options = webdriver.FirefoxOptions()
+    options.add_argument('--headless')  # 无头模式
+    if lean:
+        options.page_load_strategy = 'eager'
+        options.set_preference('permissions.default.image', 2)
+        options.set_preference('permissions.default.stylesheet', 2)
+        options.set_preference('browser.display.use_document_fonts', 0)
+        options.set_preference('gfx.downloadable_fonts.enabled', False)
+        options.set_preference('media.autoplay.default', 5)
+    return webdriver.Firefox(options=options)
+
+
+class PooledBrowser:
+    """池中的一个浏览器槽位，driver 在首次使用时才启动"""
+
+    def __init__(self, index):
+        self.index = index
+        self.driver = None
+        self.pages = 0
+
+
+class BrowserPool:
+    """整个爬取过程共享的无头浏览器池
+
+    run(render, ...) 借出一个浏览器，在线程池中执行阻塞的 WebDriver 调用，
+    完成后归还。浏览器渲染满 max_pages 个页面或崩溃后会被回收，下次使用时重新启动。
+    """
+
+    _pools = weakref.WeakKeyDictionary()
+
+    def __init__(self, factory, size=2, max_pages=50, name='browser'):
+        self.factory = factory
+        self.size = size
+        self.max_pages = max_pages
+        self.name = name
+        self._idle = [PooledBrowser(i) for i in range(size)]
+        self._waiters = deque()
+        self._threadpool = ThreadPool(minthreads=size, maxthreads=size, name=f'{name}-pool')
+        self._shutdown_trigger = None
+        self._closed = False
+        self._drained = None
+
+    @classmethod
+    def from_crawler(cls, crawler, browser='firefox'):
+        """同一次爬取中，同种浏览器的中间件共用一个池"""
+        pools = cls._pools.setdefault(crawler, {})
+        if browser not in pools:
+            settings = crawler.settings
+            factory = partial(
+                create_driver, browser,
+                lean=settings.getbool('SELENIUM_LEAN_PROFILE', False),
+                blocked_urls=settings.getlist('SELENIUM_BLOCKED_URLS'),
+            )
+            pools[browser] = cls(
+                factory,
+                size=crawler.settings.getint('SELENIUM_POOL_SIZE', 2),
+                max_pages=crawler.settings.getint('SELENIUM_MAX_PAGES_PER_BROWSER', 50),
+                name=browser,
+            )
+        return pools[browser]
+
+    def run(self, render, *args, **kwargs):
+        """在借出的浏览器上执行 render(driver, *args, **kwargs)，返回其结果的 Deferred"""
+        if self._closed:
+            return defer.fail(RuntimeError(f"Browser pool {self.name} is closed"))
+        self._start()
+        d = self._checkout()
+        d.addCallback(self._run_in_thread, render, args, kwargs)
+        return d
+
+    def close(self):
+        """退出所有浏览器并停止线程池，可重复调用"""
+        if self._closed:
+            return defer.succeed(None)
+        self._closed = True
+        while self._waiters:
+            self._waiters.popleft().errback(RuntimeError(f"Browser pool {self.name} is closed"))
+        if not self._threadpool.started:
+            return defer.succeed(None)
+        # 等借出的浏览器全部归还后再退出
+        if len(self._idle) < self.size:
+            self._drained = defer.Deferred()
+            d = self._drained
+        else:
+            d = defer.succeed(None)
+        d.addCallback(self._quit_idle)
+        d.addBoth(self._stop_threadpool)
+        return d
+
+    def _quit_idle(self, _):
+        from twisted.internet import reactor
+
+        return threads.deferToThreadPool(reactor, self._threadpool, self._quit_all, list(self._idle))
+
+    def _start(self):
+        if self._threadpool.started:
+            return
+        from twisted.internet import reactor
+
+        self._threadpool.start()
+        self._shutdown_trigger = reactor.addSystemEventTrigger('during', 'shutdown', self._threadpool.stop)
+
+    def _checkout(self):
+        if self._idle:
+            browser = self._idle.pop()
+            BROWSERS_BUSY.set(self.size - len(self._idle), browser=self.name)
+            return defer.succeed(browser)
+        d = defer.Deferred()
+        self._waiters.append(d)
+        return d
+
+    def _checkin(self, browser):
+        if self._waiters:
+            self._waiters.popleft().callback(browser)
+            return
+        self._idle.append(browser)
+        BROWSERS_BUSY.set(self.size - len(self._idle), browser=self.name)
+        if self._drained is not None and len(self._idle) == self.size:
+            d, self._drained = self._drained, None
+            d.callback(None)
+
+    def _run_in_thread(self, browser, render, args, kwargs):
+        from twisted.internet import reactor
+
+        d = threads.deferToThreadPool(reactor, self._threadpool, self._render, browser, render, args, kwargs)
+
+        def checkin(result):
+            self._checkin(browser)
+            return result
+
+        d.addBoth(checkin)
+        return d
+
+    def _render(self, browser, render, args, kwargs):
+        if browser.driver is None:
+            logger.info(f"Starting {self.name} #{browser.index}")
+            browser.driver = self.factory()
+            browser.pages = 0
+        try:
+            with RENDER_SECONDS.time(browser=self.name):
+                return render(browser.driver, *args, **kwargs)
+        except Exception:
+            if not self._is_alive(browser.driver):
+                logger.warning(f"{self.name} #{browser.index} crashed, recycling")
+                self._quit(browser)
+            raise
+        finally:
+            browser.pages += 1
+            if browser.driver is not None and browser.pages >= self.max_pages:
+                logger.info(f"{self.name} #{browser.index} rendered {browser.pages} pages, recycling")
+                self._quit(browser)
+
+    @staticmethod
+    def _is_alive(driver):
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def _quit(self, browser):
+        try:
+            browser.driver.quit()
+        except Exception as e:
+            logger.warning(f"Error quitting {self.name} #{browser.index}: {e}")
+        browser.driver = None
+
+    def _quit_all(self, browsers):
+        for browser in browsers:
+            if browser.driver is not None:
+                self._quit(browser)
+
+    def _stop_threadpool(self, result):
+        from twisted.internet import reactor
+
+        if self._shutdown_trigger is not None:
+            reactor.removeSystemEventTrigger(self._shutdown_trigger)
+            self._shutdown_trigger = None
+        self._threadpool.stop()
+        logger.info(f"Browser pool {self.name} closed")
+        return result
@@ -0,0 +1,93 @@
+import logging
+import re
+import unicodedata
+
+from sqlalchemy import create_engine, text
+
+from xizang.models.models import upgrade_schema
+
+logger = logging.getLogger(__name__)
+
+# NFKC 之后仍需统一的括号
+_BRACKETS = str.maketrans({'【': '(', '】': ')', '[': '(', ']': ')', '〔': '(', '〕': ')', '｛': '(', '｝': ')'})
+_SPACES = re.compile(r'\s+')
+_EDGE_PUNCTUATION = '.,;:、。，；：\'"“”‘’'
+
+
+def normalize_company_name(name):
+    """公司名称比较用的规范形式
+
+    全角转半角(含（）)，括号统一为 ()，去掉全部空白和首尾标点，英文字母大写。
+    """
+    name = unicodedata.normalize('NFKC', name or '').translate(_BRACKETS)
+    return _SPACES.sub('', name).strip(_EDGE_PUNCTUATION).upper()
+
+
+# company_info 中尚未进入索引的公司，已有的规范名称保持不变
+SEED_SQL = text("""
+    INSERT INTO company_name_index (normalized_name, corp_code, name, updated_at)
+    VALUES (:normalized_name, :corp_code, :name, now())
+    ON CONFLICT (normalized_name) DO NOTHING
+""")
+
+# 搜索得到的代码以最新一次为准
+UPSERT_SQL = text("""
+    INSERT INTO company_name_index (normalized_name, corp_code, name, updated_at)
+    VALUES (:normalized_name, :corp_code, :name, now())
+    ON CONFLICT (normalized_name) DO UPDATE SET corp_code = excluded.corp_code, updated_at = now()
+""")
+
+
+class CompanyNameIndex:
+    """company_name_index 的内存副本
+
+    load 时先用 company_info 补齐索引再整表读入，之后查询只走内存；
+    add 的新名称攒批写回，flush 时写入数据库。
+    """
+
+    def __init__(self, db_url):
+        self.engine = create_engine(db_url)
+        self.names = {}  # 规范名称 -> (corp_code, 公司名称)
+        self._added = []
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(settings.get('POSTGRES_URL'))
+
+    def load(self):
+        upgrade_schema(self.engine)
+        with self.engine.begin() as conn:
+            indexed = set(conn.execute(text("SELECT normalized_name FROM company_name_index")).scalars())
+            missing = {}
+            for corp_code, name in conn.execute(text("SELECT corp_code, name FROM company_info")):
+                key = normalize_company_name(name)
+                if key and key not in indexed:
+                    missing.setdefault(key, {'normalized_name': key, 'corp_code': corp_code, 'name': name})
+            if missing:
+                conn.execute(SEED_SQL, list(missing.values()))
+            rows = conn.execute(text("SELECT normalized_name, corp_code, name FROM company_name_index")).all()
+        self.names = {row.normalized_name: (row.corp_code, row.name) for row in rows}
+        logger.info(f"Company name index loaded: {len(self.names)} names, {len(missing)} added from company_info")
+        return len(self.names)
+
+    def get(self, name):
+        """已知公司返回 (corp_code, 公司名称)，否则为 None"""
+        return self.names.get(normalize_company_name(name))
+
+    def add(self, name, corp_code):
+        key = normalize_company_name(name)
+        if not key or self.names.get(key, (None,))[0] == corp_code:
+            return
+        self.names[key] = (corp_code, name)
+        self._added.append({'normalized_name': key, 'corp_code': corp_code, 'name': name})
+
+    def flush(self):
+        if not self._added:
+            return
+        added, self._added = self._added, []
+        with self.engine.begin() as conn:
+            conn.execute(UPSERT_SQL, added)
+
+    def close(self):
+        self.flush()
+        self.engine.dispose()
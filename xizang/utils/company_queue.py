@@ -0,0 +1,155 @@
+import logging
+import os
+import socket
+from datetime import timedelta
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from xizang.models.models import upgrade_schema
+
+logger = logging.getLogger(__name__)
+
+# 把 bid 中新增的投标人(多个公司以分号分隔)加入队列，已查到的公司不再入队
+FILL_SQL = text("""
+    INSERT INTO company_crawl_queue (name, status, attempts, created_at, updated_at)
+    SELECT DISTINCT btrim(company.name), 'pending', 0, now(), now()
+    FROM bid, regexp_split_to_table(bid.bidder_name, ';') AS company(name)
+    WHERE bid.id > :after AND bid.id <= :upto
+      AND btrim(company.name) != ''
+      AND NOT EXISTS (SELECT 1 FROM company_info WHERE company_info.name = btrim(company.name))
+    ON CONFLICT (name) DO NOTHING
+""")
+
+# 领取待处理或租约已过期的公司，被其它进程锁住的行直接跳过；租约时间以数据库时钟为准
+CLAIM_SQL = text("""
+    UPDATE company_crawl_queue
+    SET status = 'leased', leased_by = :worker, lease_until = now() + make_interval(secs => :lease_seconds),
+        attempts = attempts + 1, updated_at = now()
+    WHERE id IN (
+        SELECT id FROM company_crawl_queue
+        WHERE (status = 'pending' OR (status = 'leased' AND lease_until < now()))
+          AND attempts < :max_attempts
+        ORDER BY id
+        LIMIT :limit
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, name
+""")
+
+# 重试次数用完且租约已过期的公司标记为失败
+EXPIRE_SQL = text("""
+    UPDATE company_crawl_queue SET status = 'failed', updated_at = now()
+    WHERE status = 'leased' AND lease_until < now() AND attempts >= :max_attempts
+""")
+
+FINISH_SQL = text("""
+    UPDATE company_crawl_queue SET status = :status, last_error = :error, lease_until = NULL, updated_at = now()
+    WHERE id = :id AND leased_by = :worker
+""")
+
+# 失败后放回队列，重试次数用完则标记为失败
+RETRY_SQL = text("""
+    UPDATE company_crawl_queue
+    SET status = CASE WHEN attempts >= :max_attempts THEN 'failed' ELSE 'pending' END,
+        last_error = :error, lease_until = NULL, updated_at = now()
+    WHERE id = :id AND leased_by = :worker
+""")
+
+# 进程退出时归还未完成的租约
+RELEASE_SQL = text("""
+    UPDATE company_crawl_queue SET status = 'pending', lease_until = NULL, updated_at = now()
+    WHERE status = 'leased' AND leased_by = :worker
+""")
+
+
+class CompanyQueue:
+    """company_crawl_queue 的领取与完成标记
+
+    每个进程以 主机名:pid 作为租约持有者，领取后 lease_minutes 内未完成的公司
+    会被其它进程重新领取，领取 max_attempts 次仍未完成则标记为失败。
+    """
+
+    WATERMARK = 'company_crawl_queue'
+
+    def __init__(self, db_url, lease_minutes=30, max_attempts=3, worker=None):
+        self.engine = create_engine(db_url)
+        self.Session = sessionmaker(bind=self.engine)
+        self.lease = timedelta(minutes=lease_minutes)
+        self.max_attempts = max_attempts
+        self.worker = worker or f'{socket.gethostname()}:{os.getpid()}'
+        self._finished = []  # 待写入的完成标记 (sql, params)
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(
+            settings.get('POSTGRES_URL'),
+            lease_minutes=settings.getint('COMPANY_QUEUE_LEASE_MINUTES', 30),
+            max_attempts=settings.getint('COMPANY_QUEUE_MAX_ATTEMPTS', 3),
+        )
+
+    def fill(self):
+        """按 bid.id 水位把新增投标人加入队列，返回新入队数量"""
+        upgrade_schema(self.engine)
+        with self.Session() as session:
+            # 锁住水位行，多个进程同时启动时只有一个执行入队
+            session.execute(text(
+                "INSERT INTO crawl_watermark (name, position, updated_at) VALUES (:name, 0, now()) "
+                "ON CONFLICT (name) DO NOTHING"
+            ), {'name': self.WATERMARK})
+            after = session.execute(text(
+                "SELECT COALESCE(position, 0) FROM crawl_watermark WHERE name = :name FOR UPDATE"
+            ), {'name': self.WATERMARK}).scalar()
+            upto = session.execute(text("SELECT COALESCE(MAX(id), 0) FROM bid")).scalar()
+            added = 0
+            if upto > after:
+                added = session.execute(FILL_SQL, {'after': after, 'upto': upto}).rowcount
+                session.execute(text(
+                    "UPDATE crawl_watermark SET position = :upto, updated_at = now() WHERE name = :name"
+                ), {'upto': upto, 'name': self.WATERMARK})
+            session.commit()
+        logger.info(f"Company queue filled from bid {after}..{upto}: {added} new companies")
+        return added
+
+    def claim(self, limit):
+        """领取最多 limit 个公司，返回 [(id, name), ...]"""
+        self.flush()
+        with self.Session() as session:
+            session.execute(EXPIRE_SQL, {'max_attempts': self.max_attempts})
+            rows = session.execute(CLAIM_SQL, {
+                'worker': self.worker,
+                'lease_seconds': self.lease.total_seconds(),
+                'max_attempts': self.max_attempts,
+                'limit': limit,
+            }).all()
+            session.commit()
+        return [(row.id, row.name) for row in rows]
+
+    def done(self, queue_id):
+        self._finish(FINISH_SQL, queue_id, status='done', error=None)
+
+    def not_found(self, queue_id):
+        self._finish(FINISH_SQL, queue_id, status='not_found', error=None)
+
+    def retry(self, queue_id, error):
+        self._finish(RETRY_SQL, queue_id, error=str(error)[:500], max_attempts=self.max_attempts)
+
+    def _finish(self, sql, queue_id, **params):
+        self._finished.append((sql, {'id': queue_id, 'worker': self.worker, **params}))
+
+    def flush(self):
+        """完成标记攒批写入，领取下一批或关闭时调用"""
+        if not self._finished:
+            return
+        finished, self._finished = self._finished, []
+        with self.Session() as session:
+            for sql, params in finished:
+                session.execute(sql, params)
+            session.commit()
+
+    def close(self):
+        self.flush()
+        with self.Session() as session:
+            session.execute(RELEASE_SQL, {'worker': self.worker})
+            session.commit()
+        self.engine.dispose()
@@ -0,0 +1,190 @@
+import time
+
+from lxml import etree
+
+# 提取器名 -> Extractor，页面结构变化时只需修改这里
+EXTRACTORS = {}
+
+# 非 None 时记录每个字段的耗时和命中数，见 CallbackTimingMiddleware
+_timings = None
+
+
+def time_extractors(timings):
+    """开启(传入 TimingTable)或关闭(传入 None)字段耗时统计"""
+    global _timings
+    _timings = timings
+
+
+class Field:
+    """预编译的 XPath 字段
+
+    first 为 True 时取第一个结果(没有为 None)，否则返回列表；text 为 True 时元素结果转为其文本；
+    strip 去掉字符串首尾空白。variables 绑定 XPath 中的 $变量，调用时传入的同名变量优先。
+    """
+
+    def __init__(self, xpath, first=True, text=False, strip=False, **variables):
+        self.source = xpath
+        self.xpath = etree.XPath(xpath, smart_strings=False)
+        self.first = first
+        self.text = text
+        self.strip = strip
+        self.variables = variables
+
+    def _value(self, value):
+        if self.text and isinstance(value, etree._Element):
+            value = ''.join(value.itertext())
+        if self.strip and isinstance(value, str):
+            value = value.strip()
+        return value
+
+    def __call__(self, root, variables):
+        result = self.xpath(root, **{**self.variables, **variables})
+        if not isinstance(result, list):
+            # string()、count() 等返回单个值
+            return self._value(result)
+        if self.first:
+            return self._value(result[0]) if result else None
+        return [self._value(value) for value in result]
+
+
+class Extractor:
+    """一组命名字段，对页面或行元素一次调用返回 {字段名: 值}"""
+
+    def __init__(self, name, /, **fields):
+        self.name = name
+        self.fields = {key: field if isinstance(field, Field) else Field(field) for key, field in fields.items()}
+
+    def __call__(self, root, **variables):
+        if _timings is None:
+            return {key: field(root, variables) for key, field in self.fields.items()}
+        values = {}
+        for key, field in self.fields.items():
+            started = time.perf_counter()
+            value = values[key] = field(root, variables)
+            hits = len(value) if isinstance(value, list) else int(value is not None)
+            _timings.add(f'{self.name}.{key}', time.perf_counter() - started, hits)
+        return values
+
+
+def register(name, /, **fields):
+    extractor = EXTRACTORS[name] = Extractor(name, **fields)
+    return extractor
+
+
+def extract(name, root, **variables):
+    return EXTRACTORS[name](root, **variables)
+
+
+# 左侧为字段名、右侧为值的表格，$label 为字段名
+LABELLED = '//td[contains(text(), $label)]/following-sibling::td[1]'
+
+
+def labelled(label, **kwargs):
+    return Field(f'{LABELLED}/text()', label=label, **kwargs)
+
+
+def labelled_string(label):
+    return Field(f'string({LABELLED})', strip=True, label=label)
+
+
+# bid_info：全国公共资源交易平台
+register(
+    'bid_info.stages',
+    project_no=Field('//*[@class="p_o"]/span[1]/text()'),
+    notice=Field('//*[@id="div_0101"]/ul/li/a/@onclick'),
+    sections=Field('//*[@id="div_0102"]/ul/li/a/@onclick', first=False),
+    section_names=Field('//*[@id="div_0102"]/ul/li/a/text()', first=False),
+    results=Field('//*[@id="div_0104"]/ul/li/a/@onclick', first=False),
+)
+register(
+    'bid_info.bid_record',
+    open_time=Field('//*[@class="p_o"]/span[1]/text()'),
+    info_source=Field('//*[@id="platformName"]/text()'),
+    # 表头中找不到投标人列时按位置取：第 4 行中的表格
+    bid_table=Field('//*[@class="detail_Table"]/tr[4]/td/table'),
+)
+register(
+    'bid_info.candidates',
+    title=Field('//*[@class="h4_o"]/text()'),
+    content=Field('//*[@id="mycontent"]'),
+    # 各标段名称段落，$keyword 为项目名称前几个字
+    section_names=Field('//*[@id="mycontent"]/div/div/div/div[2]/p[contains(text(), $keyword)]', first=False,
+                        text=True, keyword=''),
+    publish_time=Field('//*[@class="p_o"]/span[contains(text(), "发布时间")]/text()', strip=True),
+)
+
+# company_emp_info：西藏建筑市场监管平台 221.13.83.27
+register(
+    'company.search',
+    corp_code=Field('//*[@id="tab1"]/div[2]/div[1]/div[2]/table/tbody/tr/td[4]/text()'),
+)
+register(
+    'company.detail',
+    corp=labelled('法人姓名'),
+    corp_asset=labelled('注册资本'),
+    reg_address=labelled('经营地址'),
+    valid_date=labelled('报送有效期'),
+    qualifications=Field('//*[@id="file1"]/div/table/tbody/tr/td[3]/text()', first=False),
+    others=Field("//*[@class='tooltip-bottom']/text()", strip=True),
+)
+register(
+    'company.list',
+    rows=Field('//tbody/tr', first=False),
+    pages=Field('//*[@class="page-item page-num"]//text()', first=False),
+)
+register(
+    'company.employee_row',
+    name=Field('./td[2]//a/text()', strip=True),
+    href=Field('./td[2]//a/@href'),
+    cert_code=Field('./td[3]/text()'),
+    role=Field('./td[4]/text()'),
+    valid_date=Field('./td[6]/text()'),
+    major=Field('./td[7]/text()', strip=True),
+)
+register(
+    'company.security_row',
+    name=Field('./td[2]/text()', strip=True),
+    cert_code=Field('./td[5]/text()'),
+    valid_date=Field('./td[7]/text()'),
+)
+register(
+    'company.person_detail',
+    birth_date=labelled_string('出生日期'),
+    rows=Field('//tbody/tr', first=False),
+    detail_urls=Field('//tbody/tr/td[6]/a/@data-details', first=False),
+    data_levels=Field('//tbody/tr/td[2]/text()', first=False),
+    roles=Field('//tbody/tr/td[5]/text()', first=False),
+)
+register(
+    'company.performance',
+    project_name=labelled_string('项目名称'),
+    record_id=labelled_string('个人业绩记录编号'),
+    company_id=labelled_string('企业业绩记录编号'),
+    id_number=labelled_string('人员证件号码'),
+)
+
+# corp_list：西藏公共资源交易中心企业公示
+register(
+    'corp_list.list',
+    rows=Field('//*[@class="detail_content_right_box_content_ul"]/li', first=False),
+)
+register(
+    'corp_list.row',
+    onclick=Field('.//p[@onclick]/@onclick'),
+    name=Field('.//span[2]/text()'),
+    date=Field('./p[2]/text()'),
+)
+# 企业信息表第 $row 行第 $col 列
+CORP_CELL = '//*[@class="content-text"]/div/div/table/tr[$row]/td[$col]/text()'
+register(
+    'corp_list.detail',
+    corp=Field(CORP_CELL, row=1, col=2),
+    corp_code=Field(CORP_CELL, row=1, col=4),
+    corp_role=Field(CORP_CELL, row=2, col=2),
+    corp_name=Field(CORP_CELL, row=2, col=4),
+    corp_type=Field(CORP_CELL, row=3, col=2),
+    corp_asset=Field(CORP_CELL, row=3, col=4),
+    agent_type=Field(CORP_CELL, row=4, col=2),
+    location=Field(CORP_CELL, row=4, col=4),
+    city=Field(CORP_CELL, row=5, col=2),
+)
@@ -0,0 +1,39 @@
+import json
+from weakref import WeakKeyDictionary
+
+from scrapy.utils.request import fingerprint
+
+
+def canonical_json(body):
+    """JSON 请求体规范化为键有序、无多余空白的形式，不是 JSON 时返回 None"""
+    if not body or body[:1] not in (b'{', b'['):
+        return None
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return None
+    return json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+class CanonicalJsonRequestFingerprinter:
+    """请求指纹：JSON 请求体先规范化，键顺序、空白不同的相同 POST 请求视为重复
+
+    其余部分与 Scrapy 默认指纹一致(规范化 URL、方法、请求体)。
+    """
+
+    def __init__(self, crawler=None):
+        self._cache = WeakKeyDictionary()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler)
+
+    def fingerprint(self, request):
+        if request not in self._cache:
+            body = canonical_json(request.body)
+            if body is not None and body != request.body:
+                request_to_hash = request.replace(body=body)
+            else:
+                request_to_hash = request
+            self._cache[request] = fingerprint(request_to_hash)
+        return self._cache[request]
@@ -0,0 +1,130 @@
+import logging
+import pickle
+import re
+import sqlite3
+import time
+from pathlib import Path
+
+from scrapy.extensions.httpcache import DummyPolicy
+from scrapy.http import Headers
+from scrapy.responsetypes import responsetypes
+from scrapy.utils.project import data_path
+
+logger = logging.getLogger(__name__)
+
+
+class TtlRules:
+    """按 URL 正则决定缓存时长(秒)：0 永久，负数不缓存，按顺序取第一条匹配的规则"""
+
+    def __init__(self, rules, default=-1):
+        self.rules = [(re.compile(pattern), int(ttl)) for pattern, ttl in rules]
+        self.default = default
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(settings.getlist('HTTPCACHE_TTL_RULES'), settings.getint('HTTPCACHE_DEFAULT_TTL', -1))
+
+    def ttl(self, url):
+        for pattern, ttl in self.rules:
+            if pattern.search(url):
+                return ttl
+        return self.default
+
+
+class UrlPatternPolicy(DummyPolicy):
+    """只缓存 HTTPCACHE_TTL_RULES 允许缓存的请求，过期由 SqliteCacheStorage 判断"""
+
+    def __init__(self, settings):
+        super().__init__(settings)
+        self.rules = TtlRules.from_settings(settings)
+
+    def should_cache_request(self, request):
+        return super().should_cache_request(request) and self.rules.ttl(request.url) >= 0
+
+
+class SqliteCacheStorage:
+    """HttpCacheMiddleware 的 SQLite 存储，每个爬虫一个文件
+
+    写入时按 TTL 规则记录过期时间；文件超过 HTTPCACHE_SQLITE_MAX_MB 时按最近访问时间淘汰。
+    """
+
+    def __init__(self, settings):
+        self.cachedir = data_path(settings['HTTPCACHE_DIR'], createdir=True)
+        self.rules = TtlRules.from_settings(settings)
+        self.max_bytes = settings.getint('HTTPCACHE_SQLITE_MAX_MB', 2048) * 1024 * 1024
+        self.db = None
+        self.stats = None
+        self.total_bytes = 0
+
+    def open_spider(self, spider):
+        path = Path(self.cachedir, f"{spider.name}.sqlite")
+        self.db = sqlite3.connect(str(path), isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, url TEXT, status INTEGER, headers BLOB, body BLOB, "
+            "size INTEGER, stored_at REAL, expires_at REAL, accessed_at REAL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS ix_responses_accessed ON responses (accessed_at)")
+        self.total_bytes = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        self.stats = spider.crawler.stats
+        self._fingerprinter = spider.crawler.request_fingerprinter
+        logger.debug(f"Using SQLite cache storage in {path} ({self.total_bytes / 1e6:.1f} MB)")
+
+    def close_spider(self, spider):
+        self.db.close()
+
+    def retrieve_response(self, spider, request):
+        key = self._fingerprinter.fingerprint(request).hex()
+        row = self.db.execute(
+            "SELECT url, status, headers, body, expires_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        url, status, headers, body, expires_at = row
+        now = time.time()
+        if expires_at is not None and expires_at < now:
+            self.stats.inc_value('httpcache/expired', spider=spider)
+            return None
+        self.db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        headers = Headers(pickle.loads(headers))  # nosec
+        respcls = responsetypes.from_args(headers=headers, url=url, body=body)
+        return respcls(url=url, headers=headers, status=status, body=body)
+
+    def store_response(self, spider, request, response):
+        key = self._fingerprinter.fingerprint(request).hex()
+        now = time.time()
+        ttl = self.rules.ttl(request.url)
+        headers = pickle.dumps(dict(response.headers), protocol=4)
+        size = len(response.body) + len(headers)
+        old = self.db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+        self.db.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, response.url, response.status, headers, response.body, size, now,
+             now + ttl if ttl > 0 else None, now),
+        )
+        self.total_bytes += size - (old[0] if old else 0)
+        if self.total_bytes > self.max_bytes:
+            self._evict(spider)
+
+    def _evict(self, spider):
+        """淘汰过期和最久未访问的响应，直到占用降到上限的 90%"""
+        now = time.time()
+        excess = self.total_bytes - self.max_bytes * 0.9
+        keys = []
+        rows = self.db.execute(
+            "SELECT key, size FROM responses ORDER BY expires_at IS NULL OR expires_at >= ?, accessed_at", (now,)
+        )
+        for key, size in rows:
+            if excess <= 0:
+                break
+            keys.append((key,))
+            excess -= size
+            self.total_bytes -= size
+        rows.close()
+        self.db.execute("BEGIN")
+        self.db.executemany("DELETE FROM responses WHERE key = ?", keys)
+        self.db.execute("COMMIT")
+        self.stats.inc_value('httpcache/evicted', len(keys), spider=spider)
+        logger.info(f"HTTP cache evicted {len(keys)} responses, {self.total_bytes / 1e6:.1f} MB left")
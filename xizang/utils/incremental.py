@@ -0,0 +1,64 @@
+from datetime import datetime
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import sessionmaker
+
+from xizang.models.models import CrawlWatermark, Project, upgrade_schema
+
+
+def parse_time_show(value):
+    """交易列表中的发布时间，格式不对时返回 None"""
+    for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(value, fmt)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+class CrawlState:
+    """增量爬取状态：已入库项目的阶段和上次爬到的水位"""
+
+    def __init__(self, db_url, name):
+        self.name = name
+        self.engine = create_engine(db_url)
+        self.Session = sessionmaker(bind=self.engine)
+        # 详情页地址 -> 阶段，project_id -> 阶段
+        self.stages_by_url = {}
+        self.stages_by_project = {}
+        self.watermark = None
+
+    def load(self):
+        upgrade_schema(self.engine)
+        with self.Session() as session:
+            rows = session.execute(select(Project.project_id, Project.detail_url, Project.stage))
+            for project_id, detail_url, stage in rows:
+                stage = stage or 1
+                self.stages_by_project[project_id] = stage
+                if detail_url:
+                    self.stages_by_url[detail_url] = stage
+            self.watermark = session.scalar(select(CrawlWatermark.watermark).where(CrawlWatermark.name == self.name))
+        return self
+
+    def stage(self, detail_url=None, project_id=None):
+        """已入库项目的阶段，未入库为 0"""
+        return max(self.stages_by_url.get(detail_url, 0), self.stages_by_project.get(project_id, 0))
+
+    def save_watermark(self, watermark):
+        """水位只前进不后退"""
+        stmt = pg_insert(CrawlWatermark.__table__).values(
+            name=self.name, watermark=watermark, updated_at=datetime.now())
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['name'],
+            set_={'watermark': stmt.excluded.watermark, 'updated_at': stmt.excluded.updated_at},
+            where=(CrawlWatermark.__table__.c.watermark.is_(None)
+                   | (CrawlWatermark.__table__.c.watermark < stmt.excluded.watermark)),
+        )
+        with self.Session() as session:
+            session.execute(stmt)
+            session.commit()
+        self.watermark = max(filter(None, [self.watermark, watermark]))
+
+    def close(self):
+        self.engine.dispose()
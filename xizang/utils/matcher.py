@@ -0,0 +1,47 @@
+import re
+from collections import namedtuple
+
+from xizang.constants import company_qualifications, professional_titles
+
+# kind: company 企业资质 / constructor 注册建造师 / title 注册岗位
+# category: 资质类别或岗位名称；level: 等级，如"叁级"
+QualificationMatch = namedtuple('QualificationMatch', 'kind text start end category level')
+
+LEVEL_CHARS = '一二三四五六七八九十壹贰叁肆伍陆柒捌玖拾特'
+
+
+def _alternation(words):
+    # 长词优先，避免"建筑工程"抢先匹配"房屋建筑工程"这类前缀
+    return '|'.join(re.escape(word) for word in sorted(set(words), key=len, reverse=True))
+
+
+def build_pattern(categories, titles):
+    """把全部资质类别和岗位编译成一个正则，一次扫描即可找出所有类型"""
+    # "建造师"由 constructor 分支负责，从岗位中去掉
+    titles = [title for title in titles if title != '建造师']
+    branches = [rf"(?P<constructor>(?P<constructor_level>[一二三壹贰叁]级)?建造师)"]
+    if categories:
+        branches.insert(0, rf"(?P<company>(?P<company_category>{_alternation(categories)})"
+                           rf"施工总承包(?P<company_level>[{LEVEL_CHARS}]+级))")
+    if titles:
+        branches.append(rf"(?P<title>{_alternation(titles)})")
+    return re.compile('|'.join(branches))
+
+
+QUALIFICATION_PATTERN = build_pattern(company_qualifications, professional_titles)
+
+
+def match_qualifications(text, pattern=QUALIFICATION_PATTERN):
+    """在公告文本中找出企业资质、注册建造师和注册岗位，返回带位置的匹配结果"""
+    matches = []
+    for m in pattern.finditer(text):
+        # 外层分组最后闭合，lastgroup 即为 company / constructor / title
+        kind = m.lastgroup
+        if kind == 'company':
+            category, level = m.group('company_category'), m.group('company_level')
+        elif kind == 'constructor':
+            category, level = '建造师', m.group('constructor_level') or ''
+        else:
+            category, level = m.group('title'), ''
+        matches.append(QualificationMatch(kind, m.group(0), m.start(), m.end(), category, level))
+    return matches
@@ -0,0 +1,85 @@
+import logging
+import multiprocessing
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+
+from scrapy import signals
+from twisted.internet import defer, threads
+
+from xizang.utils.util import analyse_notice_fields
+
+logger = logging.getLogger(__name__)
+
+
+class NoticeAnalyzer:
+    """招标公告解析器
+
+    processes 为 0 时在 reactor 线程内直接解析；大于 0 时把 lxml 解析和正则匹配
+    提交到进程池，解析结果以 Deferred 返回，reactor 可以继续处理其它响应。
+    """
+
+    _analyzers = weakref.WeakKeyDictionary()
+
+    def __init__(self, processes=0, stats=None):
+        self.processes = processes
+        self.stats = stats
+        self._executor = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """同一次爬取共用一个进程池，爬虫关闭时退出"""
+        if crawler not in cls._analyzers:
+            processes = crawler.settings.getint('NOTICE_ANALYSIS_PROCESSES', 0)
+            if processes < 0:
+                processes = os.cpu_count() or 1
+            analyzer = cls(processes, stats=crawler.stats)
+            crawler.signals.connect(analyzer.close, signal=signals.spider_closed)
+            cls._analyzers[crawler] = analyzer
+        return cls._analyzers[crawler]
+
+    def analyse(self, html_text, project):
+        """解析公告并把字段写入 project，返回触发 project 的 Deferred"""
+        if not self.processes:
+            project.update(analyse_notice_fields(html_text))
+            return defer.succeed(project)
+        if self._executor is None:
+            logger.info(f"Starting notice analysis pool with {self.processes} processes")
+            # 此时写库线程、浏览器池线程已在运行，fork 多线程进程不安全，用 forkserver 启动子进程
+            self._executor = ProcessPoolExecutor(max_workers=self.processes,
+                                                 mp_context=multiprocessing.get_context('forkserver'))
+        if self.stats:
+            self.stats.inc_value('notice_analysis/offloaded')
+        d = self._from_future(self._executor.submit(analyse_notice_fields, html_text))
+        d.addCallback(self._fill, project)
+        return d
+
+    def close(self):
+        """在线程中等待进程池退出，不阻塞 reactor"""
+        if self._executor is None:
+            return defer.succeed(None)
+        executor, self._executor = self._executor, None
+        return threads.deferToThread(executor.shutdown, wait=True, cancel_futures=True)
+
+    @staticmethod
+    def _fill(fields, project):
+        project.update(fields)
+        return project
+
+    @staticmethod
+    def _from_future(future):
+        """concurrent.futures.Future -> Deferred，结果回到 reactor 线程触发"""
+        from twisted.internet import reactor
+
+        d = defer.Deferred()
+
+        def done(f):
+            if f.cancelled():
+                reactor.callFromThread(d.cancel)
+            elif f.exception() is not None:
+                reactor.callFromThread(d.errback, f.exception())
+            else:
+                reactor.callFromThread(d.callback, f.result())
+
+        future.add_done_callback(done)
+        return d
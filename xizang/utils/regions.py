@@ -0,0 +1,98 @@
+import json
+import logging
+import os
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+CITIES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cities.json')
+
+# 省级行政区划代码
+PROVINCES = {
+    "11": "北京市", "12": "天津市", "13": "河北省", "14": "山西省", "15": "内蒙古自治区",
+    "21": "辽宁省", "22": "吉林省", "23": "黑龙江省", "31": "上海市", "32": "江苏省",
+    "33": "浙江省", "34": "安徽省", "35": "福建省", "36": "江西省", "37": "山东省",
+    "41": "河南省", "42": "湖北省", "43": "湖南省", "44": "广东省", "45": "广西壮族自治区",
+    "46": "海南省", "50": "重庆市", "51": "四川省", "52": "贵州省", "53": "云南省",
+    "54": "西藏自治区", "61": "陕西省", "62": "甘肃省", "63": "青海省", "64": "宁夏回族自治区",
+    "65": "新疆维吾尔自治区", "71": "台湾省", "81": "香港特别行政区", "82": "澳门特别行政区",
+}
+
+Region = namedtuple('Region', 'code province city county')
+EMPTY = Region('', '', '', '')
+
+
+def load_areas(path=CITIES_PATH):
+    """行政区划代码 -> 名称，按代码长度区分省(2)、市(4)、县(6)
+
+    cities.json 目前只有地市级，补充 6 位区县代码后无需改动即可查到区县名称。
+    """
+    areas = dict(PROVINCES)
+    with open(path, encoding='utf-8') as f:
+        for area in json.load(f):
+            areas[area['code']] = area['name']
+    return areas
+
+
+AREAS = load_areas()
+
+
+def lookup(code):
+    """按 2、4、6 位前缀查省、市、县名称，查不到的部分为空字符串"""
+    code = (code or '').strip()[:6]
+    if len(code) < 2 or not code.isdigit():
+        return EMPTY
+    return Region(
+        code,
+        AREAS.get(code[:2], ''),
+        AREAS.get(code[:4], '') if len(code) >= 4 else '',
+        AREAS.get(code[:6], '') if len(code) == 6 else '',
+    )
+
+
+def lookup_many(codes):
+    """批量查询，重复代码只查一次，返回与输入等长的 Region 列表"""
+    cache = {}
+    regions = []
+    for code in codes:
+        region = cache.get(code)
+        if region is None:
+            region = cache[code] = lookup(code)
+        regions.append(region)
+    return regions
+
+
+def city_name(code):
+    """地市名称，直辖市为“市辖区”等原名"""
+    return lookup(code).city
+
+
+def area_name(region):
+    """省市县名称拼接，省与市同名(直辖市)或缺失时略去"""
+    parts = [region.province]
+    if region.city and region.city not in ('市辖区', '县', region.province):
+        parts.append(region.city)
+    if region.county:
+        parts.append(region.county)
+    return ''.join(parts)
+
+
+def usci_area_code(usci):
+    """统一社会信用代码第 3-8 位为登记管理机关的行政区划代码"""
+    usci = (usci or '').strip().upper()
+    if len(usci) != 18:
+        return ''
+    return usci[2:8]
+
+
+def province_from_usci(usci):
+    """统一社会信用代码的注册地省级名称，无法解析时为空字符串"""
+    region = lookup(usci_area_code(usci))
+    if not region.province:
+        logger.debug(f"无法从统一社会信用代码解析省份: {usci!r}")
+    return region.province
+
+
+def regions_from_usci(codes):
+    """批量解析统一社会信用代码的注册地"""
+    return lookup_many([usci_area_code(code) for code in codes])
@@ -0,0 +1,71 @@
+import time
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+# 精简渲染模式下屏蔽的资源，仅 Chrome 通过 CDP 生效
+BLOCKED_RESOURCE_PATTERNS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.svg', '*.ico', '*.webp',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.css',
+]
+
+_RESOURCE_COUNT_JS = (
+    "return [document.readyState, "
+    "window.performance ? performance.getEntriesByType('resource').length : 0];"
+)
+
+
+class network_idle:
+    """页面加载完成且 idle_time 秒内没有新的资源请求"""
+
+    def __init__(self, idle_time=0.5):
+        self.idle_time = idle_time
+        self._count = None
+        self._since = None
+
+    def __call__(self, driver):
+        state, count = driver.execute_script(_RESOURCE_COUNT_JS)
+        now = time.monotonic()
+        if state != 'complete' or count != self._count:
+            self._count = count
+            self._since = now
+            return False
+        return now - self._since >= self.idle_time
+
+
+def document_ready(driver):
+    return driver.execute_script("return document.readyState") == 'complete'
+
+
+def ready_condition(wait):
+    """把请求 meta 中声明的就绪条件转换为 WebDriverWait 可用的条件
+
+    wait 可以是 {'xpath': ...}、{'css': ...}、'network_idle' / {'network_idle': 秒数}，
+    为空时等待 document.readyState 为 complete。
+    """
+    if not wait:
+        return document_ready
+    if wait == 'network_idle':
+        return network_idle()
+    if 'xpath' in wait:
+        return EC.presence_of_element_located((By.XPATH, wait['xpath']))
+    if 'css' in wait:
+        return EC.presence_of_element_located((By.CSS_SELECTOR, wait['css']))
+    if 'network_idle' in wait:
+        idle_time = wait['network_idle']
+        return network_idle(0.5 if idle_time is True else idle_time)
+    raise ValueError(f"Unknown render wait condition: {wait}")
+
+
+def wait_until_ready(driver, wait=None, timeout=10, logger=None):
+    """等待页面就绪，超时后按当前页面内容继续而不是报错"""
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.1).until(ready_condition(wait))
+        return True
+    except TimeoutException:
+        if logger:
+            logger.warning(f"Page not ready after {timeout}s ({wait or 'document ready'}): {driver.current_url}")
+        return False
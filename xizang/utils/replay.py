@@ -0,0 +1,101 @@
+import base64
+import gzip
+import hashlib
+import json
+import os
+import time
+
+from scrapy.http import Headers
+from scrapy.utils.misc import load_object
+from w3lib.url import canonicalize_url, url_query_cleaner
+
+from xizang.utils.fingerprint import canonical_json
+
+
+def replay_key(request, ignore_params=()):
+    """回放时匹配请求的键：去掉时间戳、随机数等易变参数，JSON 请求体规范化"""
+    url = request.url
+    if ignore_params:
+        url = url_query_cleaner(url, ignore_params, remove=True, keep_fragments=True)
+    body = canonical_json(request.body) or request.body
+    digest = hashlib.sha1(request.method.encode())
+    digest.update(canonicalize_url(url).encode())
+    digest.update(body)
+    return digest.hexdigest()
+
+
+def archive_path(path, spider):
+    path = path.format(spider=spider.name)
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+class ArchiveWriter:
+    """把响应逐行写入 gzip 压缩的 JSON lines 存档"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = gzip.open(path, 'wt', encoding='utf-8')
+        self.count = 0
+
+    def write(self, key, request, response):
+        record = {
+            'key': key,
+            'method': request.method,
+            'url': request.url,
+            'status': response.status,
+            'cls': f'{type(response).__module__}.{type(response).__name__}',
+            'response_url': response.url,
+            'headers': {k.decode('latin1'): [v.decode('latin1') for v in vs] for k, vs in response.headers.items()},
+            'body': base64.b64encode(response.body).decode('ascii'),
+            'encoding': getattr(response, 'encoding', None),
+            'latency': request.meta.get('download_latency'),
+            'time': time.time(),
+        }
+        self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.count += 1
+        return len(response.body)
+
+    def close(self):
+        self.file.close()
+
+
+class Archive:
+    """读入存档，同一请求录到多个响应(如 dont_filter 的重复请求)时按录制顺序依次返回，用完后重复最后一个"""
+
+    def __init__(self, path):
+        self.path = path
+        self.records = {}
+        self._served = {}
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                record = json.loads(line)
+                self.records.setdefault(record['key'], []).append(record)
+
+    def __len__(self):
+        return sum(len(records) for records in self.records.values())
+
+    def next_record(self, key):
+        records = self.records.get(key)
+        if not records:
+            return None
+        index = self._served.get(key, 0)
+        self._served[key] = index + 1
+        return records[min(index, len(records) - 1)]
+
+    @staticmethod
+    def build_response(record, request):
+        cls = load_object(record['cls'])
+        headers = Headers({k.encode('latin1'): [v.encode('latin1') for v in vs]
+                           for k, vs in record['headers'].items()})
+        kwargs = {'encoding': record['encoding']} if record.get('encoding') else {}
+        return cls(
+            url=record['response_url'],
+            status=record['status'],
+            headers=headers,
+            body=base64.b64decode(record['body']),
+            request=request,
+            flags=['replay'],
+            **kwargs,
+        )
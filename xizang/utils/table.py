@@ -0,0 +1,116 @@
+from lxml import etree
+
+# 表格的直属行，不含嵌套表格中的行
+_ROWS = etree.XPath('./tr | ./thead/tr | ./tbody/tr | ./tfoot/tr')
+_CELLS = etree.XPath('./td | ./th')
+_TOP_TABLES = etree.XPath('.//table[not(ancestor::table)]')
+
+
+def cell_text(element):
+    """元素文本，跳过嵌套表格，空白合并为一个空格"""
+    parts = [element.text or '']
+    for child in element:
+        # 注释等节点的 tag 不是字符串
+        if isinstance(child.tag, str) and child.tag != 'table':
+            parts.append(cell_text(child))
+        parts.append(child.tail or '')
+    return ' '.join(''.join(parts).split())
+
+
+def _expand(cells):
+    """按 colspan 展开，使单元格下标与表头对齐"""
+    values = []
+    for cell in cells:
+        values.append(cell_text(cell))
+        try:
+            span = int(cell.get('colspan', 1))
+        except ValueError:
+            span = 1
+        values.extend([''] * (span - 1))
+    return values
+
+
+class Table:
+    """一次遍历解析出的表格：表头、按行的单元格文本和单元格中嵌套的表格
+
+    表头取 thead 中或全部由 th 组成的第一行，没有时为空，所有行都是数据行。
+    """
+
+    def __init__(self, element):
+        self.element = element
+        self.header = []
+        self.rows = []
+        self.tables = []
+        for tr in _ROWS(element):
+            cells = _CELLS(tr)
+            if not cells:
+                continue
+            for cell in cells:
+                # 只取直接嵌在本表单元格中的表格，更深的由嵌套表格自己解析
+                self.tables.extend(Table(table) for table in cell.iterdescendants('table')
+                                   if _parent_table(table) is element)
+            is_header = tr.getparent().tag == 'thead' or all(cell.tag == 'th' for cell in cells)
+            if is_header and not self.header and not self.rows:
+                self.header = _expand(cells)
+            else:
+                self.rows.append(_expand(cells))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def column(self, *keywords, default=None):
+        """第一个包含任一关键字的表头下标"""
+        for i, name in enumerate(self.header):
+            if any(keyword in name for keyword in keywords):
+                return i
+        return default
+
+    def has_columns(self, *keywords):
+        return all(self.column(keyword) is not None for keyword in keywords)
+
+    def values(self, index):
+        """某列的全部值，行中缺少该列时为 None"""
+        return [row[index] if index is not None and index < len(row) else None for row in self.rows]
+
+    def row(self, *keywords):
+        """第一个单元格包含任一关键字的行，用于左侧为字段名的表格"""
+        for row in self.rows:
+            if row and any(keyword in row[0] for keyword in keywords):
+                return row
+        return None
+
+    def walk(self):
+        """自身及全部嵌套表格"""
+        yield self
+        for table in self.tables:
+            yield from table.walk()
+
+    def find(self, *keywords):
+        """表头包含全部关键字的第一个表格(含嵌套表格)"""
+        for table in self.walk():
+            if table.has_columns(*keywords):
+                return table
+        return None
+
+
+def _parent_table(element):
+    parent = element.getparent()
+    while parent is not None and parent.tag != 'table':
+        parent = parent.getparent()
+    return parent
+
+
+def parse_tables(root):
+    """解析 root 下全部最外层表格，嵌套表格挂在所在表格的 tables 中"""
+    return [Table(element) for element in _TOP_TABLES(root)]
+
+
+def find_table(tables, *keywords):
+    for table in tables:
+        found = table.find(*keywords)
+        if found is not None:
+            return found
+    return None
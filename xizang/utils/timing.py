@@ -0,0 +1,51 @@
+import time
+
+from scrapy.selector import Selector
+
+
+class TimingTable:
+    """按名称累计调用次数和耗时"""
+
+    def __init__(self):
+        self.calls = {}
+        self.seconds = {}
+        self.hits = {}
+
+    def add(self, name, seconds, hits=0):
+        self.calls[name] = self.calls.get(name, 0) + 1
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+        self.hits[name] = self.hits.get(name, 0) + hits
+
+    def top(self, limit=None):
+        """按累计耗时从高到低，返回 [(name, calls, seconds, hits), ...]"""
+        names = sorted(self.seconds, key=self.seconds.get, reverse=True)
+        if limit:
+            names = names[:limit]
+        return [(name, self.calls[name], self.seconds[name], self.hits[name]) for name in names]
+
+    def summary(self, title, limit=None):
+        lines = [f'{title}:', f'{"seconds":>10} {"calls":>8} {"avg ms":>9} {"hits":>8}  name']
+        for name, calls, seconds, hits in self.top(limit):
+            lines.append(f'{seconds:10.3f} {calls:8d} {seconds / calls * 1000:9.3f} {hits:8d}  {name}')
+        return '\n'.join(lines)
+
+
+class TimedSelector(Selector):
+    """记录每个 XPath 表达式累计耗时和命中节点数的 Selector
+
+    子节点由 self.__class__ 创建，统计会传递到链式调用；css() 转换成 XPath 后同样被记录。
+    使用 bind() 生成绑定了统计表的子类。
+    """
+
+    timings = None
+
+    @classmethod
+    def bind(cls, timings):
+        return type(cls.__name__, (cls,), {'timings': timings})
+
+    def xpath(self, query, namespaces=None, **kwargs):
+        started = time.perf_counter()
+        result = super().xpath(query, namespaces=namespaces, **kwargs)
+        if self.timings is not None:
+            self.timings.add(query, time.perf_counter() - started, len(result))
+        return result
@@ -0,0 +1,74 @@
+"""统一社会信用代码(GB 32100-2015)的校验与解析
+
+代码 18 位：登记管理部门(1) + 机构类别(1) + 登记管理机关行政区划码(6) + 主体标识码(9) + 校验码(1)。
+"""
+from collections import namedtuple
+
+from xizang.utils.regions import lookup_many, usci_area_code
+
+# 不含 I、O、Z、S、V
+CHARSET = '0123456789ABCDEFGHJKLMNPQRTUWXY'
+WEIGHTS = (1, 3, 9, 27, 19, 26, 16, 17, 20, 29, 25, 13, 8, 24, 10, 30, 28)
+VALUES = {char: value for value, char in enumerate(CHARSET)}
+
+# 登记管理部门码 + 机构类别码 -> 主体类型
+ENTITY_TYPES = {
+    '11': '机关', '12': '事业单位', '13': '中央编办直接管理机构编制的群众团体', '19': '其他机构编制',
+    '21': '外国常驻新闻机构', '29': '其他外交',
+    '31': '司法行政机关登记的律师执业机构', '32': '公证处', '33': '基层法律服务所', '34': '司法鉴定机构',
+    '35': '仲裁委员会', '39': '其他司法行政',
+    '41': '外国在华文化中心', '49': '其他文化',
+    '51': '社会团体', '52': '民办非企业单位', '53': '基金会', '59': '其他民政',
+    '61': '外国旅游部门常驻代表机构', '62': '港澳台地区旅游部门常驻内地(大陆)代表机构', '69': '其他旅游',
+    '71': '宗教活动场所', '72': '宗教院校', '79': '其他宗教',
+    '81': '基层工会', '89': '其他工会',
+    '91': '企业', '92': '个体工商户', '93': '农民专业合作社',
+    'A1': '军队事业单位', 'A9': '其他中央军委改革和编制办公室',
+    'N1': '农村集体经济组织', 'N2': '村民委员会', 'N3': '居民委员会', 'N9': '其他农业',
+    'Y1': '其他',
+}
+
+Usci = namedtuple('Usci', 'code valid check province city entity_type')
+
+
+def check_digit(code):
+    """前 17 位对应的校验码，含非法字符时为 None"""
+    try:
+        total = sum(VALUES[char] * weight for char, weight in zip(code, WEIGHTS))
+    except KeyError:
+        return None
+    return CHARSET[(31 - total % 31) % 31]
+
+
+def normalize(code):
+    return (code or '').strip().upper()
+
+
+def is_valid(code):
+    code = normalize(code)
+    return len(code) == 18 and check_digit(code[:17]) == code[17]
+
+
+def decode_many(codes):
+    """批量校验并解析，返回与输入等长的 Usci 列表
+
+    行政区划按代码去重后只查一次，适合整表回填。
+    """
+    codes = [normalize(code) for code in codes]
+    regions = lookup_many([usci_area_code(code) for code in codes])
+    decoded = []
+    for code, region in zip(codes, regions):
+        check = check_digit(code[:17]) if len(code) == 18 else None
+        decoded.append(Usci(
+            code,
+            check is not None and check == code[17],
+            check,
+            region.province,
+            region.city,
+            ENTITY_TYPES.get(code[:2], '') if len(code) == 18 else '',
+        ))
+    return decoded
+
+
+def decode(code):
+    return decode_many([code])[0]
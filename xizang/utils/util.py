@@ -1,8 +1,9 @@
 import re
 
-from bs4 import BeautifulSoup
+import lxml.html
+from lxml import etree
 
-from xizang.constants import company_qualifications, professional_titles
+from xizang.utils.matcher import match_qualifications
 
 # 中文数字映射表（简体 + 繁体）
 digit_map = {
@@ -103,45 +104,80 @@ def extract_duration(text: str) -> str:
     return ""
 
 # 公司资质
-def extract_construction_qualification(text: str) -> list:
-    # 构建明确的工程类型正则（用"|"分隔）
-    categories = company_qualifications
-    category_pattern = "|".join(categories)
-    # 完整正则：匹配"某类工程施工总承包X级"
-    pattern = rf"(?:{category_pattern})施工总承包[一二三四五六七八九十壹贰叁肆伍陆柒捌玖拾特]+级"
-    return re.findall(pattern, text)
+def extract_construction_qualification(text: str, matches=None) -> list:
+    # 匹配"某类工程施工总承包X级"，正则在 matcher 中导入时编译一次
+    matches = match_qualifications(text) if matches is None else matches
+    return [m.text for m in matches if m.kind == 'company']
 
 
 # 人员资质
-def extract_profession_and_level(text):
-    # 匹配"一级建造师"、"二级建造师"、"注册建造师"等
-    match = re.search(r'([一二三壹贰叁]级)?建造师', text)
-    if match:
-        return match.group(0)
-    return ""
+def extract_profession_and_level(text, matches=None):
+    # 匹配"一级建造师"、"二级建造师"、"注册建造师"等，返回第一个
+    matches = match_qualifications(text) if matches is None else matches
+    return next((m.text for m in matches if m.kind == 'constructor'), "")
+
+
+# 注册岗位
+def extract_professional_titles(text, matches=None) -> list:
+    # 匹配 constants.professional_titles 中的岗位，去重并保持出现顺序
+    matches = match_qualifications(text) if matches is None else matches
+    return list(dict.fromkeys(m.text for m in matches if m.kind == 'title'))
+
+# 纯文本中需要换行分隔的块级元素
+BLOCK_TAGS = {
+    'p', 'div', 'br', 'tr', 'li', 'table', 'thead', 'tbody', 'section', 'article',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'ul', 'ol', 'dl', 'dt', 'dd', 'pre', 'blockquote',
+}
+CELL_TAGS = {'td', 'th'}
+
+
+def clean_notice(html_content):
+    """一次 lxml 解析：去掉 script/style/注释，返回 (清理后的HTML, 纯文本)"""
+    if not html_content or not html_content.strip():
+        return '', ''
+    try:
+        root = lxml.html.fromstring(html_content)
+    except (etree.ParserError, ValueError):
+        # 带编码声明的字符串等 lxml 无法直接解析的输入；只有注释等没有元素的文档为空
+        try:
+            root = lxml.html.fromstring(html_content.encode('utf-8'))
+        except etree.ParserError:
+            return '', ''
+
+    etree.strip_elements(root, 'script', 'style', etree.Comment, with_tail=False)
+    html = lxml.html.tostring(root, encoding='unicode')
+
+    # 序列化之后再给块级元素补换行，纯文本才能按行匹配
+    for el in root.iter(etree.Element):
+        if el.tag in BLOCK_TAGS:
+            el.tail = '\n' + el.tail if el.tail else '\n'
+        elif el.tag in CELL_TAGS:
+            el.tail = ' ' + el.tail if el.tail else ' '
+    lines = (' '.join(line.split()) for line in root.text_content().splitlines())
+    text = '\n'.join(line for line in lines if line)
+    return html, text
+
 
 def remove_script_tags(html_content):
-    soup = BeautifulSoup(html_content, "html.parser")
+    return clean_notice(html_content)[0]
 
-    # 移除所有 <script> 标签
-    for script in soup.find_all("script"):
-        script.decompose()
 
-    return str(soup)
+def analyse_notice_fields(html_text):
+    """解析招标公告-网页，返回要写入 ProjectItem 的字段(纯函数，可在子进程中执行)"""
+    notice_html, notice_text = clean_notice(html_text)
+    # 资质、建造师、岗位在一次扫描中全部找出
+    matches = match_qualifications(notice_text)
+    return {
+        'notice_content': notice_html,
+        'company_req': extract_construction_qualification(notice_text, matches),
+        'person_req': extract_profession_and_level(notice_text, matches),
+        'professional_titles': extract_professional_titles(notice_text, matches),
+        'construction_funds': extract_funding_source(notice_text),
+        'project_duration': extract_duration(notice_text),
+    }
 
 
 def analyse_notice(html_text, project):
     """解析招标公告-网页"""
-    pure_text = remove_script_tags(html_text)
-    construction_funds = extract_funding_source(pure_text)
-    project_duration = extract_duration(pure_text)
-    company_req = extract_construction_qualification(pure_text)
-    person_req = extract_profession_and_level(pure_text)
-
-    project['notice_content'] = pure_text
-    project['company_req'] = company_req
-    project['person_req'] = person_req
-    project['construction_funds'] = construction_funds
-    project['project_duration'] = project_duration
-
+    project.update(analyse_notice_fields(html_text))
     return project